@@ -0,0 +1,71 @@
+"""A1-style address helpers shared by the backends and the API routes."""
+import re
+
+_CELL_RE = re.compile(r'^\$?([A-Za-z]{1,3})\$?(\d+)$')
+
+
+def col_letter(index):
+    """Convert a 1-based column index to its letter (1 -> A, 27 -> AA)."""
+    if index < 1:
+        raise ValueError(f"Invalid column index: {index}")
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def col_index(letters):
+    """Convert a column letter to its 1-based index (A -> 1, AA -> 27)."""
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + (ord(ch) - 64)
+    return index
+
+
+def parse_cell(address):
+    """Parse 'B3' or '$B$3' into a (row, column) tuple."""
+    match = _CELL_RE.match(address.strip())
+    if not match:
+        raise ValueError(f"Invalid cell address: {address}")
+    return int(match.group(2)), col_index(match.group(1))
+
+
+def parse_range(address):
+    """Parse 'A1:C5', 'A1' or 'Sheet1!A1:C5' into (row1, col1, row2, col2)."""
+    if '!' in address:
+        address = address.rsplit('!', 1)[1]
+    parts = address.split(':')
+    if len(parts) > 2:
+        raise ValueError(f"Invalid range address: {address}")
+    row1, col1 = parse_cell(parts[0])
+    row2, col2 = parse_cell(parts[-1])
+    return min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2)
+
+
+def split_sheet(reference):
+    """Split 'Data!A1:B2' or "'My Data'!A1" into (sheet name or None, address)."""
+    if '!' not in reference:
+        return None, reference
+    sheet, address = reference.rsplit('!', 1)
+    sheet = sheet.strip()
+    if len(sheet) >= 2 and sheet[0] == sheet[-1] == "'":
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, address
+
+
+def is_address(reference):
+    """Return True if ``reference`` is an A1 cell or range address."""
+    try:
+        parse_range(reference)
+    except ValueError:
+        return False
+    return True
+
+
+def format_range(row1, col1, row2, col2):
+    """Format 1-based bounds as an A1 range address ('A1' for a single cell)."""
+    first = f"{col_letter(col1)}{row1}"
+    if row1 == row2 and col1 == col2:
+        return first
+    return f"{first}:{col_letter(col2)}{row2}"
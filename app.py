@@ -1,18 +1,48 @@
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request, stream_with_context, url_for
 from flask_cors import CORS
-import xlwings as xw
 import pandas as pd
+import functools
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 import json
 import numpy as np
 from datetime import datetime
 from decimal import Decimal
-from config import DEFAULT_TEST_CELLS
+from config import (DEFAULT_TEST_CELLS, CELL_MAPPING_MAX_BYTES, READ_CHUNK_ROWS, PROMPT_SAMPLE_ROWS,
+                    PROMPT_SAMPLE_MAX_ROWS, PROMPT_CONTEXT_MAX_TOKENS, BATCH_MAX_TARGETS,
+                    BATCH_MAX_WORKERS, EXCEL_WORKER_TIMEOUT_SECONDS, SERVER_DEBUG, SERVER_HOST,
+                    SERVER_PORT, WRITE_BULK_MIN_OPS)
+from addresses import format_range, parse_range
+from backends import get_backend, set_backend
+from cell_mapping import build_cell_mapping, estimate_mapping_bytes
+from pagination import (PaginationError, StaleCursorError, check_cursor_target, fingerprint, next_cursor,
+                        parse_page_args)
+from readers import (BlockReader, column_positions, range_bounds, data_row_count, frame_blocks,
+                     trim_frame)
+from filters import (FilterError, filter_frame, filtered_window, parse_columns, parse_where, project_frame,
+                     resolve_columns)
+from cache import frame_digest, snapshot_cache
+from serialization import ORIENTS, FrameJSONProvider, frame_payload
+from columnar import (ARROW_MIMETYPE, TYPED_MIMETYPE, arrow_available, encode_arrow_stream,
+                      encode_typed_columns)
+from streaming import NDJSON_MIMETYPE, ndjson_lines
+from prompt_context import SAMPLE_STRATEGIES, build_prompt_context, read_sample, sample_offsets
+from worker import PRIORITY_HIGH, PRIORITY_NORMAL, excel_worker
+from flights import read_flights
+from jobs import FINISHED, JobQueueFull, WriteJob, write_jobs
+from writes import (AtomicWriteError, execute_atomic, execute_plan, parse_operations, plan_bounds,
+                    plan_writes, write_session)
+from sync import block_writes, changed_blocks, changed_mask, to_grid
 
-app = Flask(__name__)
-CORS(app, origins=["https://localhost:3000"], methods=["GET", "POST", "OPTIONS"])
+api = Blueprint('api', __name__)
 
 class RobustJSONEncoder(json.JSONEncoder):
-    """Custom JSON encoder that handles numpy types, datetime, and decimal."""
+    """Custom JSON encoder that handles numpy types, datetime, and decimal.
+    
+    Flask responses go through FrameJSONProvider; this encoder remains for
+    callers using json.dumps(cls=RobustJSONEncoder) directly.
+    """
     def default(self, obj):
         if isinstance(obj, np.integer):
             return int(obj)
@@ -28,13 +58,77 @@ class RobustJSONEncoder(json.JSONEncoder):
             return None
         return super().default(obj)
 
-app.json_encoder = RobustJSONEncoder
+class AfterWorker:
+    """View result finished on the request thread once the Excel worker is free.
+    
+    Used for work that needs no COM, such as encoding a response, so the
+    worker can move on to the next request meanwhile.
+    """
+    def __init__(self, finish):
+        self.finish = finish
+
+def on_excel_thread(priority=PRIORITY_NORMAL):
+    """Run a view on the Excel worker thread, the single owner of every COM call.
+    
+    Requests queue behind each other instead of racing on COM objects. A
+    request whose view has not started after EXCEL_WORKER_TIMEOUT_SECONDS is
+    cancelled and gets a 503; one that has started is always run to the end.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                response = excel_worker.call(view, *args, priority=priority,
+                                             timeout=EXCEL_WORKER_TIMEOUT_SECONDS, **kwargs)
+            except FuturesTimeoutError:
+                return jsonify({"error": "Excel is busy, try again later"}), 503
+            if isinstance(response, AfterWorker):
+                response = response.finish()
+            return response
+        return wrapper
+    return decorator
+
+def lands_read_flight(view):
+    """Share the final response of a view that leads a read flight with its followers.
+    
+    The view (on the worker) marks itself as leader in ``g.read_flight``;
+    once its response is encoded, followers get the same bytes, status and
+    headers.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            response = view(*args, **kwargs)
+        except BaseException as e:
+            if g.get('read_flight') is not None:
+                read_flights.land(g.pop('read_flight'), error=e)
+            raise
+        key = g.pop('read_flight', None)
+        if key is None:
+            return response
+        response = current_app.make_response(response)
+        read_flights.land(key, (response.get_data(), response.status_code, response.headers.to_wsgi_list()))
+        return response
+    return wrapper
+
+def follow_read_flight(flight):
+    """Answer a coalesced request with the response encoded by its flight's leader."""
+    try:
+        body, status, headers = flight.result(EXCEL_WORKER_TIMEOUT_SECONDS)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return Response(body, status=status, headers=headers)
+
+def on_worker(lines):
+    """Produce the lines of a streamed response on the Excel worker thread."""
+    return stream_with_context(excel_worker.iterate(lines, timeout=EXCEL_WORKER_TIMEOUT_SECONDS))
 
 def get_excel_app():
-    """Get the active Excel application."""
+    """Get the active Excel application (cached while it stays alive)."""
     try:
-        return xw.apps.active
+        return get_backend().handles.get_app()
     except Exception:
+        get_backend().handles.invalidate()
         return None
 
 def get_active_workbook(app=None):
@@ -44,23 +138,190 @@ def get_active_workbook(app=None):
     if app is None:
         return None
     try:
-        return app.books.active
+        return get_backend().handles.get_book(app)
     except Exception:
+        get_backend().handles.invalidate()
         return None
 
 def get_worksheet(workbook, sheet_name=None):
     """Get a specific worksheet or the active one."""
-    if sheet_name:
-        try:
-            return workbook.sheets[sheet_name]
-        except Exception:
-            return None
     try:
-        return workbook.sheets.active
+        return get_backend().handles.get_sheet(workbook, sheet_name)
     except Exception:
         return None
 
-@app.route('/health', methods=['GET'])
+def locate_target(workbook_name=None, sheet_name=None):
+    """Resolve the app, workbook and sheet a request targets; active ones by default.
+    
+    Returns ``((app, workbook, worksheet), None)``, or ``(None, response)``
+    with the 503/404 error to send.
+    """
+    excel_app = get_excel_app()
+    if excel_app is None:
+        return None, (jsonify({"error": "No Excel application running"}), 503)
+    
+    # Get workbook
+    if workbook_name:
+        try:
+            workbook = get_backend().handles.get_book(excel_app, workbook_name)
+        except Exception:
+            return None, (jsonify({"error": f"Workbook '{workbook_name}' not found"}), 404)
+    else:
+        workbook = get_active_workbook(excel_app)
+        if workbook is None:
+            return None, (jsonify({"error": "No active workbook found"}), 404)
+    
+    # Get worksheet
+    worksheet = get_worksheet(workbook, sheet_name)
+    if worksheet is None:
+        if sheet_name:
+            return None, (jsonify({"error": f"Sheet '{sheet_name}' not found in workbook '{workbook.name}'"}), 404)
+        return None, (jsonify({"error": "No active worksheet found"}), 404)
+    return (excel_app, workbook, worksheet), None
+
+def resolve_read_target(workbook, worksheet, reference=None):
+    """Return (sheet, range, cache key part) for an explicit reference or the used range.
+    
+    ``reference`` may be an A1 address (optionally sheet-qualified), a defined
+    name or a table name; it can point at another sheet than ``worksheet``.
+    """
+    if reference:
+        target = get_backend().resolve_range(workbook, worksheet, reference)
+        return target.sheet, target, target.address
+    return worksheet, get_backend().used_range(worksheet), None
+
+def trimmed_bounds(worksheet, bounds, cache_key, version):
+    """Cut trailing empty rows and columns off ``bounds``, probing once per sheet version."""
+    extent = snapshot_cache.get_extent(cache_key, version)
+    if extent is None:
+        # An empty range keeps just its first cell, which leaves no data rows
+        extent = get_backend().data_extent(worksheet, bounds) or bounds[:2] * 2
+        snapshot_cache.put_extent(cache_key, version, extent)
+    return extent
+
+def locate_read(workbook, worksheet, reference=None, trim=True):
+    """Resolve the block a read covers.
+    
+    Returns (worksheet, cache key, sheet version, bounds); bounds is None when
+    the sheet reports no used range. Raises KeyError for unknown references.
+    """
+    worksheet, target, range_key = resolve_read_target(workbook, worksheet, reference)
+    cache_key = (workbook.name, worksheet.name, range_key if trim else (range_key, 'untrimmed'))
+    if target is None:
+        return worksheet, cache_key, None, None
+    version = get_backend().sheet_version(worksheet, target)
+    bounds = range_bounds(target)
+    if trim:
+        bounds = trimmed_bounds(worksheet, bounds, cache_key, version)
+    return worksheet, cache_key, version, bounds
+
+def frame_source(worksheet, bounds, cache_key, version, columns=None, predicates=None, chunk_rows=None):
+    """Pick where a frame comes from: a cached snapshot or a (projected) block reader.
+    
+    With a projection or filters, only the returned and filtered columns are
+    read, and the result is cached under its own key. Returns (snapshot or
+    None, reader, frame key, output columns, their sheet column numbers,
+    predicates keyed by header label); raises FilterError for unknown columns.
+    """
+    snapshot = snapshot_cache.get(cache_key, version)
+    frame_key = cache_key
+    reader = BlockReader(get_backend(), worksheet, bounds, chunk_rows, auto_tune=chunk_rows is None)
+    out_columns, col_numbers = None, None
+    if columns is not None or predicates:
+        header = list(snapshot.frame.columns) if snapshot is not None else reader.read_header()
+        read_columns, out_columns, predicates = resolve_columns(header, columns, predicates)
+        col_numbers = [bounds[1] + p for p in column_positions(header, out_columns)]
+        if snapshot is None:
+            frame_key = (cache_key[0], cache_key[1],
+                         (cache_key[2], 'columns', tuple(map(str, read_columns))))
+            snapshot = snapshot_cache.get(frame_key, version)
+            reader.project(read_columns)
+    return snapshot, reader, frame_key, out_columns, col_numbers, predicates
+
+def read_sheet_frame(worksheet, bounds, cache_key, version, columns=None, predicates=None,
+                     chunk_rows=None, trim=True):
+    """Read all rows of ``bounds`` through the snapshot cache, projected and filtered."""
+    snapshot, reader, frame_key, out_columns, _, predicates = frame_source(
+        worksheet, bounds, cache_key, version, columns, predicates, chunk_rows)
+    if snapshot is not None:
+        df = snapshot.frame
+    else:
+        df = reader.read_frame()
+        if trim and reader.positions is None:
+            df = trim_frame(df)
+        snapshot_cache.put(frame_key, version, df)
+    return project_frame(df, out_columns, predicates)
+
+def negotiate_format():
+    """Pick the response format from the Accept header (JSON unless a binary type is asked for)."""
+    best = request.accept_mimetypes.best_match(['application/json', ARROW_MIMETYPE, TYPED_MIMETYPE])
+    return {ARROW_MIMETYPE: 'arrow', TYPED_MIMETYPE: 'typed'}.get(best, 'json')
+
+def representation_etag(digest, response_format, *identity):
+    """Strong ETag for a content digest as rendered by the current request.
+    
+    The cursor is left out: it only encodes offset/limit, which are part of
+    ``identity`` already.
+    """
+    params = sorted((k, v) for k, v in request.args.items(multi=True) if k != 'cursor')
+    token = repr((digest, response_format, identity, params)).encode('utf-8')
+    return hashlib.blake2b(token, digest_size=16).hexdigest()
+
+def stream_sheet_rows(workbook, worksheet, bounds, reader, page=None, chunk_rows=None, snapshot=None,
+                      columns=None, predicates=None):
+    """Stream a sheet as NDJSON, from a cached snapshot or reading the range in row blocks."""
+    offset, limit = (page[0], page[1]) if page is not None else (0, None)
+    # With filters, offset and limit count matching rows, so every block is read and filtered
+    window = (0, None) if predicates else (offset, limit)
+    if snapshot is not None:
+        header = list(snapshot.frame.columns)
+        blocks = frame_blocks(snapshot.frame, chunk_rows or READ_CHUNK_ROWS, *window)
+    else:
+        header = reader.frame_columns
+        blocks = reader.iter_blocks(*window)
+    if predicates:
+        blocks = filtered_window(blocks, predicates, offset, limit)
+    if columns is not None or predicates:
+        header = columns
+        blocks = (project_frame(block, columns) for block in blocks)
+    
+    meta = {
+        "workbook": workbook.name,
+        "sheet": worksheet.name,
+        "range": format_range(*bounds),
+        "columns": header,
+        "shape": [data_row_count(bounds), len(header)]
+    }
+    return Response(on_worker(ndjson_lines(meta, blocks, current_app.json.dumps)), mimetype=NDJSON_MIMETYPE)
+
+def raw_sheet_values(workbook, worksheet, bounds, page=None, chunk_rows=None, header=True, cursor_key=(None, None)):
+    """Return a range as the backend's 2D value lists, skipping pandas entirely."""
+    offset, limit = (page[0], page[1]) if page is not None else (0, None)
+    reader = BlockReader(get_backend(), worksheet, bounds, chunk_rows, auto_tune=chunk_rows is None)
+    total_rows = data_row_count(bounds) + (0 if header else 1)
+    
+    data = []
+    for block in reader.iter_rows(offset, limit, header):
+        data.extend(block)
+    
+    response_data = {
+        "workbook": workbook.name,
+        "sheet": worksheet.name,
+        "range": format_range(*bounds),
+        "shape": [total_rows, bounds[3] - bounds[1] + 1]
+    }
+    if header:
+        response_data["columns"] = reader.read_header()
+    if page is not None:
+        response_data["offset"] = offset
+        response_data["limit"] = limit
+        response_data["next_cursor"] = next_cursor(workbook.name, worksheet.name,
+                                                   offset, limit, total_rows, *cursor_key)
+    response_data["data"] = data
+    return AfterWorker(lambda: jsonify(response_data))
+
+@api.route('/health', methods=['GET'])
+@on_excel_thread(PRIORITY_HIGH)
 def health_check():
     """Health check endpoint."""
     try:
@@ -72,11 +333,13 @@ def health_check():
         if workbook is None:
             return jsonify({"status": "unhealthy", "error": "No active workbook found"}), 404
         
-        return jsonify({"status": "healthy", "workbook": workbook.name})
+        return jsonify({"status": "healthy", "workbook": workbook.name, "worker": excel_worker.stats()})
     except Exception as e:
         return jsonify({"status": "unhealthy", "error": str(e)}), 500
 
-@app.route('/api/excel-data', methods=['GET'])
+@api.route('/api/excel-data', methods=['GET'])
+@lands_read_flight
+@on_excel_thread()
 def get_excel_data():
     """Get data from Excel with optional workbook/sheet targeting."""
     try:
@@ -84,142 +347,535 @@ def get_excel_data():
         workbook_name = request.args.get('workbook')
         sheet_name = request.args.get('sheet')
         include_cell_mapping = request.args.get('include_cell_mapping', 'true').lower() == 'true'
+        response_format = request.args.get('format', '').lower() or negotiate_format()
+        if response_format not in ('json', 'ndjson', 'arrow', 'typed'):
+            return jsonify({"error": f"Unsupported format: {response_format}"}), 400
+        if response_format == 'arrow' and not arrow_available():
+            return jsonify({"error": "Arrow responses require pyarrow on the server"}), 406
+        mode = request.args.get('mode', 'frame').lower()
+        if mode not in ('frame', 'raw'):
+            return jsonify({"error": f"Unsupported mode: {mode}"}), 400
+        if mode == 'raw' and response_format != 'json':
+            return jsonify({"error": "mode=raw only supports JSON responses"}), 400
+        raw_header = request.args.get('header', 'true').lower() == 'true'
+        try:
+            columns = parse_columns(request.args.get('columns'))
+            predicates = parse_where(request.args.getlist('where'))
+        except FilterError as e:
+            return jsonify({"error": str(e)}), 400
+        if mode == 'raw' and (columns is not None or predicates):
+            return jsonify({"error": "'columns' and 'where' are not supported with mode=raw"}), 400
+        orient = request.args.get('orient', 'records').lower()
+        if orient not in ORIENTS:
+            return jsonify({"error": f"Unsupported orient: {orient}"}), 400
+        chunk_rows = request.args.get('chunk_rows', type=int)
+        if 'chunk_rows' in request.args and (chunk_rows is None or chunk_rows < 1):
+            return jsonify({"error": "'chunk_rows' must be a positive integer"}), 400
+        max_mapping_bytes = request.args.get('max_mapping_bytes', CELL_MAPPING_MAX_BYTES, type=int)
         
-        excel_app = get_excel_app()
-        if excel_app is None:
-            return jsonify({"error": "No Excel application running"}), 503
+        try:
+            page = parse_page_args(request.args)
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Get workbook
-        if workbook_name:
-            try:
-                workbook = excel_app.books[workbook_name]
-            except Exception:
-                return jsonify({"error": f"Workbook '{workbook_name}' not found"}), 404
-        else:
-            workbook = get_active_workbook(excel_app)
-            if workbook is None:
-                return jsonify({"error": "No active workbook found"}), 404
-        
-        # Get worksheet
-        worksheet = get_worksheet(workbook, sheet_name)
-        if worksheet is None:
-            if sheet_name:
-                return jsonify({"error": f"Sheet '{sheet_name}' not found in workbook '{workbook.name}'"}), 404
-            else:
-                return jsonify({"error": "No active worksheet found"}), 404
+        target, error = locate_target(workbook_name, sheet_name)
+        if error is not None:
+            return error
+        _, workbook, worksheet = target
         
-        # Get used range
-        used_range = worksheet.used_range
-        if used_range is None:
+        # Read an explicit range, defined name or table if one is given, else the used range;
+        # trailing empty rows/columns (stray formatting) are cut off unless asked not to
+        trim = request.args.get('trim', 'true').lower() == 'true'
+        try:
+            worksheet, cache_key, version, bounds = locate_read(workbook, worksheet,
+                                                                request.args.get('range'), trim)
+        except KeyError as e:
+            return jsonify({"error": e.args[0]}), 404
+        if bounds is None or data_row_count(bounds) == 0:
             return jsonify({"error": "No data found in worksheet"}), 404
+        total_rows = data_row_count(bounds)
         
-        # Get data as DataFrame
-        df = used_range.options(pd.DataFrame, header=1, index=False).value
+        # Cursors are bound to what is read and to the sheet version they were issued at
+        cursor_key = (fingerprint(request.args.get('range'), request.args.get('columns'),
+                                  request.args.getlist('where'), mode, raw_header, trim),
+                      fingerprint(version))
+        if page is not None:
+            try:
+                check_cursor_target(page[2], workbook.name, worksheet.name, *cursor_key)
+            except StaleCursorError as e:
+                return jsonify({"error": str(e)}), 409
+            except PaginationError as e:
+                return jsonify({"error": str(e)}), 400
         
-        if df is None or df.empty:
-            return jsonify({"error": "No data found in worksheet"}), 404
+        # Identical reads of this sheet version that overlap share one encoded response
+        if response_format != 'ndjson':
+            flight_key = (cache_key, version, response_format, request.headers.get('If-None-Match'),
+                          tuple(sorted(request.args.items(multi=True))))
+            flight, leading = read_flights.begin(flight_key)
+            if not leading:
+                return AfterWorker(functools.partial(follow_read_flight, flight))
+            g.read_flight = flight_key
+        
+        if mode == 'raw':
+            return raw_sheet_values(workbook, worksheet, bounds, page, chunk_rows, raw_header, cursor_key)
+        
+        # Serve from the snapshot cache while the sheet version is unchanged
+        snapshot, reader, frame_key, out_columns, col_numbers, predicates = frame_source(
+            worksheet, bounds, cache_key, version, columns, predicates, chunk_rows)
+        
+        if response_format == 'ndjson':
+            return stream_sheet_rows(workbook, worksheet, bounds, reader, page, chunk_rows, snapshot,
+                                     out_columns, predicates)
+        
+        if page is not None:
+            offset, limit, _ = page
+        # Pages of a filtered read count matching rows, so the whole range is filtered first
+        filtered_page = page is not None and bool(predicates)
+        if snapshot is not None:
+            df = snapshot.frame if page is None or filtered_page else snapshot.frame.iloc[offset:offset + limit]
+        else:
+            # Read the used range (or just the requested page) in row chunks
+            if page is not None and not filtered_page:
+                df = reader.read_frame(offset, limit)
+            else:
+                df = reader.read_frame()
+                if trim and reader.positions is None:
+                    df = trim_frame(df)
+                    total_rows = len(df)
+                snapshot = snapshot_cache.put(frame_key, version, df)
+        
+        # Conditional read: answer If-None-Match with 304 before serializing anything
+        if filtered_page:
+            matches = filter_frame(df, predicates)
+            total_rows = matched_rows = len(matches)
+            df = project_frame(matches.iloc[offset:offset + limit], out_columns)
+            digest = frame_digest(df)
+        else:
+            if page is None:
+                offset, limit = 0, None
+            digest = snapshot.digest(offset, limit) if snapshot is not None else frame_digest(df)
+            df = project_frame(df, out_columns, predicates)
+            matched_rows = len(df)
+        shape = (total_rows, df.shape[1])
+        etag = representation_etag(digest, response_format, workbook.name, worksheet.name,
+                                   offset, limit, shape)
+        if request.if_none_match.contains(etag):
+            not_modified = Response(status=304)
+            not_modified.set_etag(etag)
+            return not_modified
         
         # Prepare response
-        response_data = {
+        meta = {
             "workbook": workbook.name,
             "sheet": worksheet.name,
-            "data": df.to_dict('records'),
-            "shape": df.shape
+            "range": format_range(*bounds),
+            "shape": shape
         }
+        if predicates:
+            meta["matched_rows"] = matched_rows
         
-        # Add cell mapping for smaller datasets
-        if include_cell_mapping and df.shape[0] <= 100:
-            cell_mapping = {}
-            start_row = used_range.row
-            start_col = used_range.column
-            
-            for i, row in df.iterrows():
-                for j, col in enumerate(df.columns):
-                    cell_addr = xw.utils.int_to_col_letter(start_col + j) + str(start_row + i + 1)
-                    cell_mapping[cell_addr] = row[col]
-            
-            response_data["cell_mapping"] = cell_mapping
+        if page is not None:
+            meta["offset"] = offset
+            meta["limit"] = limit
+            meta["next_cursor"] = next_cursor(workbook.name, worksheet.name,
+                                              offset, limit, total_rows, *cursor_key)
         
-        return jsonify(response_data)
+        # Everything below only touches the frame, so it runs once the worker is released
+        def encode():
+            try:
+                # Binary columnar responses skip JSON encoding and the cell mapping
+                if response_format == 'arrow':
+                    response = Response(encode_arrow_stream(df, meta), mimetype=ARROW_MIMETYPE)
+                elif response_format == 'typed':
+                    response = Response(encode_typed_columns(df, meta), mimetype=TYPED_MIMETYPE)
+                else:
+                    response_data = {**meta, **frame_payload(df, orient)}
+                    
+                    # Add cell mapping while it fits the byte budget
+                    if include_cell_mapping:
+                        start_row, start_col = bounds[0], bounds[1]
+                        estimate = estimate_mapping_bytes(df, start_row, start_col, col_numbers=col_numbers)
+                        if estimate <= max_mapping_bytes:
+                            response_data["cell_mapping"] = build_cell_mapping(df, start_row, start_col,
+                                                                               col_numbers)
+                    
+                    response = jsonify(response_data)
+            except Exception as e:
+                return jsonify({"error": str(e)}), 500
+            
+            response.set_etag(etag)
+            return response
+        return AfterWorker(encode)
+
     
+    except FilterError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/write-excel', methods=['POST'])
-def write_excel_data():
-    """Write data to Excel with comprehensive targeting support."""
+def batch_pool():
+    """Worker pool shared by all batch reads, created on first use."""
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='batch-read')
+    return _batch_pool
+
+_batch_pool = None
+
+def batch_read_one(index, spec, workbook, worksheet, orient):
+    """Read one batch target into a result dict; failures become an error result."""
+    result = {"index": index, "workbook": workbook.name}
     try:
-        data = request.get_json()
-        if not data or 'operations' not in data:
-            return jsonify({"error": "No operations provided"}), 400
+        orient = str(spec.get('orient', orient)).lower()
+        if orient not in ORIENTS:
+            raise FilterError(f"Unsupported orient: {orient}")
+        columns = spec.get('columns')
+        columns = parse_columns(','.join(columns) if isinstance(columns, list) else columns)
+        where = spec.get('where') or []
+        predicates = parse_where([where] if isinstance(where, str) else where)
+        trim = bool(spec.get('trim', True))
         
-        operations = data['operations']
-        workbook_name = data.get('workbook')
-        sheet_name = data.get('sheet')
+        worksheet, cache_key, version, bounds = locate_read(workbook, worksheet, spec.get('range'), trim)
+        result["sheet"] = worksheet.name
+        if bounds is None or data_row_count(bounds) == 0:
+            return {**result, "error": "No data found in worksheet", "status": 404}
+        df = read_sheet_frame(worksheet, bounds, cache_key, version, columns, predicates, trim=trim)
+        
+        result["range"] = format_range(*bounds)
+        result["shape"] = [data_row_count(bounds), df.shape[1]]
+        if predicates:
+            result["matched_rows"] = len(df)
+        result.update(frame_payload(df, orient))
+        return result
+    except FilterError as e:
+        return {**result, "error": str(e), "status": 400}
+    except KeyError as e:
+        return {**result, "error": e.args[0], "status": 404}
+    except Exception as e:
+        return {**result, "error": str(e), "status": 500}
+
+@api.route('/api/batch-read', methods=['POST'])
+@on_excel_thread()
+def batch_read():
+    """Read several (workbook, sheet, range) targets in one request."""
+    try:
+        data = request.get_json(silent=True) or {}
+        targets = data.get('targets')
+        if not isinstance(targets, list) or not targets:
+            return jsonify({"error": "No targets provided"}), 400
+        if len(targets) > BATCH_MAX_TARGETS:
+            return jsonify({"error": f"At most {BATCH_MAX_TARGETS} targets per batch"}), 400
+        response_format = str(data.get('format', 'json')).lower()
+        if response_format not in ('json', 'ndjson'):
+            return jsonify({"error": f"Unsupported format: {response_format}"}), 400
+        orient = data.get('orient', 'records')
         
         excel_app = get_excel_app()
         if excel_app is None:
             return jsonify({"error": "No Excel application running"}), 503
         
-        # Get workbook
-        if workbook_name:
+        # Resolve every distinct workbook and sheet once for the whole batch
+        books, sheets = {}, {}
+        jobs, results = [], {}
+        for index, spec in enumerate(targets):
+            if not isinstance(spec, dict):
+                results[index] = {"index": index, "error": "Each target must be an object", "status": 400}
+                continue
+            book_name, sheet_name = spec.get('workbook'), spec.get('sheet')
+            try:
+                if book_name not in books:
+                    books[book_name] = get_backend().handles.get_book(excel_app, book_name)
+                workbook = books[book_name]
+            except Exception:
+                results[index] = {"index": index, "error": f"Workbook '{book_name}' not found", "status": 404}
+                continue
             try:
-                workbook = excel_app.books[workbook_name]
+                if (workbook.name, sheet_name) not in sheets:
+                    sheets[(workbook.name, sheet_name)] = get_backend().handles.get_sheet(workbook, sheet_name)
+                worksheet = sheets[(workbook.name, sheet_name)]
             except Exception:
-                return jsonify({"error": f"Workbook '{workbook_name}' not found"}), 404
+                results[index] = {"index": index, "workbook": workbook.name,
+                                  "error": f"Sheet '{sheet_name}' not found in workbook '{workbook.name}'",
+                                  "status": 404}
+                continue
+            jobs.append((index, spec, workbook, worksheet, orient))
+        
+        # Fan out over the shared pool when the backend tolerates concurrent reads;
+        # COM-bound backends read sequentially on the request thread
+        if get_backend().concurrent_reads and len(jobs) > 1:
+            futures = [batch_pool().submit(batch_read_one, *job) for job in jobs]
+            completed = (future.result() for future in as_completed(futures))
         else:
-            workbook = get_active_workbook(excel_app)
-            if workbook is None:
-                return jsonify({"error": "No active workbook found"}), 404
-        
-        # Get worksheet
-        worksheet = get_worksheet(workbook, sheet_name)
-        if worksheet is None:
-            if sheet_name:
-                return jsonify({"error": f"Sheet '{sheet_name}' not found in workbook '{workbook.name}'"}), 404
+            completed = (batch_read_one(*job) for job in jobs)
+        
+        if response_format == 'ndjson':
+            def lines():
+                for result in results.values():
+                    yield current_app.json.dumps(result) + '\n'
+                for result in completed:
+                    yield current_app.json.dumps(result) + '\n'
+            return Response(on_worker(lines()), mimetype=NDJSON_MIMETYPE)
+        
+        for result in completed:
+            results[result["index"]] = result
+        return jsonify({"results": [results[i] for i in range(len(targets))]})
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/api/prompt-context', methods=['GET'])
+@on_excel_thread()
+def get_prompt_context():
+    """Summarize a sheet for an LLM prompt: shape, header and a few sample rows."""
+    try:
+        workbook_name = request.args.get('workbook')
+        sheet_name = request.args.get('sheet')
+        n_rows = request.args.get('rows', PROMPT_SAMPLE_ROWS, type=int)
+        if n_rows is None or not 1 <= n_rows <= PROMPT_SAMPLE_MAX_ROWS:
+            return jsonify({"error": f"'rows' must be between 1 and {PROMPT_SAMPLE_MAX_ROWS}"}), 400
+        strategy = request.args.get('strategy', 'head').lower()
+        if strategy not in SAMPLE_STRATEGIES:
+            return jsonify({"error": f"Unsupported strategy: {strategy}"}), 400
+        seed = request.args.get('seed', 0, type=int)
+        max_tokens = request.args.get('max_tokens', PROMPT_CONTEXT_MAX_TOKENS, type=int)
+        if max_tokens is None or max_tokens < 1:
+            return jsonify({"error": "'max_tokens' must be a positive integer"}), 400
+        response_format = request.args.get('format', 'json').lower()
+        if response_format not in ('json', 'text'):
+            return jsonify({"error": f"Unsupported format: {response_format}"}), 400
+        
+        target, error = locate_target(workbook_name, sheet_name)
+        if error is not None:
+            return error
+        _, workbook, worksheet = target
+        
+        # Read an explicit range, defined name or table if one is given, else the used range
+        try:
+            worksheet, full_key, version, bounds = locate_read(workbook, worksheet,
+                                                               request.args.get('range'))
+        except KeyError as e:
+            return jsonify({"error": e.args[0]}), 404
+        if bounds is None or data_row_count(bounds) == 0:
+            return jsonify({"error": "No data found in worksheet"}), 404
+        total_rows = data_row_count(bounds)
+        
+        # Sample from a cached full read if there is one, else read only the sampled rows;
+        # the sample itself is cached under the same sheet version
+        offsets = sample_offsets(total_rows, n_rows, strategy, seed)
+        sample_key = (workbook.name, worksheet.name, ('sample', full_key[2], strategy, n_rows, seed))
+        snapshot = snapshot_cache.get(sample_key, version)
+        if snapshot is None:
+            full = snapshot_cache.get(full_key, version)
+            if full is not None:
+                sample = full.frame.iloc[offsets]
             else:
-                return jsonify({"error": "No active worksheet found"}), 404
+                sample = read_sample(get_backend(), worksheet, bounds, offsets)
+            snapshot = snapshot_cache.put(sample_key, version, sample)
         
-        results = []
+        shape = (total_rows, bounds[3] - bounds[1] + 1)
+        context = build_prompt_context(workbook.name, worksheet.name, shape, snapshot.frame,
+                                       bounds[0], strategy, max_tokens)
+        if response_format == 'text':
+            return Response(context['text'], mimetype='text/plain')
+        return jsonify(context)
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def locate_write_target(data):
+    """Resolve the app, workbook and sheet a write request targets (see ``locate_target``)."""
+    return locate_target(data.get('workbook'), data.get('sheet'))
+
+def wants_bulk(data, ops):
+    """Bulk mode as requested, or by default for WRITE_BULK_MIN_OPS operations and more."""
+    bulk = data.get('bulk')
+    if bulk is None:
+        return len(ops) >= WRITE_BULK_MIN_OPS
+    return bool(bulk)
+
+@api.route('/api/write-excel', methods=['POST'])
+@on_excel_thread()
+def write_excel_data():
+    """Write data to Excel with comprehensive targeting support."""
+    try:
+        data = request.get_json()
+        if not data or 'operations' not in data:
+            return jsonify({"error": "No operations provided"}), 400
         
-        for operation in operations:
-            op_type = operation.get('type')
-            
-            if op_type == 'write_cell':
-                cell = operation.get('cell')
-                value = operation.get('value')
-                
-                if not cell:
-                    results.append({"error": "Cell address required for write_cell operation"})
-                    continue
-                
-                try:
-                    worksheet.range(cell).value = value
-                    results.append({"success": f"Written '{value}' to cell {cell}"})
-                except Exception as e:
-                    results.append({"error": f"Failed to write to cell {cell}: {str(e)}"})
-            
-            elif op_type == 'write_range':
-                range_addr = operation.get('range')
-                values = operation.get('values')
-                
-                if not range_addr or not values:
-                    results.append({"error": "Range and values required for write_range operation"})
-                    continue
-                
+        target, error = locate_write_target(data)
+        if error is not None:
+            return error
+        excel_app, workbook, worksheet = target
+        
+        # Coalesce the ops into as few rectangular writes as possible
+        ops, results = parse_operations(data['operations'])
+        steps = plan_writes(ops)
+        atomic = bool(data.get('atomic'))
+        if atomic and steps:
+            try:
+                plan_bounds(steps)
+            except AtomicWriteError as e:
+                return jsonify({"error": str(e)}), 400
+        
+        bulk = wants_bulk(data, ops)
+        timing = {}
+        payload = {"results": results, "bulk": bulk, "timing": timing}
+        with write_session(get_backend(), excel_app, timing, bulk=bulk):
+            if atomic:
+                # All or nothing: snapshot the written region, restore it on failure
+                payload.update(atomic=True, **execute_atomic(get_backend(), worksheet, steps, results, timing))
+            else:
+                execute_plan(get_backend(), worksheet, steps, results)
+        
+        snapshot_cache.invalidate(workbook.name, worksheet.name)
+        return jsonify(payload)
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/api/write-jobs', methods=['POST'])
+@on_excel_thread()
+def submit_write_job():
+    """Queue write operations as a background job and return its id at once."""
+    try:
+        data = request.get_json()
+        if not data or 'operations' not in data:
+            return jsonify({"error": "No operations provided"}), 400
+        
+        target, error = locate_write_target(data)
+        if error is not None:
+            return error
+        _, workbook, worksheet = target
+        
+        ops, results = parse_operations(data['operations'])
+        job = WriteJob(ops, results, workbook.name, worksheet.name, bulk=wants_bulk(data, ops))
+        try:
+            write_jobs.submit(job)
+        except JobQueueFull as e:
+            return jsonify({"error": str(e)}), 429, {'Retry-After': '1'}
+        location = url_for('api.get_write_job', job_id=job.id)
+        return jsonify(job.status(include_results=False)), 202, {'Location': location}
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/api/write-jobs/<job_id>', methods=['GET'])
+def get_write_job(job_id):
+    """Progress, throughput and per-op results of a write job (``results=false`` omits them)."""
+    job = write_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Write job '{job_id}' not found"}), 404
+    include_results = request.args.get('results', 'true').lower() != 'false'
+    return jsonify(job.status(include_results=include_results))
+
+@api.route('/api/write-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_write_job(job_id):
+    """Cancel a write job; chunks already written stay written."""
+    job = write_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Write job '{job_id}' not found"}), 404
+    if job.state in FINISHED:
+        return jsonify({"error": f"Write job '{job_id}' already {job.state}"}), 409
+    job.cancel()
+    return jsonify(job.status(include_results=False))
+
+@api.route('/api/sync-range', methods=['POST'])
+@on_excel_thread()
+def sync_range():
+    """Bring a range to the desired values, writing only the cells that differ."""
+    try:
+        data = request.get_json()
+        if not data or not data.get('range') or 'values' not in data:
+            return jsonify({"error": "Range and values required"}), 400
+        try:
+            desired = to_grid(data['values'])
+            if '!' in data['range']:
+                raise ValueError("Give the sheet in 'sheet', not in the range address")
+            row1, col1, row2, col2 = parse_range(data['range'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        rows, cols = desired.shape
+        if (row1, col1) != (row2, col2) and (row2 - row1 + 1, col2 - col1 + 1) != (rows, cols):
+            return jsonify({"error": f"Range {data['range']} does not match the {rows}x{cols} values"}), 400
+        bounds = (row1, col1, row1 + rows - 1, col1 + cols - 1)
+        address = format_range(*bounds)
+        
+        target, error = locate_write_target(data)
+        if error is not None:
+            return error
+        excel_app, workbook, worksheet = target
+        backend = get_backend()
+        timing = {}
+        
+        # Current state: what the last sync left, while the sheet is unchanged since.
+        # Only exact version tokens can vouch for that; probes miss edits inside the range.
+        start = time.perf_counter()
+        state_key = (workbook.name, worksheet.name, ('sync', address))
+        snapshot = None
+        if backend.exact_versions:
+            snapshot = snapshot_cache.get(state_key, backend.sheet_version(worksheet))
+        if snapshot is not None:
+            current, source = snapshot.frame.to_numpy(dtype=object), 'cache'
+        else:
+            current = np.empty(desired.shape, dtype=object)
+            current[:] = backend.read_values(worksheet, address)
+            source = 'read'
+        timing['read_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        
+        start = time.perf_counter()
+        mask = changed_mask(current, desired)
+        writes = block_writes(bounds, desired, changed_blocks(mask))
+        timing['diff_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        
+        errors = []
+        bulk = wants_bulk(data, writes)
+        with write_session(backend, excel_app, timing, bulk=bulk):
+            for block, values in writes:
                 try:
-                    worksheet.range(range_addr).value = values
-                    results.append({"success": f"Written data to range {range_addr}"})
+                    backend.write_values(worksheet, block, values)
                 except Exception as e:
-                    results.append({"error": f"Failed to write to range {range_addr}: {str(e)}"})
-            
-            else:
-                results.append({"error": f"Unknown operation type: {op_type}"})
+                    errors.append({"range": block, "error": f"Failed to write to range {block}: {e}"})
         
-        return jsonify({"results": results})
+        if writes:
+            snapshot_cache.invalidate(workbook.name, worksheet.name)
+        if backend.exact_versions and not errors:
+            snapshot_cache.put(state_key, backend.sheet_version(worksheet), pd.DataFrame(desired))
+        changed = int(mask.sum())
+        payload = {
+            "range": address,
+            "cells": int(mask.size),
+            "changed": changed,
+            "skipped": int(mask.size) - changed,
+            "writes": len(writes),
+            "source": source,
+            "bulk": bulk,
+            "timing": timing,
+        }
+        if errors:
+            payload["errors"] = errors
+        return jsonify(payload)
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def create_app(backend=None, testing=False):
+    """Build the Flask application: API routes, CORS and the frame-aware JSON provider.
+    
+    ``backend`` installs a workbook backend instance for the process (e.g. a
+    MemoryBackend for load tests); by default it comes from config on first use.
+    """
+    flask_app = Flask(__name__)
+    flask_app.config['TESTING'] = testing
+    CORS(flask_app, origins=["https://localhost:3000"], methods=["GET", "POST", "OPTIONS"])
+    flask_app.json = FrameJSONProvider(flask_app)
+    flask_app.register_blueprint(api)
+    if backend is not None:
+        set_backend(backend)
+    return flask_app
+
+# Module-level application for tests and `app:app` WSGI entry points
+app = create_app()
+
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=3001, debug=True)
\ No newline at end of file
+    # Werkzeug development server; use server.py to serve the task pane
+    app.run(host=SERVER_HOST, port=SERVER_PORT, debug=SERVER_DEBUG)
\ No newline at end of file
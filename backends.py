@@ -0,0 +1,688 @@
+"""Workbook backends.
+
+Routes talk to Excel through a backend instead of calling xlwings directly.
+Every backend hands out xlwings-shaped handles (app -> books -> sheets ->
+ranges), so the same route code runs against a live Excel instance, a
+pure-Python in-memory workbook or an .xlsx file on disk.
+"""
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from addresses import format_range, is_address, parse_cell, parse_range, split_sheet
+from config import EXTENT_PROBE_COLUMNS, EXTENT_PROBE_MAX_COLUMNS, EXTENT_PROBE_ROWS
+
+
+class Backend:
+    """Interface every workbook backend implements."""
+
+    name = 'base'
+
+    # Whether reads may run on several threads at once (COM handles may not)
+    concurrent_reads = False
+
+    # Whether sheet_version changes on every edit (probe-based tokens can miss some)
+    exact_versions = False
+
+    def get_app(self):
+        """Return the application handle, or raise if none is available."""
+        raise NotImplementedError
+
+    def get_book(self, app, name=None):
+        """Return a workbook by name, or the active one."""
+        if name:
+            return app.books[name]
+        return app.books.active
+
+    def get_sheet(self, book, name=None):
+        """Return a worksheet by name, or the active one."""
+        if name:
+            return book.sheets[name]
+        return book.sheets.active
+
+    @property
+    def handles(self):
+        """HandleCache of the app, books and sheets resolved through this backend."""
+        handles = self.__dict__.get('_handles')
+        if handles is None:
+            from handles import HandleCache
+            handles = self.__dict__.setdefault('_handles', HandleCache(self))
+        return handles
+
+    def app_alive(self, app):
+        """Return whether a previously resolved application handle still answers."""
+        try:
+            app.version
+            return True
+        except Exception:
+            return False
+
+    def is_alive(self, handle, name=None):
+        """Return whether a workbook or sheet handle is still open under ``name``.
+
+        One property read: closed or deleted objects raise, renamed ones no
+        longer match.
+        """
+        if name is None:
+            return self.app_alive(handle)
+        try:
+            return handle.name == name
+        except Exception:
+            return False
+
+    def used_range(self, sheet):
+        """Return the used range of a worksheet."""
+        return sheet.used_range
+
+    def data_extent(self, sheet, bounds):
+        """Return ``bounds`` with trailing empty rows and columns cut off, or None if empty.
+
+        Reads blocks from the bottom edge upwards, doubling their height until
+        one holds a value, then does the same for columns from the right edge.
+        Most of the cells read are ones a full fetch would have read anyway,
+        in a handful of calls.
+        """
+        row1, col1, row2, col2 = bounds
+        size = EXTENT_PROBE_ROWS
+        while row2 >= row1:
+            top = max(row1, row2 - size + 1)
+            filled = _filled(self.read_values(sheet, format_range(top, col1, row2, col2)))
+            rows = np.flatnonzero(filled.any(axis=1))
+            if rows.size:
+                row2 = top + int(rows[-1])
+                break
+            row2, size = top - 1, size * 2
+        if row2 < row1:
+            return None
+        size = EXTENT_PROBE_COLUMNS
+        while True:
+            left = max(col1, col2 - size + 1)
+            filled = _filled(self.read_values(sheet, format_range(row1, left, row2, col2)))
+            cols = np.flatnonzero(filled.any(axis=0))
+            if cols.size:
+                return row1, col1, row2, left + int(cols[-1])
+            col2, size = left - 1, size * 2
+
+    def resolve_range(self, book, sheet, reference):
+        """Resolve an A1 address, a defined name or a table name to a range handle.
+
+        Addresses may be qualified with a sheet ('Data!A1:F500'); unqualified
+        ones refer to ``sheet``. Raises KeyError when nothing matches.
+        """
+        sheet_name, address = split_sheet(reference)
+        if is_address(address):
+            try:
+                target = book.sheets[sheet_name] if sheet_name else sheet
+            except Exception:
+                raise KeyError(f"Sheet '{sheet_name}' not found")
+            return target.range(address)
+        try:
+            return book.names[reference].refers_to_range
+        except Exception:
+            pass
+        for ws in book.sheets:
+            for table in ws.tables:
+                if table.name == reference:
+                    return table.range
+        raise KeyError(f"Range '{reference}' not found")
+
+    def read_values(self, sheet, address):
+        """Read a range as a 2D list of values."""
+        return sheet.range(address).options(ndim=2).value
+
+    def write_values(self, sheet, address, values):
+        """Write a scalar, a row or a 2D list starting at ``address``."""
+        sheet.range(address).value = values
+
+    def read_formulas(self, sheet, address):
+        """Read a range as a 2D list of formulas (constants as entered), for ``write_formulas``.
+
+        Restoring formulas rather than values keeps formula cells formulas.
+        """
+        formulas = sheet.range(address).formula
+        if not isinstance(formulas, (list, tuple)):
+            return [[formulas]]
+        return [list(row) for row in formulas]
+
+    def write_formulas(self, sheet, address, formulas):
+        """Write a 2D list read by ``read_formulas`` back to ``address``."""
+        sheet.range(address).formula = formulas
+
+    def suspend_updates(self, app):
+        """Turn off screen updating, automatic calculation and events; return the previous settings.
+
+        Pass the result to ``restore_updates``. Settings changed before a
+        failure are put back before the error propagates.
+        """
+        state = {'calculation': app.calculation, 'enable_events': app.enable_events,
+                 'screen_updating': app.screen_updating}
+        try:
+            app.screen_updating = False
+            app.calculation = 'manual'
+            app.enable_events = False
+        except Exception:
+            self.restore_updates(app, state)
+            raise
+        return state
+
+    def restore_updates(self, app, state):
+        """Put back the settings returned by ``suspend_updates``, redrawing the screen last."""
+        for setting, value in state.items():
+            setattr(app, setting, value)
+
+    def recalculate(self, app):
+        """Recalculate all open workbooks."""
+        app.calculate()
+
+    def sheet_version(self, sheet, used_range=None):
+        """Return a cheap token that changes when the sheet's data changes.
+
+        Excel exposes no change counter, so this probes the used range address
+        plus the first two and the last row of it: a few small reads instead of
+        a full one. Edits elsewhere inside the range are not seen; callers
+        bound that staleness with a maximum age.
+        """
+        used = used_range if used_range is not None else sheet.used_range
+        row1, col1 = used.row, used.column
+        rows, cols = used.shape
+        row2, col2 = row1 + rows - 1, col1 + cols - 1
+        head = self.read_values(sheet, format_range(row1, col1, min(row1 + 1, row2), col2))
+        tail = self.read_values(sheet, format_range(row2, col1, row2, col2))
+        return (used.address, hash(repr((head, tail))))
+
+
+class XlwingsBackend(Backend):
+    """Backend driving a live Excel instance through xlwings."""
+
+    name = 'xlwings'
+
+    def get_app(self):
+        import xlwings as xw
+        return xw.apps.active
+
+    def data_extent(self, sheet, bounds):
+        """Find the last row and column holding data with end-of-column lookups.
+
+        Each column costs at most three small calls (bottom cell, Ctrl+Up,
+        landing cell) regardless of how many empty rows the used range has.
+        Very wide ranges fall back to the block probe.
+        """
+        row1, col1, row2, col2 = bounds
+        if col2 - col1 + 1 > EXTENT_PROBE_MAX_COLUMNS:
+            return super().data_extent(sheet, bounds)
+        last_row = last_col = None
+        for col in range(col1, col2 + 1):
+            cell = sheet.range((row2, col))
+            if cell.value is None:
+                cell = cell.end('up')
+                if cell.row < row1 or cell.value is None:
+                    continue
+            last_row = max(last_row or row1, cell.row)
+            last_col = col
+        if last_col is None:
+            return None
+        return row1, col1, last_row, last_col
+
+
+def _filled(rows):
+    """Boolean mask of the non-empty cells of a 2D list."""
+    grid = np.empty((len(rows), len(rows[0]) if rows else 0), dtype=object)
+    grid[:] = rows
+    return pd.notna(grid)
+
+
+# In-memory workbook model
+
+def _to_grid(values):
+    """Normalize a scalar, 1D or 2D value into a 2D object array."""
+    if isinstance(values, np.ndarray):
+        grid = values.astype(object)
+        return grid.reshape(1, -1) if grid.ndim == 1 else grid
+    if isinstance(values, (list, tuple)):
+        if values and isinstance(values[0], (list, tuple)):
+            width = max(len(row) for row in values)
+            grid = np.full((len(values), width), None, dtype=object)
+            for i, row in enumerate(values):
+                grid[i, :len(row)] = row
+            return grid
+        grid = np.empty((1, len(values)), dtype=object)
+        grid[0, :] = values
+        return grid
+    grid = np.empty((1, 1), dtype=object)
+    grid[0, 0] = values
+    return grid
+
+
+class MemoryRange:
+    """Rectangular range on a MemorySheet, mirroring xlwings.Range."""
+
+    def __init__(self, sheet, row, column, last_row, last_column, convert=None, **options):
+        self.sheet = sheet
+        self.row = row
+        self.column = column
+        self.last_row = last_row
+        self.last_column = last_column
+        self._convert = convert
+        self._options = options
+
+    @property
+    def shape(self):
+        return (self.last_row - self.row + 1, self.last_column - self.column + 1)
+
+    @property
+    def count(self):
+        rows, cols = self.shape
+        return rows * cols
+
+    @property
+    def address(self):
+        return format_range(self.row, self.column, self.last_row, self.last_column)
+
+    @property
+    def last_cell(self):
+        return MemoryRange(self.sheet, self.last_row, self.last_column, self.last_row, self.last_column)
+
+    def end(self, direction):
+        """Cell reached by Ctrl+Arrow from the top-left cell ('up', 'down', 'left', 'right')."""
+        row, column = self.sheet._end(self.row, self.column, direction)
+        return MemoryRange(self.sheet, row, column, row, column)
+
+    def options(self, convert=None, **options):
+        """Return a copy of this range with read conversion options."""
+        return MemoryRange(self.sheet, self.row, self.column, self.last_row, self.last_column,
+                           convert, **options)
+
+    @property
+    def value(self):
+        grid = self.sheet._read(self.row, self.column, self.last_row, self.last_column)
+        if self._convert is pd.DataFrame:
+            header = self._options.get('header', 1)
+            rows = grid.tolist()
+            if header and rows:
+                return pd.DataFrame(rows[1:], columns=rows[0])
+            return pd.DataFrame(rows)
+        if self._convert is np.ndarray or self._options.get('ndim') == 2:
+            return grid if self._convert is np.ndarray else grid.tolist()
+        if grid.shape == (1, 1):
+            return grid[0, 0]
+        if grid.shape[0] == 1:
+            return grid[0].tolist()
+        if grid.shape[1] == 1:
+            return grid[:, 0].tolist()
+        return grid.tolist()
+
+    @value.setter
+    def value(self, values):
+        grid = _to_grid(values)
+        if grid.shape == (1, 1) and self.count > 1:
+            grid = np.full(self.shape, grid[0, 0], dtype=object)
+        self.sheet._write(self.row, self.column, grid)
+
+    def clear_contents(self):
+        self.sheet._write(self.row, self.column, np.full(self.shape, None, dtype=object))
+
+
+class MemorySheet:
+    """Worksheet holding its cells in a growable 2D object array."""
+
+    _uids = itertools.count(1)
+
+    # Excel's grid limits, where Ctrl+Down/Right stop on an empty line
+    MAX_ROWS = 1048576
+    MAX_COLUMNS = 16384
+
+    def __init__(self, book, name):
+        self.book = book
+        self.name = name
+        self.uid = next(self._uids)
+        self._grid = np.full((0, 0), None, dtype=object)
+        self._used = None
+        self.tables = MemoryTables(self)
+        self.version = 0
+        self.reads = 0
+        self.writes = 0
+
+    def delete(self):
+        self.book.sheets._remove(self)
+
+    def range(self, cell1, cell2=None):
+        """Return a range from an A1 address or (row, column) tuples."""
+        if isinstance(cell1, str) and cell2 is None:
+            return MemoryRange(self, *parse_range(cell1))
+        first = parse_cell(cell1) if isinstance(cell1, str) else tuple(cell1)
+        if cell2 is None:
+            last = first
+        else:
+            last = parse_cell(cell2) if isinstance(cell2, str) else tuple(cell2)
+        return MemoryRange(self, min(first[0], last[0]), min(first[1], last[1]),
+                           max(first[0], last[0]), max(first[1], last[1]))
+
+    @property
+    def used_range(self):
+        # Like Excel, an untouched sheet reports A1 as its used range
+        if self._used is None:
+            return MemoryRange(self, 1, 1, 1, 1)
+        return MemoryRange(self, *self._used)
+
+    def _pause(self):
+        latency = self.book.app.latency
+        if latency:
+            time.sleep(latency)
+
+    def _read(self, row1, col1, row2, col2):
+        self.reads += 1
+        self._pause()
+        out = np.full((row2 - row1 + 1, col2 - col1 + 1), None, dtype=object)
+        rows, cols = self._grid.shape
+        r_end, c_end = min(row2, rows), min(col2, cols)
+        if r_end >= row1 and c_end >= col1:
+            out[:r_end - row1 + 1, :c_end - col1 + 1] = self._grid[row1 - 1:r_end, col1 - 1:c_end]
+        return out
+
+    def _end(self, row, col, direction):
+        self.reads += 1
+        self._pause()
+        vertical = direction in ('up', 'down')
+        step = -1 if direction in ('up', 'left') else 1
+        pos, limit = (row, self.MAX_ROWS) if vertical else (col, self.MAX_COLUMNS)
+        # Filled mask of the row or column being travelled, padded to the start cell
+        grid = self._grid if vertical else self._grid.T
+        index = (col if vertical else row) - 1
+        line = pd.notna(grid[:, index]) if index < grid.shape[1] else np.zeros(grid.shape[0], bool)
+        if line.size < pos:
+            line = np.concatenate([line, np.zeros(pos - line.size, bool)])
+        # Cells after the start cell in travel order; those past the grid are empty
+        ahead = line[:pos - 1][::-1] if step < 0 else line[pos:]
+        if line[pos - 1] and ahead.size and ahead[0]:
+            # Inside a block: stop on its last filled cell
+            gaps = np.flatnonzero(~ahead)
+            target = pos + step * (int(gaps[0]) if gaps.size else ahead.size)
+        else:
+            # Otherwise jump to the next filled cell, or the sheet edge
+            hits = np.flatnonzero(ahead)
+            target = pos + step * (int(hits[0]) + 1) if hits.size else (1 if step < 0 else limit)
+        return (target, col) if vertical else (row, target)
+
+    def _write(self, row, col, grid):
+        self.writes += 1
+        self._pause()
+        last_row, last_col = row + grid.shape[0] - 1, col + grid.shape[1] - 1
+        rows, cols = self._grid.shape
+        if last_row > rows or last_col > cols:
+            # Grow geometrically so row-by-row appends stay amortized O(1)
+            new_rows = max(last_row, rows * 2 if last_row > rows else rows)
+            new_cols = max(last_col, cols)
+            grown = np.full((new_rows, new_cols), None, dtype=object)
+            grown[:rows, :cols] = self._grid
+            self._grid = grown
+        self._grid[row - 1:last_row, col - 1:last_col] = grid
+        if self._used is None:
+            self._used = (row, col, last_row, last_col)
+        else:
+            r1, c1, r2, c2 = self._used
+            self._used = (min(r1, row), min(c1, col), max(r2, last_row), max(c2, last_col))
+        self.version += 1
+
+
+class _Collection:
+    """Name-indexed collection with an active member, like xlwings.Sheets."""
+
+    def __init__(self):
+        self._items = []
+        self._active = None
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._items[key]
+        for item in self._items:
+            if item.name == key:
+                return item
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def active(self):
+        return self._active
+
+    def _append(self, item):
+        self._items.append(item)
+        self._active = item
+        return item
+
+    def _remove(self, item):
+        self._items.remove(item)
+        if self._active is item:
+            self._active = self._items[-1] if self._items else None
+
+
+class MemorySheets(_Collection):
+    def __init__(self, book):
+        super().__init__()
+        self.book = book
+
+    def add(self, name=None):
+        return self._append(MemorySheet(self.book, name or f"Sheet{len(self) + 1}"))
+
+
+class MemoryTable:
+    """Named table over a fixed range, like xlwings.main.Table."""
+
+    def __init__(self, name, rng):
+        self.name = name
+        self.range = rng
+
+
+class MemoryTables(_Collection):
+    def __init__(self, sheet):
+        super().__init__()
+        self.sheet = sheet
+
+    def add(self, source, name=None):
+        """Turn ``source`` (a range or address) into a table."""
+        if isinstance(source, str):
+            source = self.sheet.range(source)
+        return self._append(MemoryTable(name or f"Table{len(self) + 1}", source))
+
+
+class MemoryName:
+    """Defined name such as ``Sales`` referring to ``=Data!$A$1:$C$10``."""
+
+    def __init__(self, book, name, refers_to):
+        self.book = book
+        self.name = name
+        self.refers_to = refers_to
+
+    @property
+    def refers_to_range(self):
+        sheet_name, address = split_sheet(self.refers_to.lstrip('='))
+        sheet = self.book.sheets[sheet_name] if sheet_name else self.book.sheets.active
+        return sheet.range(address)
+
+
+class MemoryNames(_Collection):
+    def __init__(self, book):
+        super().__init__()
+        self.book = book
+
+    def add(self, name, refers_to):
+        return self._append(MemoryName(self.book, name, refers_to))
+
+
+class MemoryBook:
+    """Workbook made of MemorySheets."""
+
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+        self.sheets = MemorySheets(self)
+        self.names = MemoryNames(self)
+
+    def close(self):
+        self.app.books._remove(self)
+
+
+class MemoryBooks(_Collection):
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+
+    def add(self, name=None):
+        return self._append(MemoryBook(self.app, name or f"Book{len(self) + 1}"))
+
+
+class MemoryApp:
+    """Application holding MemoryBooks; ``latency`` simulates a COM round trip."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.books = MemoryBooks(self)
+        self.screen_updating = True
+        self.calculation = 'automatic'
+        self.enable_events = True
+        self.recalcs = 0
+
+    def calculate(self):
+        self.recalcs += 1
+
+
+class MemoryBackend(Backend):
+    """Pure-Python backend for tests, benchmarks and profiling without Excel."""
+
+    name = 'memory'
+    concurrent_reads = True
+    exact_versions = True
+
+    def __init__(self, latency=0.0):
+        self.app = MemoryApp(latency)
+
+    def get_app(self):
+        return self.app
+
+    def app_alive(self, app):
+        return app is self.app
+
+    def is_alive(self, handle, name=None):
+        if name is None:
+            return self.app_alive(handle)
+        # Closed books and deleted sheets drop out of their parent collection
+        parent = handle.book.sheets if isinstance(handle, MemorySheet) else handle.app.books
+        return handle.name == name and handle in parent._items
+
+    def read_formulas(self, sheet, address):
+        # Memory sheets hold values only
+        return self.read_values(sheet, address)
+
+    def write_formulas(self, sheet, address, formulas):
+        self.write_values(sheet, address, formulas)
+
+    def sheet_version(self, sheet, used_range=None):
+        # Every write bumps the sheet's counter, so the token is exact
+        return (sheet.uid, sheet.version)
+
+    def add_sheet(self, workbook='Book1', sheet='Sheet1', values=None):
+        """Create (or reuse) a workbook and add a sheet, optionally filled from A1."""
+        try:
+            book = self.app.books[workbook]
+        except KeyError:
+            book = self.app.books.add(workbook)
+        ws = book.sheets.add(sheet)
+        if values is not None:
+            if isinstance(values, pd.DataFrame):
+                values = [list(values.columns)] + values.to_numpy(dtype=object).tolist()
+            ws._write(1, 1, _to_grid(values))
+            ws.reads = ws.writes = 0
+        return ws
+
+    @classmethod
+    def from_frame(cls, df, workbook='Book1', sheet='Sheet1', latency=0.0):
+        """Build a backend with one sheet holding ``df`` (header in row 1)."""
+        backend = cls(latency)
+        backend.add_sheet(workbook, sheet, df)
+        return backend
+
+
+class XlsxFileBackend(MemoryBackend):
+    """Backend reading an .xlsx file into memory; ``save`` writes changed cells back."""
+
+    name = 'xlsx'
+
+    def __init__(self, path, latency=0.0):
+        super().__init__(latency)
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportError("The xlsx backend requires openpyxl (pip install openpyxl)")
+        self.path = path
+        self._loaded = {}
+        wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+        try:
+            book = self.app.books.add(os.path.basename(path))
+            for ws in wb.worksheets:
+                sheet = book.sheets.add(ws.title)
+                rows = [list(row) for row in ws.iter_rows(values_only=True)]
+                if rows:
+                    sheet._write(1, 1, _to_grid(rows))
+                    sheet.reads = sheet.writes = 0
+                self._loaded[ws.title] = sheet._grid.copy()
+            book.sheets._active = book.sheets[wb.active.title] if len(book.sheets) else None
+        finally:
+            wb.close()
+
+    def save(self, path=None):
+        """Write cells that changed since loading back to the workbook file."""
+        import openpyxl
+        wb = openpyxl.load_workbook(self.path)
+        book = self.app.books[os.path.basename(self.path)]
+        for sheet in book.sheets:
+            ws = wb[sheet.name] if sheet.name in wb.sheetnames else wb.create_sheet(sheet.name)
+            grid = sheet._grid
+            original = np.full(grid.shape, None, dtype=object)
+            loaded = self._loaded.get(sheet.name, original)
+            original[:loaded.shape[0], :loaded.shape[1]] = loaded
+            for r, c in zip(*np.nonzero(grid != original)):
+                ws.cell(row=int(r) + 1, column=int(c) + 1, value=grid[r, c])
+            self._loaded[sheet.name] = grid.copy()
+        wb.save(path or self.path)
+
+
+_BACKENDS = {
+    'xlwings': XlwingsBackend,
+    'memory': MemoryBackend,
+    'xlsx': XlsxFileBackend,
+}
+
+_backend = None
+
+
+def create_backend(kind, **kwargs):
+    """Instantiate a backend by name ('xlwings', 'memory' or 'xlsx')."""
+    try:
+        backend_cls = _BACKENDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown backend: {kind}")
+    return backend_cls(**kwargs)
+
+
+def get_backend():
+    """Return the process-wide backend, creating it from config on first use."""
+    global _backend
+    if _backend is None:
+        from config import EXCEL_BACKEND, XLSX_PATH
+        kwargs = {'path': XLSX_PATH} if EXCEL_BACKEND == 'xlsx' else {}
+        _backend = create_backend(EXCEL_BACKEND, **kwargs)
+    return _backend
+
+
+def set_backend(backend):
+    """Install a backend instance and return the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,83 @@
+"""Compare read/write costs of the workbook backends.
+
+Usage:
+    python benchmarks/bench_backends.py [--rows 50000] [--cols 10]
+
+The xlsx backend is skipped when openpyxl is missing; the xlwings backend is
+only measured when a live Excel instance is reachable.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import MemoryBackend, XlsxFileBackend, XlwingsBackend  # noqa: E402
+
+
+def make_frame(rows, cols):
+    """Build a mixed-type frame: one text column, the rest floats."""
+    rng = np.random.default_rng(0)
+    data = {f"Col{j}": rng.random(rows) for j in range(1, cols)}
+    return pd.DataFrame({'Name': [f"Row{i}" for i in range(rows)], **data})
+
+
+def timed(fn, repeat=3):
+    """Return the best wall time of ``repeat`` calls in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench(label, backend, sheet_name=None):
+    app = backend.get_app()
+    sheet = backend.get_sheet(backend.get_book(app), sheet_name)
+    used = backend.used_range(sheet)
+    read_ms = timed(lambda: used.options(pd.DataFrame, header=1, index=False).value)
+    cell_ms = timed(lambda: [backend.write_values(sheet, f"A{r}", r) for r in range(2, 1002)], 1)
+    block = [[float(r * c) for c in range(10)] for r in range(1000)]
+    block_ms = timed(lambda: backend.write_values(sheet, 'A2', block))
+    print(f"{label:<10} read used_range {read_ms:9.1f} ms | "
+          f"1000 cell writes {cell_ms:8.1f} ms | 1000x10 block write {block_ms:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--cols', type=int, default=10)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols)
+    print(f"Sheet: {args.rows} rows x {args.cols} columns")
+
+    bench('memory', MemoryBackend.from_frame(df))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.xlsx')
+            df.to_excel(path, index=False, sheet_name='Sheet1')
+            start = time.perf_counter()
+            backend = XlsxFileBackend(path)
+            print(f"xlsx load  {(time.perf_counter() - start) * 1000:9.1f} ms")
+            bench('xlsx', backend)
+    except ImportError as e:
+        print(f"xlsx       skipped ({e})")
+
+    try:
+        backend = XlwingsBackend()
+        backend.get_app()
+        bench('xlwings', backend)
+    except Exception as e:
+        print(f"xlwings    skipped ({e})")
+
+
+if __name__ == '__main__':
+    main()
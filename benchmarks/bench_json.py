@@ -0,0 +1,76 @@
+"""Encode time of sheet frames: per-object default() versus column-wise normalization.
+
+Usage:
+    python benchmarks/bench_json.py [--rows 20000]
+
+Compares the old to_dict('records') + RobustJSONEncoder path with
+FrameJSONProvider on the standard library encoder and on orjson.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import RobustJSONEncoder  # noqa: E402
+from flask import Flask  # noqa: E402
+from serialization import FrameJSONProvider, frame_payload  # noqa: E402
+
+
+def make_frame(rows):
+    """Frame with the value types Excel hands back: text, floats with gaps, dates, decimals."""
+    rng = np.random.default_rng(0)
+    scores = rng.random(rows)
+    scores[::7] = np.nan
+    start = datetime(2024, 1, 1)
+    return pd.DataFrame({
+        'Name': [f"Row {i}" for i in range(rows)],
+        'Score': scores,
+        'Count': rng.integers(0, 1000, rows),
+        'When': [start + timedelta(hours=i) if i % 11 else None for i in range(rows)],
+        'Amount': pd.Series([Decimal(i) / 100 for i in range(rows)], dtype=object),
+    })
+
+
+def best_ms(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"Frame: {args.rows} rows x {df.shape[1]} columns")
+
+    legacy = best_ms(lambda: json.dumps({'data': df.to_dict('records')}, cls=RobustJSONEncoder),
+                     args.repeat)
+    print(f"{'RobustJSONEncoder':<28}{legacy:>9.1f} ms")
+
+    flask_app = Flask(__name__)
+    for backend in ('json', 'orjson'):
+        try:
+            provider = FrameJSONProvider(flask_app, backend=backend)
+        except ImportError as e:
+            print(f"{'provider/' + backend:<28} skipped ({e})")
+            continue
+        ms = best_ms(lambda: provider.dumps(frame_payload(df, 'records')), args.repeat)
+        print(f"{'provider/' + backend:<28}{ms:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
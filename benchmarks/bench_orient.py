@@ -0,0 +1,74 @@
+"""Payload size and encode time of the /api/excel-data orients.
+
+Usage:
+    python benchmarks/bench_orient.py [--rows 20000] [--cols 40]
+
+Each orient is built with serialization.frame_payload and encoded with the
+standard library json module, the way the route does it. The binary typed
+columns format (and Arrow, when pyarrow is installed) is listed for comparison.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import arrow_available, encode_arrow_stream, encode_typed_columns  # noqa: E402
+from serialization import ORIENTS, frame_payload  # noqa: E402
+
+
+def make_frame(rows, cols):
+    """Wide frame with descriptive column names, mostly numeric."""
+    rng = np.random.default_rng(0)
+    data = {f"Quarterly Revenue {j:02d}": rng.random(rows).round(4) for j in range(cols - 2)}
+    return pd.DataFrame({'Customer Name': [f"Customer {i}" for i in range(rows)],
+                         'Region': rng.choice(['North', 'South', 'East', 'West'], rows),
+                         **data})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--cols', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols)
+    print(f"Frame: {args.rows} rows x {args.cols} columns")
+    print(f"{'orient':<10}{'bytes':>14}{'vs records':>12}{'build ms':>11}{'encode ms':>11}")
+
+    baseline = None
+    for orient in ORIENTS:
+        build = encode = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            payload = frame_payload(df, orient)
+            mid = time.perf_counter()
+            body = json.dumps(payload, separators=(',', ':'))
+            end = time.perf_counter()
+            build, encode = min(build, mid - start), min(encode, end - mid)
+        size = len(body.encode('utf-8'))
+        baseline = baseline or size
+        print(f"{orient:<10}{size:>14,}{size / baseline:>11.2f}x"
+              f"{build * 1000:>11.1f}{encode * 1000:>11.1f}")
+
+    binary = [('typed', encode_typed_columns)]
+    if arrow_available():
+        binary.append(('arrow', encode_arrow_stream))
+    for label, encoder in binary:
+        encode = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = encoder(df, {})
+            encode = min(encode, time.perf_counter() - start)
+        print(f"{label:<10}{len(body):>14,}{len(body) / baseline:>11.2f}x"
+              f"{'-':>11}{encode * 1000:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
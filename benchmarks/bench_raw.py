@@ -0,0 +1,72 @@
+"""Latency and peak memory of /api/excel-data: DataFrame path versus mode=raw.
+
+Usage:
+    python benchmarks/bench_raw.py [--rows 50000] [--cols 20]
+
+Requests go through the Flask test client against a MemoryBackend, with the
+snapshot cache cleared before every request so each one reads the sheet.
+Peak memory is the tracemalloc high-water mark of a separate, untimed run.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from backends import MemoryBackend, set_backend  # noqa: E402
+from cache import snapshot_cache  # noqa: E402
+
+QUERIES = [
+    ('frame/records', 'include_cell_mapping=false'),
+    ('frame/values', 'include_cell_mapping=false&orient=values'),
+    ('raw', 'mode=raw'),
+]
+
+
+def make_frame(rows, cols):
+    """Mixed frame: one text column, the rest floats."""
+    rng = np.random.default_rng(0)
+    data = {f"Col{j}": rng.random(rows).round(6) for j in range(1, cols)}
+    return pd.DataFrame({'Name': [f"Row{i}" for i in range(rows)], **data})
+
+
+def fetch(client, query):
+    snapshot_cache.clear()
+    response = client.get(f"/api/excel-data?{query}")
+    assert response.status_code == 200, response.data[:200]
+    return len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--cols', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    set_backend(MemoryBackend.from_frame(make_frame(args.rows, args.cols)))
+    client = app.test_client()
+    print(f"Sheet: {args.rows} rows x {args.cols} columns")
+    print(f"{'path':<16}{'bytes':>14}{'best ms':>10}{'peak MB':>10}")
+
+    for label, query in QUERIES:
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = fetch(client, query)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        fetch(client, query)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<16}{size:>14,}{best * 1000:>10.1f}{peak / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
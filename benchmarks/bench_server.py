@@ -0,0 +1,135 @@
+"""Requests/sec of the Werkzeug debug server versus server.py's production servers.
+
+Usage:
+    python benchmarks/bench_server.py [--clients 8] [--seconds 5] [--rows 1000]
+
+Each server runs in its own process against a MemoryBackend holding a
+``--rows`` x 5 sheet: 'dev' is ``app.run(debug=True)`` as the old __main__
+block started it (minus the reloader, which only adds a watcher process),
+'werkzeug' and 'waitress' are server.py's engines. ``--clients`` threads
+send requests over keep-alive connections for ``--seconds`` per endpoint.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENGINES = ('dev', 'werkzeug', 'waitress')
+PATHS = [
+    ('/health', '/health'),
+    ('read 100 rows', '/api/excel-data?limit=100&include_cell_mapping=false'),
+]
+
+
+def serve(engine, port, rows, threads):
+    """Run one server in this process until killed."""
+    import numpy as np
+    import pandas as pd
+
+    from app import create_app
+    from backends import MemoryBackend
+    from server import make_server
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Name': [f"Row{i}" for i in range(rows)],
+                       **{f"Col{j}": rng.random(rows).round(6) for j in range(1, 5)}})
+    app = create_app(backend=MemoryBackend.from_frame(df))
+    if engine == 'dev':
+        app.run(host='127.0.0.1', port=port, debug=True, use_reloader=False)
+    else:
+        make_server(app, '127.0.0.1', port, threads, engine=engine).run()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def load(port, path, clients, seconds):
+    """Requests completed per second by ``clients`` threads reusing their connections."""
+    counts, errors = [0] * clients, [0] * clients
+    deadline = time.monotonic() + seconds
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.monotonic() < deadline:
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    counts[i] += 1
+                else:
+                    errors[i] += 1
+                if response.will_close:
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.monotonic() - start), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8, help="server threads (waitress)")
+    parser.add_argument('--serve', choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.rows, args.threads)
+        return
+
+    print(f"{args.clients} clients, {args.seconds:g} s per endpoint, {args.rows}-row sheet")
+    print(f"{'server':<10}" + ''.join(f"{label + ' req/s':>22}" for label, _ in PATHS))
+    for engine in ENGINES:
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', engine, '--port', str(port),
+             '--rows', str(args.rows), '--threads', str(args.threads)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            cells = []
+            for _, path in PATHS:
+                rate, errors = load(port, path, args.clients, args.seconds)
+                cells.append(f"{rate:,.0f}" + (f" ({errors} err)" if errors else ''))
+            print(f"{engine:<10}" + ''.join(f"{cell:>22}" for cell in cells))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Server-side cache of decoded sheet snapshots."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import SNAPSHOT_CACHE_MAX_BYTES, SNAPSHOT_MAX_AGE_SECONDS
+
+
+def row_hashes(df):
+    """Return one uint64 content hash per row of ``df``."""
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cell values (e.g. lists) fall back to hashing their repr
+        return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+
+def content_digest(columns, hashes):
+    """Digest a header plus an array of row hashes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(columns)).encode('utf-8'))
+    digest.update(np.ascontiguousarray(hashes).tobytes())
+    return digest.hexdigest()
+
+
+def frame_digest(df):
+    """Content digest of a frame that is not held in a snapshot."""
+    return content_digest(df.columns, row_hashes(df))
+
+
+class Snapshot:
+    """A decoded frame read at a given sheet version."""
+
+    __slots__ = ('key', 'version', 'frame', 'nbytes', 'created', '_row_hashes')
+
+    def __init__(self, key, version, frame):
+        self.key = key
+        self.version = version
+        self.frame = frame
+        self.nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        self.created = time.monotonic()
+        self._row_hashes = None
+
+    def digest(self, offset=0, limit=None):
+        """Content digest of rows ``[offset, offset + limit)``.
+
+        Row hashes are computed once per snapshot; later digests, including
+        those of any page, only hash a slice of that array.
+        """
+        if self._row_hashes is None:
+            self._row_hashes = row_hashes(self.frame)
+        stop = None if limit is None else offset + limit
+        return content_digest(self.frame.columns, self._row_hashes[offset:stop])
+
+
+class SnapshotCache:
+    """LRU cache of Snapshots keyed by (workbook, sheet, range), bounded in bytes.
+
+    An entry is only served while the caller's version token matches the one
+    it was stored with and it is younger than ``max_age`` seconds; the age
+    limit bounds staleness for edits a version probe cannot see.
+
+    It also remembers the trimmed data extent of each range per version, so
+    the extent probe runs once per sheet change rather than once per request;
+    extents expire after ``max_age`` like snapshots.
+    """
+
+    MAX_EXTENTS = 1024
+
+    def __init__(self, max_bytes=SNAPSHOT_CACHE_MAX_BYTES, max_age=SNAPSHOT_MAX_AGE_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._extents = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """Return the snapshot for ``key`` if it is still current, else None."""
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is not None:
+                fresh = self.max_age is None or time.monotonic() - snapshot.created <= self.max_age
+                if snapshot.version == version and fresh:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return snapshot
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, version, frame):
+        """Store ``frame`` and evict least recently used entries over the byte budget."""
+        snapshot = Snapshot(key, version, frame)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if snapshot.nbytes > self.max_bytes:
+                return snapshot
+            self._entries[key] = snapshot
+            self.nbytes += snapshot.nbytes
+            while self.nbytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return snapshot
+
+    def get_extent(self, key, version):
+        """Return the data bounds recorded for ``key`` at ``version``, else None."""
+        with self._lock:
+            entry = self._extents.get(key)
+            if entry is None:
+                return None
+            fresh = self.max_age is None or time.monotonic() - entry[2] <= self.max_age
+            if entry[0] != version or not fresh:
+                del self._extents[key]
+                return None
+            self._extents.move_to_end(key)
+            return entry[1]
+
+    def put_extent(self, key, version, bounds):
+        """Record the trimmed data bounds of a range; kept for at most MAX_EXTENTS keys."""
+        with self._lock:
+            self._extents[key] = (version, bounds, time.monotonic())
+            self._extents.move_to_end(key)
+            while len(self._extents) > self.MAX_EXTENTS:
+                self._extents.popitem(last=False)
+
+    def invalidate(self, workbook=None, sheet=None):
+        """Drop entries for a sheet, a workbook, or everything."""
+        with self._lock:
+            for key in list(self._entries):
+                if (workbook is None or key[0] == workbook) and (sheet is None or key[1] == sheet):
+                    self._remove(key)
+            for key in list(self._extents):
+                if (workbook is None or key[0] == workbook) and (sheet is None or key[1] == sheet):
+                    del self._extents[key]
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        snapshot = self._entries.pop(key)
+        self.nbytes -= snapshot.nbytes
+
+
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,51 @@
+"""Vectorized builder for the address -> value cell mapping."""
+import json
+
+import numpy as np
+
+from addresses import col_letter
+from serialization import normalize_columns
+
+# JSON framing per mapping entry: two quotes, a colon and a comma
+_ENTRY_OVERHEAD = 4
+
+
+def _json_values(df):
+    """Row-major object array of JSON-native cell values."""
+    values = np.empty(df.shape, dtype=object)
+    for j, column in enumerate(normalize_columns(df)):
+        values[:, j] = column
+    return values
+
+
+def estimate_mapping_bytes(df, start_row, start_col, sample_rows=50, col_numbers=None):
+    """Estimate the encoded size of a cell mapping from a sample of rows."""
+    rows, cols = df.shape
+    if rows == 0 or cols == 0:
+        return 0
+    sample = _json_values(df.head(sample_rows))
+    value_bytes = len(json.dumps(sample.tolist(), default=str)) / sample.size
+    last_row = start_row + 1 + int(df.index.max())
+    last_col = max(col_numbers) if col_numbers else start_col + cols - 1
+    address_bytes = len(col_letter(last_col)) + len(str(last_row))
+    return int(rows * cols * (value_bytes + address_bytes + _ENTRY_OVERHEAD))
+
+
+def build_cell_mapping(df, start_row, start_col, col_numbers=None):
+    """Map A1 addresses to values for a frame whose header sits on ``start_row``.
+
+    Column letters are computed once per column and row numbers once per row;
+    addresses are joined with NumPy string ops and zipped with the row-major
+    flattened values. ``df.index`` holds data-row offsets below the header.
+    Projected frames pass the sheet column number of each column in
+    ``col_numbers``; otherwise columns are consecutive from ``start_col``.
+    """
+    rows, cols = df.shape
+    if rows == 0 or cols == 0:
+        return {}
+    if col_numbers is None:
+        col_numbers = range(start_col, start_col + cols)
+    letters = np.array([col_letter(n) for n in col_numbers])
+    numbers = (df.index.to_numpy(dtype=np.int64) + start_row + 1).astype(str)
+    addresses = np.char.add(np.tile(letters, rows), np.repeat(numbers, cols))
+    return dict(zip(addresses.tolist(), _json_values(df).ravel().tolist()))
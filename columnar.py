@@ -0,0 +1,146 @@
+"""Binary columnar encodings for sheet reads.
+
+Two wire formats are supported:
+
+- Arrow IPC stream (``application/vnd.apache.arrow.stream``), available when
+  pyarrow is installed. String columns are dictionary-encoded.
+- A dependency-free typed-array format (``application/vnd.excel-ai.columns``):
+
+      b'XLC1' | uint32 LE metadata length | metadata JSON (UTF-8) | buffers
+
+  The metadata holds the response fields plus one descriptor per column with
+  its ``type``, and the ``offset``/``length`` of its buffer relative to the
+  start of the (8-byte aligned) buffer section. Buffer types:
+
+  - ``f8``: float64 LE, missing values as NaN
+  - ``i8``: int64 LE
+  - ``bool``: one byte per value
+  - ``ts_ms``: int64 LE milliseconds since the epoch, missing as INT64_MIN
+  - ``dict``: int32 LE codes into the descriptor's ``dictionary``, -1 for missing
+  - ``json``: UTF-8 JSON array, for mixed-type columns
+"""
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+from serialization import normalize_column
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+TYPED_MIMETYPE = 'application/vnd.excel-ai.columns'
+
+MAGIC = b'XLC1'
+
+
+def arrow_available():
+    """Whether pyarrow is importable."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _timestamps_ms(series):
+    values = pd.to_datetime(series)
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+    return values.astype('datetime64[ms]').to_numpy().view('<i8')
+
+
+def _encode_column(series):
+    """Return (type, buffer bytes, extra descriptor fields) for one column."""
+    kind = series.dtype.kind
+    if kind == 'b':
+        return 'bool', series.to_numpy(dtype=np.uint8).tobytes(), {}
+    if kind in 'iu' and not series.hasnans:
+        return 'i8', series.to_numpy(dtype='<i8').tobytes(), {}
+    if kind in 'iuf':
+        return 'f8', series.to_numpy(dtype='<f8', na_value=np.nan).tobytes(), {}
+    if kind == 'M':
+        return 'ts_ms', _timestamps_ms(series).tobytes(), {}
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+        values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='<f8', na_value=np.nan)
+        return 'f8', values.tobytes(), {}
+    if inferred in ('datetime', 'datetime64'):
+        return 'ts_ms', _timestamps_ms(series).tobytes(), {}
+    if inferred in ('string', 'empty'):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return 'dict', codes.astype('<i4').tobytes(), {'dictionary': [str(u) for u in uniques]}
+    return 'json', json.dumps(normalize_column(series), default=str).encode('utf-8'), {}
+
+
+def encode_typed_columns(df, meta):
+    """Encode ``df`` plus response metadata in the typed-array format."""
+    descriptors = []
+    buffers = []
+    offset = 0
+    for j, name in enumerate(df.columns):
+        col_type, buf, extra = _encode_column(df.iloc[:, j])
+        descriptors.append({'name': name, 'type': col_type, 'offset': offset,
+                            'length': len(buf), **extra})
+        padding = -len(buf) % 8
+        buffers.append(buf + b'\0' * padding)
+        offset += len(buf) + padding
+
+    header = json.dumps({**meta, 'rows': len(df), 'columns': descriptors},
+                        separators=(',', ':'), default=str).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b'\0' * (-len(prefix) % 8)
+    return prefix + b''.join(buffers)
+
+
+def decode_typed_columns(payload):
+    """Decode the typed-array format into (metadata, DataFrame)."""
+    if payload[:4] != MAGIC:
+        raise ValueError("Not a typed-columns payload")
+    (meta_len,) = struct.unpack_from('<I', payload, 4)
+    meta = json.loads(payload[8:8 + meta_len].decode('utf-8'))
+    base = 8 + meta_len + (-(8 + meta_len) % 8)
+    rows = meta['rows']
+
+    columns = {}
+    for col in meta['columns']:
+        raw = memoryview(payload)[base + col['offset']:base + col['offset'] + col['length']]
+        col_type = col['type']
+        if col_type == 'f8':
+            values = np.frombuffer(raw, dtype='<f8', count=rows)
+        elif col_type == 'i8':
+            values = np.frombuffer(raw, dtype='<i8', count=rows)
+        elif col_type == 'bool':
+            values = np.frombuffer(raw, dtype=np.uint8, count=rows).astype(bool)
+        elif col_type == 'ts_ms':
+            values = np.frombuffer(raw, dtype='<i8', count=rows).view('datetime64[ms]')
+        elif col_type == 'dict':
+            codes = np.frombuffer(raw, dtype='<i4', count=rows)
+            dictionary = np.array(col['dictionary'] + [None], dtype=object)
+            values = dictionary[codes]  # -1 picks the trailing None
+        else:
+            values = json.loads(bytes(raw).decode('utf-8'))
+        columns[col['name']] = values
+    return meta, pd.DataFrame(columns)
+
+
+def encode_arrow_stream(df, meta):
+    """Encode ``df`` as an Arrow IPC stream with dictionary-encoded strings."""
+    import pyarrow as pa
+
+    # Arrow columns are single-typed; mixed object columns travel as text
+    df = df.copy()
+    for j in range(df.shape[1]):
+        series = df.iloc[:, j]
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'mixed':
+            df.isetitem(j, series.map(lambda v: None if v is None else str(v)))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            table = table.set_column(i, field.name, table.column(i).dictionary_encode())
+    table = table.replace_schema_metadata({'excel-ai': json.dumps(meta, default=str)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
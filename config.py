@@ -1,4 +1,5 @@
 # Configuration file for Excel AI Integration
+import os
 
 # Default test cells for development
 DEFAULT_TEST_CELLS = {
@@ -6,4 +7,76 @@ DEFAULT_TEST_CELLS = {
     'B1': 'Test Value 2',
     'C1': 42,
     'D1': 3.14159
-}
\ No newline at end of file
+}
+
+# Workbook backend: 'xlwings' (live Excel), 'memory' or 'xlsx'
+EXCEL_BACKEND = os.environ.get('EXCEL_BACKEND', 'xlwings')
+
+# Workbook file used by the 'xlsx' backend
+XLSX_PATH = os.environ.get('EXCEL_XLSX_PATH', 'workbook.xlsx')
+
+# Paging for /api/excel-data
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 10000
+
+# Chunked sheet reads: initial rows per backend call, auto-tuned towards the
+# target call duration and capped at a cell budget per call
+READ_CHUNK_ROWS = 1000
+READ_CHUNK_TARGET_SECONDS = 0.25
+READ_CHUNK_MIN_ROWS = 100
+READ_CHUNK_MAX_CELLS = 250000
+
+# Cell mappings are only built while their estimated encoded size fits this budget
+CELL_MAPPING_MAX_BYTES = 4 * 1024 * 1024
+
+# JSON encoder for API responses: 'auto' (orjson when installed), 'orjson' or 'json'
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
+# Snapshot cache of decoded sheet reads: total size budget and maximum entry age
+SNAPSHOT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SNAPSHOT_MAX_AGE_SECONDS = 10
+
+# /api/prompt-context: default and maximum sample rows, token budget and cell width
+PROMPT_SAMPLE_ROWS = 5
+PROMPT_SAMPLE_MAX_ROWS = 100
+PROMPT_CONTEXT_MAX_TOKENS = 1000
+PROMPT_CELL_MAX_CHARS = 40
+
+# Trimming of trailing empty rows/columns: first probe block size (doubled per
+# empty block) and the widest range probed with per-column end lookups
+EXTENT_PROBE_ROWS = 256
+EXTENT_PROBE_COLUMNS = 8
+EXTENT_PROBE_MAX_COLUMNS = 256
+
+# /api/batch-read: most targets per request and worker threads shared by all batches
+BATCH_MAX_TARGETS = 50
+BATCH_MAX_WORKERS = 4
+
+# /api/write-excel: batches of at least this many operations run in bulk mode
+# (no screen updating, manual calculation, no events) unless 'bulk' says otherwise
+WRITE_BULK_MIN_OPS = 20
+
+# Atomic writes: largest region (cells) snapshotted for rollback in one read
+WRITE_ATOMIC_MAX_CELLS = 1_000_000
+
+# /api/write-jobs: operations written per Excel worker task, jobs allowed to
+# wait before submissions get a 429, and finished jobs kept for status queries
+WRITE_JOB_CHUNK_OPS = 500
+WRITE_JOB_MAX_PENDING = 8
+WRITE_JOB_KEEP = 100
+
+# Cached app/book/sheet handles: seconds a handle is trusted without a liveness probe
+HANDLE_CHECK_SECONDS = 1.0
+
+# Excel worker thread: seconds a request waits for its turn before a 503, and
+# number of recent tasks its wait/run time statistics cover
+EXCEL_WORKER_TIMEOUT_SECONDS = 120
+EXCEL_WORKER_STATS_WINDOW = 1024
+
+# Serving: bind address, WSGI worker threads and idle keep-alive seconds for
+# server.py; the debugger and reloader only run when FLASK_DEBUG=1
+SERVER_HOST = os.environ.get('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', '3001'))
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', '8'))
+SERVER_KEEPALIVE_SECONDS = int(os.environ.get('SERVER_KEEPALIVE_SECONDS', '30'))
+SERVER_DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1'
@@ -0,0 +1,172 @@
+"""Column projection and row filters for sheet reads.
+
+A filter is a list of predicates that must all hold, each written as
+``<column> <op> <value>`` with ``op`` one of ``= == != > >= < <=``, or as
+``<column> in <v1>,<v2>,...`` / ``<column> not in ...``. Values are parsed
+as numbers where possible; ``null`` matches empty cells and quotes force a
+string. Predicates are evaluated as vectorized masks over whole columns.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from readers import column_positions
+
+_COMPARISON_RE = re.compile(r'^\s*(.+?)\s*(==|!=|>=|<=|=|>|<)\s*(.*?)\s*$')
+_MEMBERSHIP_RE = re.compile(r'^\s*(.+?)\s+(not\s+in|in)\s+(.*?)\s*$', re.IGNORECASE)
+
+
+class FilterError(ValueError):
+    """Raised for malformed projections or predicates."""
+
+
+def parse_columns(text):
+    """Parse ``columns=Name,Score`` into a list of header names, or None."""
+    if not text:
+        return None
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    if not names:
+        raise FilterError("'columns' must name at least one column")
+    return list(dict.fromkeys(names))
+
+
+def _literal(text):
+    """Parse a predicate value: a number, null, or a (quoted) string."""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1]
+    if text.lower() == 'null':
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_predicate(text):
+    """Parse one predicate into ``(column, op, value)``."""
+    match = _MEMBERSHIP_RE.match(text)
+    if match:
+        column, op, values = match.groups()
+        op = 'not in' if op.lower().startswith('not') else 'in'
+        items = [_literal(v) for v in values.strip('()').split(',') if v.strip()]
+        if not items:
+            raise FilterError(f"Empty membership list in predicate: {text}")
+        return column.strip('"\''), op, items
+    match = _COMPARISON_RE.match(text)
+    if not match or not match.group(3):
+        raise FilterError(f"Invalid predicate: {text}")
+    column, op, value = match.groups()
+    op, value = '==' if op == '=' else op, _literal(value)
+    if value is None and op not in ('==', '!='):
+        raise FilterError(f"null can only be compared with = or !=: {text}")
+    return column.strip('"\''), op, value
+
+
+def parse_where(predicates):
+    """Parse every ``where`` argument; all predicates must hold."""
+    return [parse_predicate(text) for text in predicates if text.strip()]
+
+
+def resolve_columns(header, columns, predicates):
+    """Map requested column names onto ``header`` labels.
+
+    Returns the labels to read (projection plus filter columns), the labels
+    to return, and the predicates rewritten to use header labels.
+    """
+    filter_names = list(dict.fromkeys(column for column, _, _ in predicates))
+    try:
+        output = [header[p] for p in column_positions(header, columns)] if columns else list(header)
+        labels = {name: header[p] for name, p in zip(filter_names, column_positions(header, filter_names))}
+    except KeyError as e:
+        raise FilterError(e.args[0])
+    resolved = [(labels[column], op, value) for column, op, value in predicates]
+    return list(dict.fromkeys(output + list(labels.values()))), output, resolved
+
+
+def _comparable(series, value):
+    """Return ``series`` converted so it compares meaningfully with ``value``."""
+    if isinstance(value, (int, float)):
+        return pd.to_numeric(series, errors='coerce')
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in ('datetime', 'datetime64', 'date'):
+        return pd.to_datetime(series, errors='coerce')
+    return series.astype('string')
+
+
+def predicate_mask(series, op, value):
+    """Boolean NumPy mask of the rows of ``series`` satisfying one predicate."""
+    if op in ('in', 'not in'):
+        wanted = [v for v in value if v is not None]
+        mask = series.isin(wanted).to_numpy().copy()
+        numbers = [v for v in wanted if isinstance(v, (int, float))]
+        if numbers:
+            # '1' in a text column and 1.0 in a float column both match 1
+            mask |= pd.to_numeric(series, errors='coerce').isin(numbers).to_numpy()
+        if None in value:
+            mask |= series.isna().to_numpy()
+        return ~mask if op == 'not in' else mask
+    if value is None:
+        missing = series.isna().to_numpy()
+        return missing if op == '==' else ~missing
+
+    values = _comparable(series, value)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        try:
+            value = pd.Timestamp(value)
+        except (TypeError, ValueError):
+            raise FilterError(f"Cannot compare dates with {value!r}")
+    result = {
+        '==': values.__eq__, '!=': values.__ne__, '>': values.__gt__,
+        '>=': values.__ge__, '<': values.__lt__, '<=': values.__le__,
+    }[op](value)
+    # Cells that cannot be compared (missing, other types) only satisfy '!='
+    return result.fillna(op == '!=').to_numpy(dtype=bool)
+
+
+def filter_frame(df, predicates):
+    """Return the rows of ``df`` satisfying every predicate, keeping the index."""
+    if not predicates:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in predicates:
+        if column not in df.columns:
+            raise FilterError(f"Unknown column in filter: {column}")
+        mask &= predicate_mask(df[column], op, value)
+    return df[mask]
+
+
+def filtered_window(blocks, predicates, offset=0, limit=None):
+    """Yield the rows of ``blocks`` matching ``predicates``, from the ``offset``-th match on.
+
+    At most ``limit`` matching rows are yielded; blocks are consumed lazily
+    and reading stops once the window is full.
+    """
+    skip, left = offset, limit
+    for block in blocks:
+        block = filter_frame(block, predicates)
+        if skip:
+            dropped = min(skip, len(block))
+            block, skip = block.iloc[dropped:], skip - dropped
+        if left is not None:
+            block = block.iloc[:left]
+            left -= len(block)
+        if len(block):
+            yield block
+        if left == 0:
+            return
+
+
+def project_frame(df, columns=None, predicates=None):
+    """Filter the rows of ``df``, then keep only ``columns`` (header labels)."""
+    df = filter_frame(df, predicates)
+    if columns is None or list(df.columns) == list(columns):
+        return df
+    return df[columns]
@@ -0,0 +1,53 @@
+"""Single-flight coalescing of identical in-progress work.
+
+The first caller for a key leads: it computes the result and lands the
+flight with it. Callers arriving with the same key while the flight is in
+the air join it and wait on the leader's Future instead of repeating the
+work. Once landed, the key is free again; results are not cached here.
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Registry of in-progress computations keyed by what they compute."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.led = 0
+        self.joined = 0
+
+    def begin(self, key):
+        """Return ``(future, leading)`` for ``key``.
+
+        ``leading`` is True for the caller that started the flight; it must
+        call ``land`` exactly once. Everyone else waits on ``future``.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.joined += 1
+                return future, False
+            future = self._flights[key] = Future()
+            future.set_running_or_notify_cancel()
+            self.led += 1
+            return future, True
+
+    def land(self, key, result=None, error=None):
+        """Complete the flight for ``key`` and release its followers."""
+        with self._lock:
+            future = self._flights.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def __len__(self):
+        return len(self._flights)
+
+
+# Process-wide flights of /api/excel-data responses
+read_flights = SingleFlight()
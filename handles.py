@@ -0,0 +1,145 @@
+"""Cache of resolved Excel app, workbook and sheet handles.
+
+Resolving handles from scratch is several COM round trips per request:
+``xw.apps.active`` enumerates the running Excel instances, and books and
+sheets are searched by name. The cache keeps the handles it resolved and
+only re-resolves one when a cheap liveness probe (Backend.is_alive, a single
+property read) fails. A handle resolved or probed less than
+``HANDLE_CHECK_SECONDS`` ago is trusted without probing; callers that hit
+an error with a cached handle call ``invalidate``.
+
+Which workbook or sheet is *active* can change at any moment, so active
+lookups always go to the backend; the handles they return are cached under
+their names for later named lookups.
+"""
+import threading
+import time
+
+from config import HANDLE_CHECK_SECONDS
+
+
+class HandleCache:
+    """Resolved app/book/sheet handles with liveness checks and a sheet name->index map."""
+
+    def __init__(self, backend, check_seconds=HANDLE_CHECK_SECONDS):
+        self.backend = backend
+        self.check_seconds = check_seconds
+        self._lock = threading.RLock()
+        self._app = None
+        self._books = {}
+        self._sheets = {}
+        self._sheet_index = {}
+        self._book_names = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Forget every handle; the next lookups resolve from scratch."""
+        with self._lock:
+            self._app = None
+            self._books.clear()
+            self._sheets.clear()
+            self._sheet_index.clear()
+            self._book_names.clear()
+
+    def _fresh(self, entry, name=None):
+        """True if the ``[handle, checked]`` entry was checked recently or passes a probe now.
+
+        A passing probe restarts the entry's trust period.
+        """
+        now = time.monotonic()
+        if now - entry[1] < self.check_seconds:
+            return True
+        if self.backend.is_alive(entry[0], name):
+            entry[1] = now
+            return True
+        return False
+
+    def get_app(self):
+        """Return the cached application handle, resolving it if missing or dead."""
+        with self._lock:
+            if self._app is not None and self._fresh(self._app):
+                self.hits += 1
+                return self._app[0]
+            self.misses += 1
+            app = self.backend.get_app()
+            if self._app is None or app is not self._app[0]:
+                self.invalidate()
+            self._app = [app, time.monotonic()]
+            return app
+
+    def _use_app(self, app):
+        # Handles resolved through another application object are not reused
+        if self._app is None or app is not self._app[0]:
+            self.invalidate()
+            self._app = [app, time.monotonic()]
+
+    def get_book(self, app, name=None):
+        """Return a workbook by name (cached) or the active one."""
+        with self._lock:
+            self._use_app(app)
+            if name is None:
+                book = self.backend.get_book(app)
+                if book is not None:
+                    self._remember_book(book.name, book)
+                return book
+            entry = self._books.get(name)
+            if entry is not None and self._fresh(entry, name):
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            book = self.backend.get_book(app, name)
+            self._remember_book(name, book)
+            return book
+
+    def _remember_book(self, name, book):
+        previous = self._books.get(name)
+        if previous is not None and previous[0] is not book:
+            self._book_names.pop(id(previous[0]), None)
+        self._books[name] = [book, time.monotonic()]
+        # The entry holds the handle, so its id cannot be reused by another object
+        self._book_names[id(book)] = (book, name)
+
+    def _book_name(self, book):
+        entry = self._book_names.get(id(book))
+        return entry[1] if entry is not None and entry[0] is book else book.name
+
+    def get_sheet(self, book, name=None):
+        """Return a worksheet by name (cached) or the active one."""
+        with self._lock:
+            book_name = self._book_name(book)
+            if name is None:
+                sheet = self.backend.get_sheet(book)
+                if sheet is not None:
+                    self._sheets[(book_name, sheet.name)] = [sheet, time.monotonic()]
+                return sheet
+            key = (book_name, name)
+            entry = self._sheets.get(key)
+            if entry is not None and self._fresh(entry, name):
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            sheet = self._resolve_sheet(book, book_name, name)
+            self._sheets[key] = [sheet, time.monotonic()]
+            return sheet
+
+    def _resolve_sheet(self, book, book_name, name):
+        """Fetch a sheet by its remembered position, falling back to a name lookup.
+
+        The name->index map of a book is built once, on its first lookup by
+        name, and rebuilt whenever a remembered position holds another sheet.
+        """
+        index = self._sheet_index.get(book_name, {}).get(name)
+        if index is not None:
+            try:
+                sheet = book.sheets[index]
+                if sheet.name == name:
+                    return sheet
+            except Exception:
+                pass
+        sheet = self.backend.get_sheet(book, name)
+        try:
+            self._sheet_index[book_name] = {ws.name: i for i, ws in enumerate(book.sheets)}
+        except Exception:
+            self._sheet_index.pop(book_name, None)
+        return sheet
@@ -0,0 +1,178 @@
+"""Background write jobs for batches too large to wait on.
+
+POST /api/write-jobs validates the operations and queues a ``WriteJob``; the
+request returns its id at once. One runner thread takes jobs in order and
+writes each in chunks of WRITE_JOB_CHUNK_OPS operations, every chunk a
+low-priority task on the Excel worker, so interactive requests run between
+two chunks. Status, per-op results and throughput are read from the job at
+any time; cancellation takes effect before the next chunk.
+
+At most WRITE_JOB_MAX_PENDING jobs wait to start. Submitting beyond that
+raises JobQueueFull (a 429) instead of buffering without bound.
+"""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from backends import get_backend
+from cache import snapshot_cache
+from config import WRITE_JOB_CHUNK_OPS, WRITE_JOB_KEEP, WRITE_JOB_MAX_PENDING
+from worker import PRIORITY_LOW, excel_worker
+from writes import execute_plan, plan_writes, write_session
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+FINISHED = (DONE, CANCELLED, FAILED)
+
+
+class JobQueueFull(Exception):
+    """Raised when WRITE_JOB_MAX_PENDING jobs are already waiting."""
+
+
+class WriteJob:
+    """A batch of parsed write ops for one sheet, written chunk by chunk."""
+
+    def __init__(self, ops, results, workbook, sheet, bulk=False, chunk_ops=WRITE_JOB_CHUNK_OPS):
+        self.id = uuid.uuid4().hex
+        self.state = QUEUED
+        self.ops = ops
+        self.results = results
+        self.workbook = workbook
+        self.sheet = sheet
+        self.bulk = bulk
+        self.chunk_ops = chunk_ops
+        self.written = 0
+        self.chunks = 0
+        self.error = None
+        self.timing = {}
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop before the next chunk; a queued job never starts."""
+        self._cancel.set()
+        if self.state == QUEUED:
+            self._finish(CANCELLED, "Job cancelled before this operation ran")
+
+    def run(self, worker):
+        """Write every chunk on ``worker``; called by the runner thread."""
+        if self._cancel.is_set():
+            return
+        self.state = RUNNING
+        self.started = time.monotonic()
+        try:
+            for start in range(0, len(self.ops), self.chunk_ops):
+                if self._cancel.is_set():
+                    self._finish(CANCELLED, "Job cancelled before this operation ran")
+                    return
+                chunk = self.ops[start:start + self.chunk_ops]
+                worker.call(self._write_chunk, chunk, priority=PRIORITY_LOW)
+                self.written += len(chunk)
+                self.chunks += 1
+        except Exception as e:
+            self.error = str(e)
+            self._finish(FAILED, f"Job failed before this operation ran: {e}")
+            return
+        self._finish(DONE)
+
+    def _write_chunk(self, chunk):
+        backend = get_backend()
+        app = backend.handles.get_app()
+        book = backend.handles.get_book(app, self.workbook)
+        sheet = backend.handles.get_sheet(book, self.sheet)
+        timing = {}
+        try:
+            with write_session(backend, app, timing, bulk=self.bulk):
+                execute_plan(backend, sheet, plan_writes(chunk), self.results)
+        finally:
+            snapshot_cache.invalidate(book.name, sheet.name)
+            for phase, ms in timing.items():
+                self.timing[phase] = round(self.timing.get(phase, 0.0) + ms, 3)
+
+    def _finish(self, state, unrun_error=None):
+        if unrun_error is not None:
+            for op in self.ops[self.written:]:
+                if self.results[op.index] is None:
+                    self.results[op.index] = {"error": unrun_error}
+        self.finished = time.monotonic()
+        self.state = state
+
+    def status(self, include_results=True):
+        """JSON-ready progress report."""
+        elapsed = None
+        if self.started is not None:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        status = {
+            "job_id": self.id,
+            "state": self.state,
+            "workbook": self.workbook,
+            "sheet": self.sheet,
+            "operations": len(self.results),
+            "written": self.written,
+            "progress": round(self.written / len(self.ops), 4) if self.ops else 1.0,
+            "chunks": self.chunks,
+            "elapsed_ms": round(elapsed * 1000, 3) if elapsed is not None else None,
+            "ops_per_second": round(self.written / elapsed, 1) if elapsed else None,
+            "timing": dict(self.timing),
+        }
+        if self.error is not None:
+            status["error"] = self.error
+        if include_results:
+            status["results"] = list(self.results)
+        return status
+
+
+class WriteJobs:
+    """Bounded queue of write jobs and the thread that runs them one at a time."""
+
+    def __init__(self, worker=excel_worker, max_pending=WRITE_JOB_MAX_PENDING, keep=WRITE_JOB_KEEP):
+        self.worker = worker
+        self.keep = keep
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, job):
+        """Queue ``job``; raises JobQueueFull when the queue is at capacity."""
+        try:
+            self._pending.put_nowait(job)
+        except queue.Full:
+            raise JobQueueFull(f"{self._pending.maxsize} write jobs are already waiting")
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-jobs', daemon=True)
+                self._thread.start()
+        return job
+
+    def get(self, job_id):
+        """Return a job by id, or None once it is unknown or pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        # Forget the oldest finished jobs beyond ``keep``
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            try:
+                job.run(self.worker)
+            finally:
+                self._pending.task_done()
+
+
+# Process-wide write job queue
+write_jobs = WriteJobs()
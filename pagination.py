@@ -0,0 +1,102 @@
+"""Offset/limit paging and opaque cursors for /api/excel-data."""
+import base64
+import hashlib
+import json
+
+from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+class PaginationError(ValueError):
+    """Raised for malformed paging parameters or cursors."""
+
+
+class StaleCursorError(PaginationError):
+    """Raised for a cursor issued before the sheet last changed."""
+
+
+def fingerprint(*parts):
+    """Short stable token for a read target or a sheet version."""
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def encode_cursor(workbook, sheet, offset, limit, target=None, version=None):
+    """Encode a page position as an opaque URL-safe token.
+
+    ``target`` and ``version`` are fingerprints of what was read (range,
+    projection, filters) and of the sheet version the page came from.
+    """
+    payload = json.dumps({'wb': workbook, 'sh': sheet, 'o': offset, 'l': limit,
+                          't': target, 'v': version}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor token into its payload dict."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload.get('o'), int) or not isinstance(payload.get('l'), int):
+            raise ValueError
+        return payload
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+
+def _parse_int(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise PaginationError(f"'{name}' must be an integer")
+    if number < 0:
+        raise PaginationError(f"'{name}' must be non-negative")
+    return number
+
+
+def parse_page_args(args):
+    """Return (offset, limit, cursor_payload) or None when paging was not requested."""
+    offset = _parse_int(args, 'offset')
+    limit = _parse_int(args, 'limit')
+    cursor = args.get('cursor')
+    if offset is None and limit is None and not cursor:
+        return None
+
+    payload = decode_cursor(cursor) if cursor else None
+    if payload is not None:
+        offset = payload['o']
+        if limit is None:
+            limit = payload['l']
+    if offset is None:
+        offset = 0
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise PaginationError("'limit' must be at least 1")
+    if limit > MAX_PAGE_SIZE:
+        raise PaginationError(f"'limit' must not exceed {MAX_PAGE_SIZE}")
+    return offset, limit, payload
+
+
+def check_cursor_target(payload, workbook, sheet, target=None, version=None):
+    """Reject a cursor issued for another target, or before the sheet changed.
+
+    Following a cursor across a change could skip or repeat rows, so a
+    version mismatch raises StaleCursorError and the client starts over.
+    """
+    if payload is None:
+        return
+    if (payload.get('wb'), payload.get('sh')) != (workbook, sheet):
+        raise PaginationError("Cursor does not belong to this workbook/sheet")
+    if payload.get('t') != target:
+        raise PaginationError("Cursor was issued for another range, projection or filter")
+    if payload.get('v') != version:
+        raise StaleCursorError("Sheet changed since the cursor was issued; restart from the first page")
+
+
+def next_cursor(workbook, sheet, offset, limit, total_rows, target=None, version=None):
+    """Cursor for the page after ``offset``, or None on the last page."""
+    if offset + limit >= total_rows:
+        return None
+    return encode_cursor(workbook, sheet, offset + limit, limit, target, version)
@@ -0,0 +1,128 @@
+"""Compact sheet summaries for LLM prompts.
+
+Instead of transferring a whole sheet, only the header and a handful of sample
+rows are read. The sample is rendered as tab-separated text trimmed to a token
+budget (estimated at four characters per token).
+"""
+import numpy as np
+import pandas as pd
+
+from config import PROMPT_CELL_MAX_CHARS
+from readers import read_header, read_window
+from serialization import normalize_columns
+
+SAMPLE_STRATEGIES = ('head', 'tail', 'reservoir')
+
+_SAMPLE_LABELS = {'head': 'first', 'tail': 'last', 'reservoir': 'random'}
+
+
+def sample_offsets(total_rows, n, strategy='head', seed=0):
+    """Return the sorted data-row offsets to sample.
+
+    ``reservoir`` draws a uniform sample without replacement; the seed keeps it
+    stable so repeated questions against an unchanged sheet see the same rows.
+    """
+    n = min(n, total_rows)
+    if strategy == 'head':
+        return list(range(n))
+    if strategy == 'tail':
+        return list(range(total_rows - n, total_rows))
+    if strategy == 'reservoir':
+        rng = np.random.default_rng(seed)
+        return sorted(rng.choice(total_rows, size=n, replace=False).tolist())
+    raise ValueError(f"Unsupported sample strategy: {strategy}")
+
+
+def _runs(offsets):
+    """Group sorted offsets into (start, length) runs of consecutive rows."""
+    runs = []
+    for offset in offsets:
+        if runs and runs[-1][0] + runs[-1][1] == offset:
+            runs[-1][1] += 1
+        else:
+            runs.append([offset, 1])
+    return runs
+
+
+def read_sample(backend, sheet, bounds, offsets):
+    """Read the header plus the rows at ``offsets``, one backend call per run of rows."""
+    header = read_header(backend, sheet, bounds)
+    blocks = [read_window(backend, sheet, bounds, start, length, header=header)
+              for start, length in _runs(offsets)]
+    if not blocks:
+        return pd.DataFrame(columns=header)
+    return pd.concat(blocks) if len(blocks) > 1 else blocks[0]
+
+
+def estimate_tokens(text):
+    """Rough token count of ``text`` (four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    text = ' '.join(str(value).split())
+    if len(text) > PROMPT_CELL_MAX_CHARS:
+        text = text[:PROMPT_CELL_MAX_CHARS - 1] + '…'
+    return text
+
+
+def build_prompt_context(workbook, sheet, shape, sample, start_row, strategy, max_tokens):
+    """Render a sample frame as prompt text within ``max_tokens``.
+
+    ``sample`` is indexed by data-row offset and ``start_row`` is the sheet
+    row of the header, so every sample row is labelled with its sheet row.
+    Rows are dropped from the end, then columns from the right, until the
+    text fits the budget.
+    """
+    columns = [str(c) for c in sample.columns]
+    rows = [int(i) + start_row + 1 for i in sample.index]
+    data = [list(row) for row in zip(*normalize_columns(sample))]
+    cells = [[_cell_text(v) for v in row] for row in data]
+
+    lines = [f"Current Excel Data ({workbook}/{sheet}):",
+             f"Shape: {shape[0]} rows × {shape[1]} columns", ""]
+    budget = max_tokens * 4 - sum(len(line) + 1 for line in lines)
+
+    # Drop columns from the right until the header row alone leaves room for rows
+    kept_cols = len(columns)
+    header_line = '\t'.join(['Row'] + columns)
+    while kept_cols > 1 and len(header_line) + 1 > budget // 2:
+        kept_cols -= 1
+        header_line = '\t'.join(['Row'] + columns[:kept_cols]) + f"\t(+{len(columns) - kept_cols} more)"
+
+    row_lines = []
+    used = len(header_line) + 1 + 64  # room for the sample title and "more rows" lines
+    for number, row in zip(rows, cells):
+        line = '\t'.join([str(number)] + row[:kept_cols])
+        if used + len(line) + 1 > budget:
+            break
+        row_lines.append(line)
+        used += len(line) + 1
+
+    kept_rows = len(row_lines)
+    if kept_rows:
+        lines.append(f"Sample data ({_SAMPLE_LABELS[strategy]} {kept_rows} rows):")
+        lines.append(header_line)
+        lines.extend(row_lines)
+        if shape[0] > kept_rows:
+            lines.append(f"... and {shape[0] - kept_rows} more rows")
+    else:
+        lines.append(header_line)
+    text = '\n'.join(lines) + '\n'
+
+    return {
+        "workbook": workbook,
+        "sheet": sheet,
+        "shape": list(shape),
+        "columns": columns,
+        "sample": {
+            "strategy": strategy,
+            "rows": rows[:kept_rows],
+            "data": [row[:kept_cols] for row in data[:kept_rows]],
+        },
+        "truncated": kept_rows < len(rows) or kept_cols < len(columns),
+        "approx_tokens": estimate_tokens(text),
+        "text": text,
+    }
@@ -1,8 +1,9 @@
 const { spawn } = require('child_process');
 const path = require('path');
 
-// Start Python Flask server
-const pythonProcess = spawn('python', ['app.py'], {
+// Start the Python backend with the production server (threaded WSGI, debug off);
+// SERVER_THREADS, SERVER_KEEPALIVE_SECONDS and SERVER_PORT are read from the environment
+const pythonProcess = spawn('python', ['server.py'], {
     cwd: __dirname,
     stdio: 'inherit',
     env: {
@@ -0,0 +1,204 @@
+"""Windowed reads of worksheet data through the active backend."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from addresses import format_range
+from config import (READ_CHUNK_ROWS, READ_CHUNK_TARGET_SECONDS, READ_CHUNK_MIN_ROWS,
+                    READ_CHUNK_MAX_CELLS)
+
+
+def range_bounds(rng):
+    """Return (row1, col1, row2, col2) of a range handle."""
+    rows, cols = rng.shape
+    return rng.row, rng.column, rng.row + rows - 1, rng.column + cols - 1
+
+
+def data_row_count(bounds):
+    """Number of data rows below the header row."""
+    return max(bounds[2] - bounds[0], 0)
+
+
+def read_header(backend, sheet, bounds):
+    """Read the header row (first row of ``bounds``) as a list of names."""
+    row1, col1, _, col2 = bounds
+    return backend.read_values(sheet, format_range(row1, col1, row1, col2))[0]
+
+
+def column_positions(header, columns):
+    """0-based positions of the named ``columns`` in ``header``; KeyError for unknown names."""
+    index = {}
+    for i, name in enumerate(header):
+        index.setdefault(name, i)
+        index.setdefault(str(name), i)
+    missing = [name for name in columns if name not in index]
+    if missing:
+        raise KeyError(f"Unknown column(s): {', '.join(map(str, missing))}")
+    return [index[name] for name in columns]
+
+
+def _column_runs(positions):
+    """Group sorted positions into (first, last) runs of adjacent columns."""
+    runs = []
+    for pos in sorted(set(positions)):
+        if runs and runs[-1][1] == pos - 1:
+            runs[-1][1] = pos
+        else:
+            runs.append([pos, pos])
+    return runs
+
+
+def read_window(backend, sheet, bounds, offset, limit, header=None, positions=None):
+    """Read data rows ``[offset, offset + limit)`` below the header.
+
+    Only the header row and the requested window are fetched from the backend.
+    With ``positions`` (0-based columns of ``bounds``, as returned by
+    column_positions) only those columns are fetched, one read per run of
+    adjacent columns. The returned frame is indexed by data-row offset so
+    callers can map rows back to sheet addresses.
+    """
+    row1, col1, row2, col2 = bounds
+    if header is None:
+        header = read_header(backend, sheet, bounds)
+    columns = header if positions is None else [header[p] for p in positions]
+    first = row1 + 1 + offset
+    last = min(first + limit - 1, row2)
+    if limit <= 0 or first > last:
+        return pd.DataFrame(columns=columns)
+    index = range(offset, offset + last - first + 1)
+    if positions is None:
+        rows = backend.read_values(sheet, format_range(first, col1, last, col2))
+        return pd.DataFrame(rows, columns=columns, index=index)
+    grid = np.empty((len(index), len(positions)), dtype=object)
+    for lo, hi in _column_runs(positions):
+        block = backend.read_values(sheet, format_range(first, col1 + lo, last, col1 + hi))
+        for j, pos in enumerate(positions):
+            if lo <= pos <= hi:
+                grid[:, j] = [row[pos - lo] for row in block]
+    return pd.DataFrame(grid, columns=columns, index=index).infer_objects()
+
+
+def read_rows(backend, sheet, bounds, offset, limit, header=True):
+    """Read rows ``[offset, offset + limit)`` of ``bounds`` as a 2D list, without pandas.
+
+    With ``header`` the offsets count from the row below the header row, as
+    in read_window; without it they count from the first row of ``bounds``.
+    """
+    row1, col1, row2, col2 = bounds
+    first = row1 + (1 if header else 0) + offset
+    last = min(first + limit - 1, row2)
+    if limit <= 0 or first > last:
+        return []
+    return backend.read_values(sheet, format_range(first, col1, last, col2))
+
+
+def trim_frame(df):
+    """Drop trailing all-null rows, and trailing columns with no header and no values."""
+    if df.empty:
+        return df
+    filled = df.notna().to_numpy()
+    rows = np.flatnonzero(filled.any(axis=1))
+    cols = np.flatnonzero(filled.any(axis=0) | pd.notna(df.columns.to_numpy(dtype=object)))
+    last_row = rows[-1] + 1 if rows.size else 0
+    last_col = cols[-1] + 1 if cols.size else 0
+    if last_row == len(df) and last_col == df.shape[1]:
+        return df
+    return df.iloc[:last_row, :last_col]
+
+
+class BlockReader:
+    """Read a range in row chunks instead of one large backend transfer.
+
+    With ``auto_tune`` the chunk size is rescaled after every call so that a
+    backend round trip takes roughly ``READ_CHUNK_TARGET_SECONDS``: fast calls
+    grow the next chunk (amortizing per-call overhead), slow calls shrink it.
+    Chunks never exceed ``READ_CHUNK_MAX_CELLS`` cells, which keeps single
+    COM transfers well below the sizes that run out of memory.
+    """
+
+    def __init__(self, backend, sheet, bounds, chunk_rows=None, auto_tune=True):
+        self.backend = backend
+        self.sheet = sheet
+        self.bounds = bounds
+        self.auto_tune = auto_tune
+        self._requested_rows = chunk_rows or READ_CHUNK_ROWS
+        self._size_chunks(self._requested_rows, bounds[3] - bounds[1] + 1)
+        self.header = None
+        self.positions = None
+        self.calls = []
+
+    def _size_chunks(self, chunk_rows, width):
+        self.max_rows = max(READ_CHUNK_MIN_ROWS, READ_CHUNK_MAX_CELLS // width)
+        self.chunk_rows = min(chunk_rows, self.max_rows)
+
+    def project(self, columns):
+        """Restrict later reads to the named header columns.
+
+        The cell budget per call then applies to the projected width, so
+        narrow projections read proportionally taller blocks.
+        """
+        self.positions = column_positions(self.read_header(), columns)
+        self._size_chunks(self._requested_rows, len(self.positions))
+
+    def _tune(self, rows, elapsed):
+        if elapsed <= 0 or rows < self.chunk_rows:
+            return
+        # Rescale towards the target duration, at most 2x per step to damp noise
+        scale = min(max(READ_CHUNK_TARGET_SECONDS / elapsed, 0.5), 2.0)
+        self.chunk_rows = int(min(max(self.chunk_rows * scale, READ_CHUNK_MIN_ROWS), self.max_rows))
+
+    def read_header(self):
+        if self.header is None:
+            self.header = read_header(self.backend, self.sheet, self.bounds)
+        return self.header
+
+    @property
+    def frame_columns(self):
+        """Column names of the frames this reader yields."""
+        header = self.read_header()
+        return header if self.positions is None else [header[p] for p in self.positions]
+
+    def _chunks(self, offset, limit, total, read):
+        """Yield ``read(start, count)`` over rows ``[offset, offset + limit)`` of ``total``."""
+        stop = total if limit is None else min(total, offset + limit)
+        start = offset
+        while start < stop:
+            count = min(self.chunk_rows, stop - start)
+            began = time.perf_counter()
+            block = read(start, count)
+            elapsed = time.perf_counter() - began
+            self.calls.append((count, elapsed))
+            if self.auto_tune:
+                self._tune(count, elapsed)
+            yield block
+            start += count
+
+    def iter_blocks(self, offset=0, limit=None):
+        """Yield DataFrames of data rows ``[offset, offset + limit)`` lazily, one read each."""
+        header = self.read_header()
+        return self._chunks(offset, limit, data_row_count(self.bounds),
+                            lambda start, count: read_window(self.backend, self.sheet, self.bounds,
+                                                             start, count, header=header,
+                                                             positions=self.positions))
+
+    def iter_rows(self, offset=0, limit=None, header=True):
+        """Yield raw 2D lists of rows, below the header row when ``header`` is set."""
+        total = data_row_count(self.bounds) + (0 if header else 1)
+        return self._chunks(offset, limit, total,
+                            lambda start, count: read_rows(self.backend, self.sheet, self.bounds,
+                                                           start, count, header))
+
+    def read_frame(self, offset=0, limit=None):
+        """Assemble the requested rows into a single DataFrame."""
+        blocks = list(self.iter_blocks(offset, limit))
+        if not blocks:
+            return pd.DataFrame(columns=self.frame_columns)
+        return blocks[0] if len(blocks) == 1 else pd.concat(blocks)
+
+
+def frame_blocks(df, block_rows, offset=0, limit=None):
+    """Yield row slices of an already-read frame, mirroring BlockReader.iter_blocks."""
+    stop = len(df) if limit is None else min(len(df), offset + limit)
+    for start in range(offset, stop, block_rows):
+        yield df.iloc[start:min(start + block_rows, stop)]
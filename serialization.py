@@ -0,0 +1,164 @@
+"""JSON serialization of sheet frames.
+
+Frames are normalized column by column before encoding, so the encoder only
+ever sees native Python values: NaN/NaT become None, datetimes become ISO
+strings through one vectorized strftime per column, and Decimal/NumPy
+columns are cast in bulk. FrameJSONProvider wires this into Flask and can
+hand the final encoding to orjson when it is installed.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+from config import JSON_BACKEND
+
+ORIENTS = ('records', 'columns', 'split', 'values')
+
+
+def _iso_strings(values):
+    """Format a datetime64 series as ISO 8601 strings, NaT as None."""
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+    unit = 'us' if values.dt.microsecond.fillna(0).ne(0).any() else 's'
+    strings = np.datetime_as_string(values.to_numpy(dtype='datetime64[us]'), unit=unit)
+    return _with_nones(strings.astype(object), values.isna().to_numpy())
+
+
+def _with_nones(values, missing):
+    """Return ``values`` as a list with the ``missing`` positions set to None."""
+    if missing.any():
+        values = values.astype(object)
+        values[missing] = None
+    return values.tolist()
+
+
+def normalize_column(series):
+    """Convert one column to a list of JSON-native Python values."""
+    kind = series.dtype.kind
+    if kind in 'biu':
+        return series.tolist()
+    if kind == 'f':
+        values = series.to_numpy()
+        return _with_nones(values, np.isnan(values))
+    if kind == 'M':
+        return _iso_strings(series)
+
+    missing = series.isna().to_numpy()
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in ('decimal', 'floating', 'mixed-integer-float'):
+        return _with_nones(series.to_numpy(dtype=float, na_value=np.nan), missing)
+    if inferred == 'integer':
+        # Stay with ints: a numeric cast would turn the column into floats around missing cells
+        values = series.to_numpy(dtype=object, copy=True)
+        present = values[~missing]
+        try:
+            values[~missing] = present.astype(np.int64).tolist()
+        except OverflowError:
+            values[~missing] = [int(v) for v in present]
+        return _with_nones(values, missing)
+    if inferred in ('datetime', 'datetime64', 'date'):
+        return _iso_strings(pd.to_datetime(series))
+    if inferred in ('string', 'empty', 'boolean'):
+        return _with_nones(series.to_numpy(dtype=object), missing)
+    # Mixed columns fall back to per-value conversion
+    return [None if m else _native(v) for v, m in zip(series.tolist(), missing)]
+
+
+def _native(obj):
+    """Convert a single non-native value to its JSON-native equivalent."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return obj
+
+
+def normalize_columns(df):
+    """Normalize every column of ``df`` into a list of native values."""
+    return [normalize_column(df.iloc[:, j]) for j in range(df.shape[1])]
+
+
+def frame_records(df):
+    """Return ``df`` as record dicts of native values."""
+    names = list(df.columns)
+    return [dict(zip(names, row)) for row in zip(*normalize_columns(df))]
+
+
+def frame_rows(df):
+    """Return ``df`` as a list of row lists of native values."""
+    return [list(row) for row in zip(*normalize_columns(df))]
+
+
+def frame_payload(df, orient='records'):
+    """Return the response fields for ``df`` in the requested orient.
+
+    - ``records``: ``data`` is a list of ``{column: value}`` dicts
+    - ``columns``: ``columns`` once, ``data`` as one array per column
+    - ``split``: ``columns`` once, ``data`` as one array per row
+    - ``values``: ``data`` as one array per row, no header
+    """
+    if orient == 'records':
+        return {"data": frame_records(df)}
+    if orient == 'columns':
+        data = normalize_columns(df)
+    else:
+        data = frame_rows(df)
+    if orient == 'values':
+        return {"data": data}
+    return {"columns": list(df.columns), "data": data}
+
+
+def _orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+class FrameJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that understands DataFrames, NumPy, Decimal and datetimes.
+
+    ``JSON_BACKEND`` selects the encoder: 'json' (standard library), 'orjson',
+    or 'auto' (orjson when installed).
+    """
+
+    sort_keys = False
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        backend = backend or JSON_BACKEND
+        self._orjson = _orjson() if backend in ('auto', 'orjson') else None
+        if backend == 'orjson' and self._orjson is None:
+            raise ImportError("JSON_BACKEND=orjson requires orjson (pip install orjson)")
+        self.backend = 'orjson' if self._orjson else 'json'
+
+    @staticmethod
+    def default(obj):
+        if obj is pd.NaT or obj is pd.NA:
+            return None
+        if isinstance(obj, pd.DataFrame):
+            return frame_records(obj)
+        if isinstance(obj, pd.Series):
+            return normalize_column(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, (np.generic, datetime, date, pd.Timestamp, Decimal)):
+            return _native(obj)
+        return DefaultJSONProvider.default(obj)
+
+    def dumps(self, obj, **kwargs):
+        # orjson always emits compact output; pretty-printing falls back to json
+        if self._orjson is not None and not kwargs.get('indent'):
+            option = self._orjson.OPT_SERIALIZE_NUMPY | self._orjson.OPT_NON_STR_KEYS
+            return self._orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
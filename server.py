@@ -0,0 +1,94 @@
+"""Production entry point for the Flask backend.
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 3001] [--threads 8] [--keepalive 30]
+
+Serves the app with waitress when it is installed: a fixed pool of request
+threads and HTTP/1.1 keep-alive connections closed after ``--keepalive``
+idle seconds. Without waitress, Werkzeug's threaded server is used instead:
+one thread per request and no keep-alive (Werkzeug always closes the
+connection). Debugger and reloader are off either way. Excel itself is
+only touched from the Excel worker thread (worker.py); request threads
+parse, queue and encode.
+"""
+import argparse
+
+from werkzeug.serving import WSGIRequestHandler, make_server as make_werkzeug_server
+
+from config import SERVER_HOST, SERVER_KEEPALIVE_SECONDS, SERVER_PORT, SERVER_THREADS
+
+
+def waitress_available():
+    """Whether waitress is importable."""
+    try:
+        import waitress  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _WerkzeugServer:
+    """Threaded Werkzeug server behind the run()/close() interface of waitress servers."""
+
+    def __init__(self, app, host, port, timeout):
+        # Werkzeug has no keep-alive; the timeout only bounds a stalled request's socket
+        handler = type('TimeoutRequestHandler', (WSGIRequestHandler,), {'timeout': timeout})
+        self.server = make_werkzeug_server(host, port, app, threaded=True, request_handler=handler)
+        self.effective_port = self.server.port
+        self._running = False
+
+    def run(self):
+        self._running = True
+        self.server.serve_forever()
+
+    def close(self):
+        # shutdown() waits for serve_forever() to exit, so only call it while serving
+        if self._running:
+            self.server.shutdown()
+        self.server.server_close()
+
+
+def make_server(app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS,
+                keepalive=SERVER_KEEPALIVE_SECONDS, engine='auto'):
+    """Create a production WSGI server for ``app``; call ``run()`` to serve.
+
+    ``engine`` is 'waitress', 'werkzeug' or 'auto' (waitress when installed).
+    ``port=0`` picks a free port, reported as ``effective_port``.
+    """
+    if engine == 'auto':
+        engine = 'waitress' if waitress_available() else 'werkzeug'
+    if engine == 'waitress':
+        from waitress import create_server
+        return create_server(app, host=host, port=port, threads=threads, channel_timeout=keepalive,
+                             ident='excel-ai')
+    if engine == 'werkzeug':
+        return _WerkzeugServer(app, host, port, keepalive)
+    raise ValueError(f"Unknown server engine: {engine}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS)
+    parser.add_argument('--keepalive', type=int, default=SERVER_KEEPALIVE_SECONDS)
+    parser.add_argument('--engine', choices=('auto', 'waitress', 'werkzeug'), default='auto')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    engine = args.engine
+    if engine == 'auto':
+        engine = 'waitress' if waitress_available() else 'werkzeug'
+    server = make_server(create_app(), args.host, args.port, args.threads, args.keepalive, engine)
+    print(f"Serving on http://{args.host}:{server.effective_port} "
+          f"({engine}, {args.threads} threads, keep-alive {args.keepalive}s)", flush=True)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -334,30 +334,19 @@ async function getExcelDataForPrompt(): Promise<string> {
                 throw new Error(`Python backend unhealthy: ${healthData.error || 'Unknown error'}`);
             }
             
-            const data = await callPythonScriptAdvanced();
+            const params = getWorkbookSheetParams();
+            const queryParams = new URLSearchParams({ format: 'text' });
+            if (params.workbook) queryParams.append('workbook', params.workbook);
+            if (params.sheet) queryParams.append('sheet', params.sheet);
             
-            let context = `Current Excel Data (${data.workbook}/${data.sheet}):\n`;
-            context += `Shape: ${data.shape[0]} rows × ${data.shape[1]} columns\n\n`;
-            
-            if (data.data && data.data.length > 0) {
-                // Show first few rows as sample
-                const sampleSize = Math.min(5, data.data.length);
-                context += `Sample data (first ${sampleSize} rows):\n`;
-                
-                const headers = Object.keys(data.data[0]);
-                context += headers.join('\t') + '\n';
-                
-                for (let i = 0; i < sampleSize; i++) {
-                    const row = data.data[i];
-                    const values = headers.map(h => row[h] ?? '').join('\t');
-                    context += values + '\n';
-                }
-                
-                if (data.data.length > sampleSize) {
-                    context += `... and ${data.data.length - sampleSize} more rows\n`;
-                }
+            // The server reads only the header and a few sample rows
+            const response = await fetch(`/api/prompt-context?${queryParams.toString()}`);
+            if (!response.ok) {
+                const errorData = await response.json().catch(() => ({}));
+                throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
             }
             
+            const context = await response.text();
             return context;
             
         } catch (error) {
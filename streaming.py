@@ -0,0 +1,21 @@
+"""Newline-delimited JSON streaming of sheet reads."""
+import json
+
+from serialization import frame_records
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def ndjson_lines(meta, blocks, dumps=json.dumps):
+    """Yield one metadata line, then one line per row, block by block.
+
+    ``blocks`` is consumed lazily so only one block is held in memory at a
+    time. A failure mid-stream is reported as a final ``{"error": ...}`` line
+    because the status code has already been sent.
+    """
+    yield dumps(meta) + '\n'
+    try:
+        for block in blocks:
+            yield ''.join(dumps(record) + '\n' for record in frame_records(block))
+    except Exception as e:
+        yield dumps({"error": str(e)}) + '\n'
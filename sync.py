@@ -0,0 +1,91 @@
+"""Diff-based sync of a range to a desired 2D state.
+
+Regenerated tables usually differ from what the sheet holds in a few cells.
+/api/sync-range compares the desired values against the current ones and
+writes only the rectangles of cells that changed, so unchanged cells are
+neither rewritten nor recalculated.
+
+The current state comes from the snapshot cache when the sheet version still
+matches what the last sync left behind, otherwise from one bulk read. The
+comparison is vectorized: all-numeric grids are compared as float arrays,
+anything else elementwise on object arrays.
+"""
+import numpy as np
+import pandas as pd
+
+from addresses import format_range
+
+_NUMERIC = {'integer', 'floating', 'mixed-integer-float', 'empty'}
+
+_is_bool = np.frompyfunc(lambda v: isinstance(v, (bool, np.bool_)), 1, 1)
+
+
+def to_grid(rows):
+    """Return a rectangular 2D list as an object array, with '' as empty (None).
+
+    Raises ValueError for anything else, as Excel stores written empty
+    strings as empty cells.
+    """
+    if (not isinstance(rows, list) or not rows or not all(isinstance(row, list) for row in rows)
+            or not rows[0] or any(len(row) != len(rows[0]) for row in rows)):
+        raise ValueError("values must be a non-empty rectangular 2D list")
+    grid = np.empty((len(rows), len(rows[0])), dtype=object)
+    grid[:] = rows
+    grid[grid == ''] = None
+    return grid
+
+
+def changed_mask(current, desired):
+    """Boolean mask of the cells of ``desired`` that differ from ``current``.
+
+    Empty cells (None/NaN) match each other; 1 and 1.0 match, as Excel
+    returns every number as a float; True and 1 do not.
+    """
+    kinds = {pd.api.types.infer_dtype(grid.ravel(), skipna=True) for grid in (current, desired)}
+    if kinds <= _NUMERIC:
+        a, b = current.astype(np.float64), desired.astype(np.float64)
+        return ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    same = (current == desired).astype(bool)
+    same &= (_is_bool(current) == _is_bool(desired)).astype(bool)
+    return ~same
+
+
+def changed_blocks(mask):
+    """Cut a boolean mask into rectangles of True cells: (row1, col1, row2, col2), 0-based inclusive.
+
+    Runs of adjacent changed cells are found per row with one vectorized
+    diff; runs spanning the same columns in consecutive rows are stacked.
+    Unchanged cells are never included.
+    """
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    starts = np.argwhere(edges == 1)
+    ends = np.argwhere(edges == -1)
+
+    runs = {}
+    for (row, col1), (_, stop) in zip(starts.tolist(), ends.tolist()):
+        runs.setdefault(row, []).append((col1, stop - 1))
+
+    blocks, open_blocks, previous = [], {}, None
+
+    def close(blocks_by_span, last_row):
+        blocks.extend((row1, col1, last_row, col2) for (col1, col2), row1 in blocks_by_span.items())
+
+    for row, spans in runs.items():
+        if previous is not None and row != previous + 1:
+            close(open_blocks, previous)
+            open_blocks = {}
+        continuing = {span: open_blocks.pop(span, row) for span in spans}
+        close(open_blocks, previous)
+        open_blocks, previous = continuing, row
+    close(open_blocks, previous)
+    return blocks
+
+
+def block_writes(bounds, desired, blocks):
+    """(address, 2D list) for each changed block of ``desired`` placed at ``bounds``."""
+    row0, col0 = bounds[0], bounds[1]
+    return [(format_range(row0 + r1, col0 + c1, row0 + r2, col0 + c2),
+             desired[r1:r2 + 1, c1:c2 + 1].tolist())
+            for r1, c1, r2, c2 in blocks]
@@ -1,5 +1,7 @@
 import pytest
 import json
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 import pandas as pd
 import numpy as np
@@ -8,6 +10,9 @@ from decimal import Decimal
 
 # Import the Flask app
 from app import app, RobustJSONEncoder
+from backends import MemoryBackend, set_backend
+from cache import snapshot_cache
+from columnar import ARROW_MIMETYPE, TYPED_MIMETYPE, decode_typed_columns
 
 @pytest.fixture
 def client():
@@ -16,6 +21,13 @@ def client():
     with app.test_client() as client:
         yield client
 
+@pytest.fixture(autouse=True)
+def clear_snapshot_cache():
+    """Start every test with an empty snapshot cache."""
+    snapshot_cache.clear()
+    yield
+    snapshot_cache.clear()
+
 @pytest.fixture
 def mock_excel_app():
     """Mock Excel application."""
@@ -41,12 +53,12 @@ def mock_worksheet():
     return mock_ws
 
 @pytest.fixture
-def mock_used_range():
-    """Mock Excel used range."""
-    mock_range = Mock()
-    mock_range.row = 1
-    mock_range.column = 1
-    return mock_range
+def sheet_from_frame():
+    """Factory for in-memory worksheets holding a DataFrame (header in row 1)."""
+    def make(df, name="Sheet1"):
+        backend = MemoryBackend.from_frame(df, sheet=name)
+        return backend.get_app().books.active.sheets.active
+    return make
 
 @pytest.fixture
 def sample_dataframe():
@@ -57,6 +69,23 @@ def sample_dataframe():
         'Score': [95.5, 87.2, 92.8]
     })
 
+@pytest.fixture
+def memory_backend(sample_dataframe):
+    """Install an in-memory backend holding the sample data for a test."""
+    backend = MemoryBackend.from_frame(sample_dataframe, workbook='Memory.xlsx')
+    previous = set_backend(backend)
+    yield backend
+    set_backend(previous)
+
+@pytest.fixture
+def large_memory_backend():
+    """Install an in-memory backend holding 1000 rows for a test."""
+    df = pd.DataFrame({'Id': list(range(1000)), 'Value': [i * 0.5 for i in range(1000)]})
+    backend = MemoryBackend.from_frame(df, workbook='Large.xlsx', sheet='Data')
+    previous = set_backend(backend)
+    yield backend
+    set_backend(previous)
+
 class TestHealthEndpoint:
     """Test cases for the /health endpoint."""
     
@@ -107,15 +136,13 @@ class TestExcelDataEndpoint:
     @patch('app.get_active_workbook')
     @patch('app.get_worksheet')
     def test_get_excel_data_success(self, mock_get_worksheet, mock_get_workbook, mock_get_app, 
-                                   client, mock_excel_app, mock_workbook, mock_worksheet, 
-                                   mock_used_range, sample_dataframe):
+                                   client, mock_excel_app, mock_workbook, 
+                                   sheet_from_frame, sample_dataframe):
         """Test successful data retrieval."""
         # Setup mocks
         mock_get_app.return_value = mock_excel_app
         mock_get_workbook.return_value = mock_workbook
-        mock_get_worksheet.return_value = mock_worksheet
-        mock_worksheet.used_range = mock_used_range
-        mock_used_range.options.return_value.value = sample_dataframe
+        mock_get_worksheet.return_value = sheet_from_frame(sample_dataframe)
         
         response = client.get('/api/excel-data')
         
@@ -278,52 +305,68 @@ class TestCellMapping:
     @patch('app.get_excel_app')
     @patch('app.get_active_workbook')
     @patch('app.get_worksheet')
-    @patch('app.xw.utils.int_to_col_letter')
-    def test_cell_mapping_included_small_dataset(self, mock_col_letter, mock_get_worksheet, 
+    def test_cell_mapping_included_small_dataset(self, mock_get_worksheet, 
                                                 mock_get_workbook, mock_get_app, client, 
-                                                mock_excel_app, mock_workbook, mock_worksheet, 
-                                                mock_used_range):
+                                                mock_excel_app, mock_workbook, sheet_from_frame):
         """Test that cell mapping is included for small datasets."""
         # Setup mocks
         mock_get_app.return_value = mock_excel_app
         mock_get_workbook.return_value = mock_workbook
-        mock_get_worksheet.return_value = mock_worksheet
-        mock_worksheet.used_range = mock_used_range
-        mock_col_letter.side_effect = lambda x: chr(64 + x)  # A, B, C, etc.
         
         # Small dataset (3 rows)
         small_df = pd.DataFrame({
             'Name': ['Alice', 'Bob', 'Charlie'],
             'Age': [25, 30, 35]
         })
-        mock_used_range.options.return_value.value = small_df
+        mock_get_worksheet.return_value = sheet_from_frame(small_df)
         
         response = client.get('/api/excel-data?include_cell_mapping=true')
         
         assert response.status_code == 200
         data = json.loads(response.data)
         assert 'cell_mapping' in data
+        assert data['cell_mapping']['A2'] == 'Alice'
+        assert data['cell_mapping']['B4'] == 35
+    
+    def test_cell_mapping_for_ten_thousand_rows(self, client):
+        """Test that the byte budget admits a 10k-row mapping."""
+        df = pd.DataFrame({'Id': list(range(10000)), 'Score': [i / 4 for i in range(10000)]})
+        previous = set_backend(MemoryBackend.from_frame(df))
+        try:
+            response = client.get('/api/excel-data')
+        finally:
+            set_backend(previous)
+        
+        data = json.loads(response.data)
+        assert len(data['cell_mapping']) == 20000
+        assert data['cell_mapping']['B10001'] == 2499.75
+    
+    def test_cell_mapping_uses_page_offset(self, client, large_memory_backend):
+        """Test that cell addresses account for the page offset."""
+        response = client.get('/api/excel-data?offset=20&limit=2')
+        
+        data = json.loads(response.data)
+        assert data['cell_mapping'] == {'A22': 20, 'B22': 10.0, 'A23': 21, 'B23': 10.5}
     
     @patch('app.get_excel_app')
     @patch('app.get_active_workbook')
     @patch('app.get_worksheet')
     def test_cell_mapping_excluded_large_dataset(self, mock_get_worksheet, mock_get_workbook, 
                                                  mock_get_app, client, mock_excel_app, 
-                                                 mock_workbook, mock_worksheet, mock_used_range):
+                                                 mock_workbook, sheet_from_frame):
         """Test that cell mapping is excluded for large datasets."""
         # Setup mocks
         mock_get_app.return_value = mock_excel_app
         mock_get_workbook.return_value = mock_workbook
-        mock_get_worksheet.return_value = mock_worksheet
-        mock_worksheet.used_range = mock_used_range
         
         # Large dataset (150 rows)
         large_data = {'Name': [f'Person{i}' for i in range(150)], 
                      'Age': list(range(150))}
         large_df = pd.DataFrame(large_data)
-        mock_used_range.options.return_value.value = large_df
+        mock_get_worksheet.return_value = sheet_from_frame(large_df)
         
-        response = client.get('/api/excel-data?include_cell_mapping=true')
+        with patch('app.CELL_MAPPING_MAX_BYTES', 1000):
+            response = client.get('/api/excel-data?include_cell_mapping=true')
         
         assert response.status_code == 200
         data = json.loads(response.data)
@@ -333,15 +376,13 @@ class TestCellMapping:
     @patch('app.get_active_workbook')
     @patch('app.get_worksheet')
     def test_cell_mapping_disabled(self, mock_get_worksheet, mock_get_workbook, mock_get_app, 
-                                   client, mock_excel_app, mock_workbook, mock_worksheet, 
-                                   mock_used_range, sample_dataframe):
+                                   client, mock_excel_app, mock_workbook, 
+                                   sheet_from_frame, sample_dataframe):
         """Test that cell mapping can be explicitly disabled."""
         # Setup mocks
         mock_get_app.return_value = mock_excel_app
         mock_get_workbook.return_value = mock_workbook
-        mock_get_worksheet.return_value = mock_worksheet
-        mock_worksheet.used_range = mock_used_range
-        mock_used_range.options.return_value.value = sample_dataframe
+        mock_get_worksheet.return_value = sheet_from_frame(sample_dataframe)
         
         response = client.get('/api/excel-data?include_cell_mapping=false')
         
@@ -507,4 +548,1005 @@ class TestWriteOperationsTargeting:
         
         assert response.status_code == 404
         data = json.loads(response.data)
-        assert "Sheet 'NonExistentSheet' not found" in data['error']
\ No newline at end of file
+        assert "Sheet 'NonExistentSheet' not found" in data['error']
+
+class TestMemoryBackendRoutes:
+    """Test cases for the routes running against the in-memory backend."""
+    
+    def test_read_and_write_round_trip(self, client, memory_backend):
+        """Test writing through the API and reading the result back."""
+        test_data = {
+            'operations': [
+                {'type': 'write_cell', 'cell': 'B2', 'value': 26},
+                {'type': 'write_range', 'range': 'A5:C5', 'values': [['Dana', 40, 77.0]]}
+            ]
+        }
+        response = client.post('/api/write-excel',
+                              data=json.dumps(test_data),
+                              content_type='application/json')
+        assert response.status_code == 200
+        assert all('success' in r for r in json.loads(response.data)['results'])
+        
+        response = client.get('/api/excel-data?include_cell_mapping=false')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['workbook'] == 'Memory.xlsx'
+        assert data['shape'] == [4, 3]
+        assert data['data'][0]['Age'] == 26
+        assert data['data'][3]['Name'] == 'Dana'
+
+class TestPagination:
+    """Test cases for offset/limit/cursor paging of /api/excel-data."""
+    
+    def test_offset_limit_reads_only_window(self, client, large_memory_backend):
+        """Test that a page reads the header and the window only."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        
+        response = client.get('/api/excel-data?offset=10&limit=5&include_cell_mapping=false')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [row['Id'] for row in data['data']] == [10, 11, 12, 13, 14]
+        assert data['shape'] == [1000, 2]
+        assert data['offset'] == 10 and data['limit'] == 5
+        assert data['next_cursor']
+        assert sheet.reads == 4  # extent probe (row + column block), header, window
+    
+    def test_cursor_walks_to_the_end(self, client, large_memory_backend):
+        """Test following next_cursor until the last page."""
+        ids = []
+        url = '/api/excel-data?limit=300&include_cell_mapping=false'
+        while url:
+            data = json.loads(client.get(url).data)
+            ids.extend(row['Id'] for row in data['data'])
+            cursor = data['next_cursor']
+            url = f'/api/excel-data?cursor={cursor}&include_cell_mapping=false' if cursor else None
+        assert ids == list(range(1000))
+    
+    def test_invalid_paging_parameters(self, client, large_memory_backend):
+        """Test rejection of bad offsets, limits and cursors."""
+        assert client.get('/api/excel-data?offset=-1').status_code == 400
+        assert client.get('/api/excel-data?limit=abc').status_code == 400
+        assert client.get('/api/excel-data?limit=0').status_code == 400
+        assert client.get('/api/excel-data?cursor=not-a-cursor').status_code == 400
+    
+    def test_cursor_bound_to_sheet(self, client, large_memory_backend):
+        """Test that a cursor cannot be replayed against another sheet."""
+        large_memory_backend.add_sheet('Large.xlsx', 'Other', [['Id'], [1], [2]])
+        data = json.loads(client.get('/api/excel-data?sheet=Data&limit=10&include_cell_mapping=false').data)
+        
+        response = client.get(f"/api/excel-data?sheet=Other&cursor={data['next_cursor']}")
+        
+        assert response.status_code == 400
+        assert 'Cursor' in json.loads(response.data)['error']
+
+    def test_cursor_bound_to_range_and_filters(self, client, large_memory_backend):
+        """Test that a cursor cannot be replayed against another range or filter."""
+        data = json.loads(client.get('/api/excel-data?range=A1:B100&limit=10&include_cell_mapping=false').data)
+        cursor = data['next_cursor']
+        
+        assert client.get(f"/api/excel-data?cursor={cursor}").status_code == 400
+        assert client.get(f"/api/excel-data?range=A1:B100&where=Id>5&cursor={cursor}").status_code == 400
+        assert client.get(f"/api/excel-data?range=A1:B100&cursor={cursor}").status_code == 200
+    
+    def test_cursor_rejected_after_sheet_changes(self, client, large_memory_backend):
+        """Test that a cursor issued before a write cannot skip or repeat rows."""
+        data = json.loads(client.get('/api/excel-data?limit=10&include_cell_mapping=false').data)
+        client.post('/api/write-excel', json={
+            'operations': [{'type': 'write_cell', 'cell': 'A2', 'value': -1}]})
+        
+        response = client.get(f"/api/excel-data?cursor={data['next_cursor']}")
+        
+        assert response.status_code == 409
+        assert 'restart' in json.loads(response.data)['error']
+
+class TestNdjsonStreaming:
+    """Test cases for format=ndjson streaming reads."""
+    
+    def test_streams_all_rows(self, client, large_memory_backend):
+        """Test that every row is streamed after a metadata line."""
+        response = client.get('/api/excel-data?format=ndjson')
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.data.decode().splitlines()
+        meta = json.loads(lines[0])
+        assert meta['columns'] == ['Id', 'Value']
+        assert meta['shape'] == [1000, 2]
+        rows = [json.loads(line) for line in lines[1:]]
+        assert [row['Id'] for row in rows] == list(range(1000))
+    
+    def test_first_block_sent_before_full_read(self, client, large_memory_backend):
+        """Test that the stream yields before the whole sheet is read."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        
+        response = client.get('/api/excel-data?format=ndjson&chunk_rows=100', buffered=False)
+        chunks = response.response
+        next(chunks)  # metadata line
+        first_block = next(chunks)
+        reads_after_first_block = sheet.reads
+        remaining = b''.join(chunks)
+        
+        assert first_block.count(b'\n') == 100
+        assert reads_after_first_block == 4  # extent probe, header + one block
+        assert sheet.reads == 13
+        assert remaining.count(b'\n') == 900
+    
+    def test_stream_respects_window_and_nulls(self, client, memory_backend):
+        """Test offset/limit windows and NaN-to-null encoding."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        sheet.range('C3').value = None
+        
+        response = client.get('/api/excel-data?format=ndjson&offset=1&limit=1')
+        
+        lines = response.data.decode().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1]) == {'Name': 'Bob', 'Age': 30, 'Score': None}
+    
+    def test_unsupported_format(self, client, memory_backend):
+        """Test that an unknown format is rejected."""
+        response = client.get('/api/excel-data?format=xml')
+        
+        assert response.status_code == 400
+
+class TestResponseOrients:
+    """Test cases for the orient= response shapes."""
+    
+    def test_columns_orient(self, client, memory_backend):
+        """Test headers once plus one array per column."""
+        response = client.get('/api/excel-data?orient=columns&include_cell_mapping=false')
+        
+        data = json.loads(response.data)
+        assert data['columns'] == ['Name', 'Age', 'Score']
+        assert data['data'] == [['Alice', 'Bob', 'Charlie'], [25, 30, 35], [95.5, 87.2, 92.8]]
+        assert data['shape'] == [3, 3]
+    
+    def test_split_and_values_orients(self, client, memory_backend):
+        """Test row arrays with and without the header."""
+        split = json.loads(client.get('/api/excel-data?orient=split').data)
+        values = json.loads(client.get('/api/excel-data?orient=values').data)
+        
+        assert split['columns'] == ['Name', 'Age', 'Score']
+        assert split['data'][1] == ['Bob', 30, 87.2]
+        assert 'columns' not in values
+        assert values['data'] == split['data']
+    
+    def test_missing_values_encode_as_null(self, client, memory_backend):
+        """Test that empty cells become JSON null in every orient."""
+        memory_backend.get_app().books.active.sheets.active.range('C2').value = None
+        
+        for orient in ('records', 'columns', 'split', 'values'):
+            response = client.get(f'/api/excel-data?orient={orient}&include_cell_mapping=false')
+            assert b'NaN' not in response.data
+            assert b'null' in response.data
+    
+    def test_unsupported_orient(self, client, memory_backend):
+        """Test that an unknown orient is rejected."""
+        assert client.get('/api/excel-data?orient=index').status_code == 400
+
+class TestBinaryTransport:
+    """Test cases for binary columnar responses."""
+    
+    def test_typed_columns_via_accept_header(self, client, memory_backend):
+        """Test content negotiation of the typed-array format."""
+        response = client.get('/api/excel-data', headers={'Accept': TYPED_MIMETYPE})
+        
+        assert response.status_code == 200
+        assert response.mimetype == TYPED_MIMETYPE
+        meta, df = decode_typed_columns(response.data)
+        assert meta['workbook'] == 'Memory.xlsx'
+        assert meta['shape'] == [3, 3]
+        assert list(df['Age']) == [25, 30, 35]
+    
+    def test_browser_accept_header_gets_json(self, client, memory_backend):
+        """Test that a wildcard Accept header still gets JSON."""
+        response = client.get('/api/excel-data', headers={'Accept': '*/*'})
+        
+        assert response.mimetype == 'application/json'
+    
+    def test_arrow_without_pyarrow(self, client, memory_backend):
+        """Test that Arrow requests fail cleanly when pyarrow is missing."""
+        with patch('app.arrow_available', return_value=False):
+            response = client.get('/api/excel-data', headers={'Accept': ARROW_MIMETYPE})
+        
+        assert response.status_code == 406
+
+class TestSnapshotCache:
+    """Test cases for cached sheet reads."""
+    
+    def test_repeat_read_served_from_cache(self, client, large_memory_backend):
+        """Test that an unchanged sheet is not re-read."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        first = json.loads(client.get('/api/excel-data?include_cell_mapping=false').data)
+        reads = sheet.reads
+        
+        second = json.loads(client.get('/api/excel-data?include_cell_mapping=false').data)
+        page = json.loads(client.get('/api/excel-data?offset=995&limit=10').data)
+        
+        assert sheet.reads == reads
+        assert second == first
+        assert [row['Id'] for row in page['data']] == [995, 996, 997, 998, 999]
+        assert page['cell_mapping']['A997'] == 995
+    
+    def test_write_invalidates_snapshot(self, client, memory_backend):
+        """Test that a write through the API is visible on the next read."""
+        client.get('/api/excel-data')
+        assert len(snapshot_cache) == 1
+        
+        client.post('/api/write-excel',
+                    data=json.dumps({'operations': [{'type': 'write_cell', 'cell': 'B2', 'value': 99}]}),
+                    content_type='application/json')
+        
+        assert len(snapshot_cache) == 0
+        data = json.loads(client.get('/api/excel-data').data)
+        assert data['data'][0]['Age'] == 99
+    
+    def test_external_change_detected_by_version(self, client, memory_backend):
+        """Test that edits outside the API change the version and miss the cache."""
+        client.get('/api/excel-data')
+        memory_backend.get_app().books.active.sheets.active.range('A2').value = 'Zed'
+        
+        data = json.loads(client.get('/api/excel-data').data)
+        
+        assert data['data'][0]['Name'] == 'Zed'
+    
+    def test_ndjson_streams_from_cache(self, client, large_memory_backend):
+        """Test that NDJSON streaming reuses a cached snapshot."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        client.get('/api/excel-data?include_cell_mapping=false')
+        reads = sheet.reads
+        
+        lines = client.get('/api/excel-data?format=ndjson').data.decode().splitlines()
+        
+        assert sheet.reads == reads
+        assert len(lines) == 1001
+
+
+class TestConditionalRequests:
+    """Test cases for ETag / If-None-Match on sheet reads."""
+    
+    def test_matching_etag_returns_304(self, client, memory_backend):
+        """Test that an unchanged sheet answers a revalidation with an empty 304."""
+        first = client.get('/api/excel-data')
+        etag = first.headers['ETag']
+        
+        second = client.get('/api/excel-data', headers={'If-None-Match': etag})
+        
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == etag
+    
+    def test_etag_changes_after_write(self, client, memory_backend):
+        """Test that a write produces a new ETag and a full response."""
+        etag = client.get('/api/excel-data').headers['ETag']
+        client.post('/api/write-excel',
+                    data=json.dumps({'operations': [{'type': 'write_cell', 'cell': 'B2', 'value': 99}]}),
+                    content_type='application/json')
+        
+        response = client.get('/api/excel-data', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_etag_depends_on_representation(self, client, memory_backend):
+        """Test that orients and formats of the same content get distinct ETags."""
+        records = client.get('/api/excel-data').headers['ETag']
+        columns = client.get('/api/excel-data?orient=columns').headers['ETag']
+        typed = client.get('/api/excel-data?format=typed').headers['ETag']
+        
+        assert len({records, columns, typed}) == 3
+        assert client.get('/api/excel-data?format=typed',
+                          headers={'If-None-Match': typed}).status_code == 304
+    
+    def test_page_etags(self, client, large_memory_backend):
+        """Test that pages revalidate independently of the full sheet."""
+        first = client.get('/api/excel-data?offset=0&limit=10')
+        second = client.get('/api/excel-data?offset=10&limit=10')
+        assert first.headers['ETag'] != second.headers['ETag']
+        
+        client.get('/api/excel-data?include_cell_mapping=false')
+        cached = client.get('/api/excel-data?offset=10&limit=10',
+                            headers={'If-None-Match': second.headers['ETag']})
+        assert cached.status_code == 304
+
+
+class TestPromptContext:
+    """Test cases for the /api/prompt-context endpoint."""
+    
+    def test_reads_only_sampled_rows(self, client, large_memory_backend):
+        """Test that the summary reads the header and sample, not the sheet."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        
+        response = client.get('/api/prompt-context?strategy=tail&rows=3')
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert data['shape'] == [1000, 2]
+        assert data['columns'] == ['Id', 'Value']
+        assert data['sample']['rows'] == [999, 1000, 1001]
+        assert data['sample']['data'][0] == [997, 498.5]
+        assert 'Sample data (last 3 rows):' in data['text']
+        assert sheet.reads == 4  # extent probe, header, one run
+    
+    def test_cached_per_sheet_version(self, client, memory_backend):
+        """Test that repeat requests are served from cache until the sheet changes."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        client.get('/api/prompt-context')
+        reads = sheet.reads
+        
+        client.get('/api/prompt-context')
+        assert sheet.reads == reads
+        
+        sheet.range('A2').value = 'Zed'
+        data = json.loads(client.get('/api/prompt-context').data)
+        assert data['sample']['data'][0][0] == 'Zed'
+    
+    def test_uses_cached_full_read(self, client, large_memory_backend):
+        """Test that a cached /api/excel-data read is sampled without touching the sheet."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        client.get('/api/excel-data?include_cell_mapping=false')
+        reads = sheet.reads
+        
+        data = json.loads(client.get('/api/prompt-context?strategy=reservoir&rows=10').data)
+        
+        assert sheet.reads == reads
+        assert len(data['sample']['rows']) == 10
+    
+    def test_text_format(self, client, memory_backend):
+        response = client.get('/api/prompt-context?format=text')
+        assert response.mimetype == 'text/plain'
+        assert response.data.decode().startswith('Current Excel Data (Memory.xlsx/')
+    
+    def test_invalid_parameters(self, client, memory_backend):
+        assert client.get('/api/prompt-context?rows=0').status_code == 400
+        assert client.get('/api/prompt-context?strategy=middle').status_code == 400
+        assert client.get('/api/prompt-context?max_tokens=-1').status_code == 400
+
+
+class TestRangeTargeting:
+    """Test cases for reads of an explicit range, defined name or table."""
+    
+    def test_reads_only_requested_block(self, client, large_memory_backend):
+        """Test that an explicit range bypasses the used range."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        sheet.range('Z5000').value = 'stray'
+        
+        data = json.loads(client.get('/api/excel-data?range=A1:B11').data)
+        
+        assert data['range'] == 'A1:B11'
+        assert data['shape'] == [10, 2]
+        assert [row['Id'] for row in data['data']] == list(range(10))
+        assert 'A2' in data['cell_mapping']
+    
+    def test_range_with_offset_header(self, client, large_memory_backend):
+        """Test that the first row of the range is the header and mappings follow it."""
+        data = json.loads(client.get('/api/excel-data?range=B101:B103').data)
+        
+        assert data['data'] == [{'49.5': 50.0}, {'49.5': 50.5}]
+        assert data['cell_mapping'] == {'B102': 50.0, 'B103': 50.5}
+    
+    def test_named_range_and_table(self, client, memory_backend):
+        """Test that defined names and tables resolve, including on other sheets."""
+        book = memory_backend.get_app().books.active
+        other = book.sheets.add('Lookup')
+        other.range('A1').value = [['Code', 'Label'], [1, 'one'], [2, 'two']]
+        other.tables.add('A1:B3', name='Codes')
+        book.names.add('Ages', "=Sheet1!$B$1:$B$4")
+        book.sheets._active = book.sheets[0]
+        
+        table = json.loads(client.get('/api/excel-data?range=Codes').data)
+        named = json.loads(client.get('/api/excel-data?range=Ages&orient=values').data)
+        
+        assert table['sheet'] == 'Lookup'
+        assert table['data'] == [{'Code': 1, 'Label': 'one'}, {'Code': 2, 'Label': 'two'}]
+        assert named['data'] == [[25], [30], [35]]
+    
+    def test_unknown_range(self, client, memory_backend):
+        response = client.get('/api/excel-data?range=NoSuchName')
+        assert response.status_code == 404
+        assert 'NoSuchName' in json.loads(response.data)['error']
+    
+    def test_ranges_cached_separately(self, client, large_memory_backend):
+        """Test that different ranges of one sheet do not share a snapshot."""
+        first = json.loads(client.get('/api/excel-data?range=A1:A3').data)
+        second = json.loads(client.get('/api/excel-data?range=B1:B3').data)
+        
+        assert list(first['data'][0]) == ['Id']
+        assert list(second['data'][0]) == ['Value']
+
+
+class TestUsedRangeTrimming:
+    """Test cases for trimming stray empty rows/columns off the used range."""
+    
+    def test_stray_formatting_is_not_read(self, client, memory_backend):
+        """Test that the read covers the real data, not the inflated used range."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        sheet.range('J30000').value = None
+        
+        data = json.loads(client.get('/api/excel-data').data)
+        
+        assert data['shape'] == [3, 3]
+        assert data['range'] == 'A1:C4'
+        assert len(data['data']) == 3
+        assert sheet.reads < 20
+    
+    def test_probe_runs_once_per_version(self, client, memory_backend):
+        """Test that pages reuse the recorded extent."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        sheet.range('J30000').value = None
+        client.get('/api/excel-data?offset=0&limit=1')
+        reads = sheet.reads
+        
+        client.get('/api/excel-data?offset=1&limit=1')
+        
+        assert sheet.reads == reads + 2  # header and window only
+    
+    def test_trim_can_be_disabled(self, client, memory_backend):
+        """Test that trim=false reads the whole used range."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        sheet.range('E10').value = None
+        
+        data = json.loads(client.get('/api/excel-data?trim=false&orient=values').data)
+        trimmed = json.loads(client.get('/api/excel-data?orient=values').data)
+        
+        assert data['shape'] == [9, 5]
+        assert data['data'][-1] == [None] * 5
+        assert trimmed['shape'] == [3, 3]
+
+
+class TestRawMode:
+    """Test cases for mode=raw reads."""
+    
+    def test_raw_values_with_header(self, client, memory_backend):
+        """Test that raw mode returns the header and the 2D value lists."""
+        data = json.loads(client.get('/api/excel-data?mode=raw').data)
+        
+        assert data['columns'] == ['Name', 'Age', 'Score']
+        assert data['data'] == [['Alice', 25, 95.5], ['Bob', 30, 87.2], ['Charlie', 35, 92.8]]
+        assert data['shape'] == [3, 3]
+        assert 'cell_mapping' not in data
+    
+    def test_raw_values_without_header(self, client, memory_backend):
+        """Test that header=false returns every row of the range as data."""
+        data = json.loads(client.get('/api/excel-data?mode=raw&header=false').data)
+        
+        assert 'columns' not in data
+        assert data['data'][0] == ['Name', 'Age', 'Score']
+        assert data['shape'] == [4, 3]
+    
+    def test_raw_pages_skip_pandas(self, client, large_memory_backend):
+        """Test paged raw reads without building a DataFrame."""
+        with patch('readers.pd.DataFrame', side_effect=AssertionError('pandas used')):
+            data = json.loads(client.get('/api/excel-data?mode=raw&offset=10&limit=3&chunk_rows=2').data)
+        
+        assert data['data'] == [[10, 5.0], [11, 5.5], [12, 6.0]]
+        assert data['next_cursor']
+    
+    def test_raw_mode_rejects_other_formats(self, client, memory_backend):
+        assert client.get('/api/excel-data?mode=raw&format=ndjson').status_code == 400
+        assert client.get('/api/excel-data?mode=grid').status_code == 400
+
+
+class TestProjectionAndFilters:
+    """Test cases for columns= projection and where= filters."""
+    
+    @pytest.fixture
+    def wide_backend(self):
+        """Install a 200-row, 12-column sheet and record every range read."""
+        df = pd.DataFrame({f"C{j}": [i * 100 + j for i in range(200)] for j in range(12)})
+        df['Region'] = ['North', 'South', 'East', 'West'] * 50
+        backend = MemoryBackend.from_frame(df, workbook='Wide.xlsx')
+        read_values = backend.read_values
+        backend.addresses = []
+        def spy(sheet, address):
+            backend.addresses.append(address)
+            return read_values(sheet, address)
+        backend.read_values = spy
+        previous = set_backend(backend)
+        yield backend
+        set_backend(previous)
+    
+    def test_projection_reads_only_requested_columns(self, client, wide_backend):
+        """Test that unrequested columns are never fetched."""
+        data = json.loads(client.get('/api/excel-data?columns=C2,C3,Region&orient=split').data)
+        
+        assert data['columns'] == ['C2', 'C3', 'Region']
+        assert data['data'][1] == [102, 103, 'South']
+        assert data['shape'] == [200, 3]
+        assert 'C2:D201' in wide_backend.addresses and 'M2:M201' in wide_backend.addresses
+        assert data['cell_mapping']['C3'] == 102 and data['cell_mapping']['M3'] == 'South'
+        assert 'A3' not in data['cell_mapping']
+    
+    def test_where_filters_rows(self, client, wide_backend):
+        """Test comparison and membership filters, with filter-only columns dropped."""
+        response = client.get('/api/excel-data?columns=C0'
+                              '&where=Region in (North,East)&where=C1 < 500')
+        data = json.loads(response.data)
+        
+        assert [row['C0'] for row in data['data']] == [0, 200, 400]
+        assert data['matched_rows'] == 3
+        assert list(data['data'][0]) == ['C0']
+        assert data['cell_mapping'] == {'A2': 0, 'A4': 200, 'A6': 400}
+    
+    def test_projection_from_cached_snapshot(self, client, wide_backend):
+        """Test that a cached full read serves projections without reading."""
+        client.get('/api/excel-data?include_cell_mapping=false')
+        count = len(wide_backend.addresses)
+        
+        data = json.loads(client.get('/api/excel-data?columns=Region&where=C0>=19800').data)
+        
+        assert len(wide_backend.addresses) == count
+        assert data['data'] == [{'Region': 'East'}, {'Region': 'West'}]
+    
+    def test_ndjson_and_pages_are_projected(self, client, wide_backend):
+        """Test projection on streamed and paged reads."""
+        lines = client.get('/api/excel-data?format=ndjson&columns=C5&where=C5 > 19000').data
+        rows = [json.loads(line) for line in lines.decode().splitlines()]
+        page = json.loads(client.get('/api/excel-data?columns=C5&offset=10&limit=2').data)
+        
+        assert rows[0]['columns'] == ['C5']
+        assert [row['C5'] for row in rows[1:]] == list(range(19005, 20000, 100))
+        assert page['data'] == [{'C5': 1005}, {'C5': 1105}]
+    
+    def test_filtered_pages_count_matching_rows(self, client, wide_backend):
+        """Test that offset, limit and cursors page through the matches, not the sheet rows."""
+        url = '/api/excel-data?columns=C0&where=C0 >= 19000&limit=3&include_cell_mapping=false'
+        data = json.loads(client.get(url).data)
+        assert [row['C0'] for row in data['data']] == [19000, 19100, 19200]
+        assert data['shape'] == [10, 1] and data['matched_rows'] == 10
+        
+        seen = [row['C0'] for row in data['data']]
+        while data['next_cursor']:
+            data = json.loads(client.get(f"{url}&cursor={data['next_cursor']}").data)
+            seen += [row['C0'] for row in data['data']]
+        assert seen == list(range(19000, 20000, 100))
+        
+        lines = client.get('/api/excel-data?format=ndjson&columns=C0&where=C0 >= 19000&offset=2&limit=3').data
+        rows = [json.loads(line) for line in lines.decode().splitlines()]
+        assert [row['C0'] for row in rows[1:]] == [19200, 19300, 19400]
+    
+    def test_invalid_projection_or_filter(self, client, wide_backend):
+        assert client.get('/api/excel-data?columns=Nope').status_code == 400
+        assert client.get('/api/excel-data?where=Nope>1').status_code == 400
+        assert client.get('/api/excel-data?where=C1').status_code == 400
+        assert client.get('/api/excel-data?mode=raw&columns=C1').status_code == 400
+
+
+class TestBatchRead:
+    """Test cases for the /api/batch-read endpoint."""
+    
+    @pytest.fixture
+    def multi_backend(self, sample_dataframe):
+        """Install two workbooks with several sheets, reads costing 20 ms each."""
+        backend = MemoryBackend(latency=0.02)
+        for book in ('One.xlsx', 'Two.xlsx'):
+            for sheet in ('A', 'B', 'C'):
+                backend.add_sheet(book, sheet, sample_dataframe)
+        previous = set_backend(backend)
+        yield backend
+        set_backend(previous)
+    
+    def post(self, client, payload):
+        return client.post('/api/batch-read', data=json.dumps(payload), content_type='application/json')
+    
+    def test_results_in_target_order(self, client, multi_backend):
+        """Test that each target gets its own result, with per-target options."""
+        response = self.post(client, {'targets': [
+            {'workbook': 'One.xlsx', 'sheet': 'A'},
+            {'workbook': 'Two.xlsx', 'sheet': 'C', 'range': 'A1:B3', 'orient': 'values'},
+            {'workbook': 'Two.xlsx', 'sheet': 'B', 'columns': ['Name'], 'where': 'Age >= 30'},
+        ]})
+        results = json.loads(response.data)['results']
+        
+        assert response.status_code == 200
+        assert [r['index'] for r in results] == [0, 1, 2]
+        assert results[0]['sheet'] == 'A' and len(results[0]['data']) == 3
+        assert results[1]['data'] == [['Alice', 25], ['Bob', 30]]
+        assert results[2]['data'] == [{'Name': 'Bob'}, {'Name': 'Charlie'}]
+        assert results[2]['matched_rows'] == 2
+    
+    def test_errors_are_per_target(self, client, multi_backend):
+        """Test that a bad target does not fail the batch."""
+        results = json.loads(self.post(client, {'targets': [
+            {'workbook': 'Missing.xlsx'},
+            {'workbook': 'One.xlsx', 'sheet': 'Nope'},
+            {'workbook': 'One.xlsx', 'sheet': 'A', 'range': 'NoSuchName'},
+            {'workbook': 'One.xlsx', 'sheet': 'A', 'where': 'Nope > 1'},
+            {'workbook': 'One.xlsx', 'sheet': 'B'},
+            'Sales',
+            42,
+        ]}).data)['results']
+        
+        assert [r.get('status') for r in results] == [404, 404, 404, 400, None, 400, 400]
+        assert 'data' in results[4]
+    
+    def test_reads_fan_out(self, client, multi_backend):
+        """Test that independent sheets are read concurrently."""
+        targets = [{'workbook': book, 'sheet': sheet}
+                   for book in ('One.xlsx', 'Two.xlsx') for sheet in ('A', 'B', 'C')]
+        start = time.perf_counter()
+        results = json.loads(self.post(client, {'targets': targets}).data)['results']
+        elapsed = time.perf_counter() - start
+        
+        # Each sheet costs ~4 sequential 20 ms calls; six sheets in series take ~0.5 s
+        assert all('data' in r for r in results)
+        assert elapsed < 0.35
+    
+    def test_ndjson_streams_one_line_per_target(self, client, multi_backend):
+        response = self.post(client, {'format': 'ndjson', 'targets': [
+            {'workbook': 'One.xlsx', 'sheet': 'A'}, {'workbook': 'Two.xlsx', 'sheet': 'B'}]})
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        
+        assert response.mimetype == 'application/x-ndjson'
+        assert sorted(line['index'] for line in lines) == [0, 1]
+    
+    def test_invalid_batches(self, client, multi_backend):
+        assert self.post(client, {}).status_code == 400
+        assert self.post(client, {'targets': [{}] * 51}).status_code == 400
+        assert self.post(client, {'targets': [{}], 'format': 'xml'}).status_code == 400
+
+class TestHandleCaching:
+    """Test cases for reusing resolved app/book/sheet handles across requests."""
+    
+    def test_health_polls_reuse_the_app_handle(self, client, memory_backend, monkeypatch):
+        """Test that repeated polls resolve the application only once."""
+        calls = []
+        get_app = memory_backend.get_app
+        monkeypatch.setattr(memory_backend, 'get_app', lambda: calls.append(1) or get_app())
+        
+        for _ in range(5):
+            assert client.get('/health').status_code == 200
+        assert len(calls) == 1
+    
+    def test_renamed_sheet_is_not_served_from_cache(self, client, memory_backend):
+        """Test that a sheet renamed between requests is looked up again."""
+        url = '/api/excel-data?workbook=Memory.xlsx&sheet=Sheet1'
+        assert client.get(url).status_code == 200
+        memory_backend.handles.check_seconds = 0
+        memory_backend.get_app().books['Memory.xlsx'].sheets['Sheet1'].name = 'Renamed'
+        
+        assert client.get(url).status_code == 404
+        assert client.get('/api/excel-data?workbook=Memory.xlsx&sheet=Renamed').status_code == 200
+
+class TestExcelWorkerRoutes:
+    """Test cases for funneling backend access through the Excel worker thread."""
+    
+    def test_concurrent_requests_share_one_thread(self, client, memory_backend, monkeypatch):
+        """Test that requests arriving on several threads all touch the backend on one."""
+        threads = set()
+        read_values = memory_backend.read_values
+        def spy(sheet, address):
+            threads.add(threading.current_thread().name)
+            return read_values(sheet, address)
+        monkeypatch.setattr(memory_backend, 'read_values', spy)
+        
+        statuses = []
+        def fetch():
+            with app.test_client() as c:
+                statuses.append(c.get('/api/excel-data?include_cell_mapping=false').status_code)
+        callers = [threading.Thread(target=fetch) for _ in range(4)]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+        
+        assert statuses == [200] * 4
+        assert threads == {'excel-worker'}
+    
+    def test_ndjson_stream_is_produced_on_the_worker(self, client, large_memory_backend, monkeypatch):
+        threads = set()
+        read_values = large_memory_backend.read_values
+        def spy(sheet, address):
+            threads.add(threading.current_thread().name)
+            return read_values(sheet, address)
+        monkeypatch.setattr(large_memory_backend, 'read_values', spy)
+        
+        response = client.get('/api/excel-data?format=ndjson&chunk_rows=100')
+        assert len(response.data.decode().splitlines()) == 1001
+        assert threads == {'excel-worker'}
+    
+    def test_health_reports_worker_stats(self, client, memory_backend):
+        data = json.loads(client.get('/health').data)
+        assert data['worker']['completed'] >= 0
+        assert set(data['worker']['wait_ms']) == {'mean', 'p95', 'max'}
+    
+    def test_request_timing_out_in_the_queue_never_runs(self, client, memory_backend, monkeypatch):
+        """Test that a write cancelled with a 503 is not applied later."""
+        from worker import excel_worker
+        monkeypatch.setattr('app.EXCEL_WORKER_TIMEOUT_SECONDS', 0.05)
+        started, gate = threading.Event(), threading.Event()
+        excel_worker.submit(lambda: started.set() or gate.wait(5))
+        assert started.wait(5)
+        try:
+            response = client.post('/api/write-excel', json={
+                'operations': [{'type': 'write_cell', 'cell': 'A1', 'value': 'late'}]})
+        finally:
+            gate.set()
+        
+        assert response.status_code == 503
+        excel_worker.call(lambda: None, timeout=5)
+        assert memory_backend.get_app().books.active.sheets.active.range('A1').value == 'Name'
+
+class TestReadCoalescing:
+    """Test cases for sharing one encoded response between identical concurrent reads."""
+    
+    def fetch_concurrently(self, url, count):
+        responses = [None] * count
+        def fetch(i):
+            with app.test_client() as c:
+                responses[i] = c.get(url)
+        threads = [threading.Thread(target=fetch, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+    
+    def test_identical_reads_share_one_encoding(self, large_memory_backend, monkeypatch):
+        """Test that requests overlapping the leader's encoding reuse its bytes."""
+        from flights import read_flights
+        import app as app_module
+        calls = []
+        def slow_payload(df, orient='records'):
+            calls.append(1)
+            time.sleep(0.2)
+            return frame_payload(df, orient)
+        frame_payload = app_module.frame_payload
+        monkeypatch.setattr(app_module, 'frame_payload', slow_payload)
+        joined = read_flights.joined
+        
+        responses = self.fetch_concurrently('/api/excel-data?include_cell_mapping=false', 4)
+        
+        assert [r.status_code for r in responses] == [200] * 4
+        assert len({r.data for r in responses}) == 1
+        assert len({r.headers['ETag'] for r in responses}) == 1
+        assert len(calls) == 1
+        assert read_flights.joined - joined == 3
+        assert len(read_flights) == 0
+    
+    def test_new_sheet_version_starts_a_new_flight(self, client, large_memory_backend):
+        """Test that a read after a write is never answered with the old bytes."""
+        url = '/api/excel-data?include_cell_mapping=false&limit=1'
+        assert json.loads(client.get(url).data)['data'][0]['Id'] == 0
+        client.post('/api/write-excel', json={
+            'operations': [{'type': 'write_cell', 'cell': 'A2', 'value': -1}]})
+        assert json.loads(client.get(url).data)['data'][0]['Id'] == -1
+
+class TestWritePlanning:
+    """Test cases for coalescing /api/write-excel operations into rectangular writes."""
+    
+    def test_cell_table_is_written_once(self, client, large_memory_backend):
+        """Test that 2,000 write_cell ops become one backend write with 2,000 results."""
+        from addresses import col_letter
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        operations = [{'type': 'write_cell', 'cell': f"{col_letter(c + 1)}{r + 2}", 'value': r * 10 + c}
+                      for r in range(200) for c in range(10)]
+        writes = sheet.writes
+        
+        response = client.post('/api/write-excel', json={'operations': operations})
+        
+        assert response.status_code == 200
+        results = json.loads(response.data)['results']
+        assert len(results) == 2000
+        assert results[11] == {"success": "Written '11' to cell B3"}
+        assert sheet.writes - writes == 1
+        assert sheet.range('A2:C3').value == [[0, 1, 2], [10, 11, 12]]
+    
+    def test_invalid_ops_keep_their_position(self, client, large_memory_backend):
+        """Test that errors are reported at the index of the op that caused them."""
+        response = client.post('/api/write-excel', json={'operations': [
+            {'type': 'write_cell', 'cell': 'A2', 'value': 5},
+            {'type': 'write_cell', 'value': 6},
+            {'type': 'write_cell', 'cell': 'A3', 'value': 7},
+        ]})
+        results = json.loads(response.data)['results']
+        assert 'success' in results[0] and 'success' in results[2]
+        assert results[1] == {"error": "Cell address required for write_cell operation"}
+    
+    def test_shadowed_ops_still_get_a_result(self, client, large_memory_backend):
+        """Test that an op fully overwritten by a later one is reported, not left null."""
+        response = client.post('/api/write-excel', json={'operations': [
+            {'type': 'write_cell', 'cell': 'A2', 'value': 1},
+            {'type': 'write_cell', 'cell': 'A2', 'value': 2},
+        ]})
+        results = json.loads(response.data)['results']
+        assert results == [{"success": "Written '1' to cell A2"}, {"success": "Written '2' to cell A2"}]
+    
+    def test_large_batches_default_to_bulk_mode(self, client, large_memory_backend):
+        """Test that bulk mode turns on above WRITE_BULK_MIN_OPS and reports phase timings."""
+        from config import WRITE_BULK_MIN_OPS
+        excel_app = large_memory_backend.get_app()
+        small = [{'type': 'write_cell', 'cell': 'A2', 'value': 1}]
+        large = [{'type': 'write_cell', 'cell': f"A{r + 2}", 'value': r} for r in range(WRITE_BULK_MIN_OPS)]
+        
+        data = json.loads(client.post('/api/write-excel', json={'operations': small}).data)
+        assert data['bulk'] is False and list(data['timing']) == ['write_ms']
+        assert excel_app.recalcs == 0
+        
+        data = json.loads(client.post('/api/write-excel', json={'operations': large}).data)
+        assert data['bulk'] is True
+        assert set(data['timing']) == {'suspend_ms', 'write_ms', 'recalc_ms', 'restore_ms'}
+        assert excel_app.recalcs == 1 and excel_app.screen_updating
+        
+        data = json.loads(client.post('/api/write-excel', json={'operations': large, 'bulk': False}).data)
+        assert data['bulk'] is False and excel_app.recalcs == 1
+        data = json.loads(client.post('/api/write-excel', json={'operations': small, 'bulk': True}).data)
+        assert data['bulk'] is True and excel_app.recalcs == 2
+
+class TestWriteJobRoutes:
+    """Test cases for /api/write-jobs."""
+    
+    def wait_for(self, client, location):
+        deadline = time.monotonic() + 5
+        while True:
+            status = json.loads(client.get(location).data)
+            if status['state'] in ('done', 'cancelled', 'failed'):
+                return status
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    
+    def test_job_runs_in_the_background(self, client, large_memory_backend):
+        """Test that submitting returns a job id at once and the status reports the results."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        operations = [{'type': 'write_cell', 'cell': f"B{r + 2}", 'value': -r} for r in range(1000)]
+        operations.append({'type': 'bogus'})
+        
+        response = client.post('/api/write-jobs', json={'operations': operations})
+        
+        assert response.status_code == 202
+        submitted = json.loads(response.data)
+        assert submitted['job_id'] and 'results' not in submitted
+        assert response.headers['Location'] == f"/api/write-jobs/{submitted['job_id']}"
+        status = self.wait_for(client, response.headers['Location'])
+        assert status['state'] == 'done'
+        assert status['operations'] == 1001 and status['written'] == 1000
+        assert status['chunks'] == 2
+        assert status['results'][999] == {"success": "Written '-999' to cell B1001"}
+        assert status['results'][1000] == {"error": "Unknown operation type: bogus"}
+        assert sheet.range('B2:B4').value == [0, -1, -2]
+        
+        summary = json.loads(client.get(response.headers['Location'] + '?results=false').data)
+        assert 'results' not in summary
+    
+    def test_unknown_and_finished_jobs(self, client, large_memory_backend):
+        """Test the 404 for unknown ids and the 409 for cancelling a finished job."""
+        assert client.get('/api/write-jobs/nope').status_code == 404
+        assert client.post('/api/write-jobs/nope/cancel').status_code == 404
+        response = client.post('/api/write-jobs', json={
+            'operations': [{'type': 'write_cell', 'cell': 'A2', 'value': 1}]})
+        self.wait_for(client, response.headers['Location'])
+        assert client.post(response.headers['Location'] + '/cancel').status_code == 409
+    
+    def test_full_queue_returns_429(self, client, large_memory_backend, monkeypatch):
+        """Test that submissions beyond the pending limit are refused with Retry-After."""
+        import app as app_module
+        from jobs import WriteJobs
+        from worker import ExcelWorker
+        job_worker = ExcelWorker(name='test-job-worker')
+        jobs = WriteJobs(job_worker, max_pending=1)
+        monkeypatch.setattr(app_module, 'write_jobs', jobs)
+        gate = threading.Event()
+        job_worker.submit(gate.wait, 5)
+        payload = {'operations': [{'type': 'write_cell', 'cell': 'A2', 'value': 1}]}
+        try:
+            running = json.loads(client.post('/api/write-jobs', json=payload).data)['job_id']
+            deadline = time.monotonic() + 5
+            while jobs.get(running).state != 'running':
+                assert time.monotonic() < deadline
+                time.sleep(0.005)
+            assert client.post('/api/write-jobs', json=payload).status_code == 202
+            
+            response = client.post('/api/write-jobs', json=payload)
+            
+            assert response.status_code == 429
+            assert response.headers['Retry-After'] == '1'
+        finally:
+            gate.set()
+            job_worker.shutdown(wait=False)
+    
+    def test_missing_sheet_is_rejected_at_submission(self, client, large_memory_backend):
+        """Test that target errors are reported before a job is queued."""
+        response = client.post('/api/write-jobs', json={
+            'sheet': 'Nope', 'operations': [{'type': 'write_cell', 'cell': 'A2', 'value': 1}]})
+        assert response.status_code == 404
+
+class TestAtomicWrites:
+    """Test cases for atomic /api/write-excel batches."""
+    
+    def test_failure_rolls_the_sheet_back(self, client, large_memory_backend, monkeypatch):
+        """Test that a failing op leaves the sheet as it was before the batch."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        write_values = large_memory_backend.write_values
+        def flaky(sheet, address, values):
+            if address == 'D5':
+                raise RuntimeError('protected')
+            write_values(sheet, address, values)
+        monkeypatch.setattr(large_memory_backend, 'write_values', flaky)
+        before = sheet.range('A2:D5').value
+        
+        response = client.post('/api/write-excel', json={'atomic': True, 'operations': [
+            {'type': 'write_range', 'range': 'A2', 'values': [[-1, -2], [-3, -4]]},
+            {'type': 'write_cell', 'cell': 'D5', 'value': 'x'},
+        ]})
+        
+        data = json.loads(response.data)
+        assert data['atomic'] and data['rolled_back'] and not data['committed']
+        assert 'snapshot_ms' in data['timing'] and 'rollback_ms' in data['timing']
+        assert data['results'][1] == {"error": "Failed to write to cell D5: protected"}
+        assert sheet.range('A2:D5').value == before
+    
+    def test_named_targets_are_rejected(self, client, large_memory_backend):
+        """Test that atomic batches need A1 addresses on the target sheet."""
+        response = client.post('/api/write-excel', json={'atomic': True, 'operations': [
+            {'type': 'write_cell', 'cell': 'Other!A1', 'value': 1}]})
+        assert response.status_code == 400
+        assert 'A1 addresses' in json.loads(response.data)['error']
+
+class TestSyncRange:
+    """Test cases for /api/sync-range."""
+    
+    def test_only_changed_cells_are_written(self, client, large_memory_backend):
+        """Test that a regenerated table writes only its changed blocks and reports the skipped cells."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        values = sheet.range('A2:B101').options(ndim=2).value
+        values[10][1] = 'changed'
+        values[50][0] = -50
+        writes = sheet.writes
+        
+        response = client.post('/api/sync-range', json={'range': 'A2', 'values': values})
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['range'] == 'A2:B101'
+        assert (data['cells'], data['changed'], data['skipped']) == (200, 2, 198)
+        assert data['writes'] == 2 and data['source'] == 'read'
+        assert sheet.writes - writes == 2
+        assert sheet.range('B12').value == 'changed'
+        assert sheet.range('A52').value == -50
+    
+    def test_repeat_sync_uses_the_cached_state(self, client, large_memory_backend):
+        """Test that syncing again reads nothing and writes nothing while the sheet is unchanged."""
+        sheet = large_memory_backend.get_app().books['Large.xlsx'].sheets['Data']
+        values = [[1, 2], [3, 4]]
+        client.post('/api/sync-range', json={'range': 'D2', 'values': values})
+        reads, writes = sheet.reads, sheet.writes
+        
+        data = json.loads(client.post('/api/sync-range', json={'range': 'D2:E3', 'values': values}).data)
+        
+        assert data['source'] == 'cache' and data['changed'] == 0 and data['skipped'] == 4
+        assert (sheet.reads, sheet.writes) == (reads, writes)
+        
+        # A write elsewhere changes the sheet version, so the state is read again
+        client.post('/api/write-excel', json={'operations': [{'type': 'write_cell', 'cell': 'D2', 'value': 9}]})
+        data = json.loads(client.post('/api/sync-range', json={'range': 'D2', 'values': values}).data)
+        assert data['source'] == 'read' and data['changed'] == 1
+        assert sheet.range('D2').value == 1
+    
+    def test_probe_versions_always_read(self, client, monkeypatch):
+        """Test that a backend whose version probe can miss edits never syncs from the cache."""
+        from backends import Backend
+        class ProbeBackend(MemoryBackend):
+            exact_versions = False
+            sheet_version = Backend.sheet_version
+        backend = ProbeBackend.from_frame(pd.DataFrame({'A': range(10), 'B': range(10), 'C': range(10)}))
+        previous = set_backend(backend)
+        try:
+            sheet = backend.get_app().books['Book1'].sheets['Sheet1']
+            values = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+            client.post('/api/sync-range', json={'range': 'A4', 'values': values})
+            sheet.range('B5').value = 'edited'  # the probe only sees the edges
+            
+            data = json.loads(client.post('/api/sync-range', json={'range': 'A4', 'values': values}).data)
+            
+            assert data['source'] == 'read' and data['changed'] == 1
+            assert sheet.range('B5').value == 5
+        finally:
+            set_backend(previous)
+    
+    def test_invalid_requests(self, client, large_memory_backend):
+        """Test the 400s for missing, ragged and mismatched values."""
+        assert client.post('/api/sync-range', json={'range': 'A1'}).status_code == 400
+        assert client.post('/api/sync-range', json={'range': 'A1', 'values': [[1], [2, 3]]}).status_code == 400
+        assert client.post('/api/sync-range', json={'range': 'A1:B1', 'values': [[1]]}).status_code == 400
+        assert client.post('/api/sync-range', json={'range': 'Data!A1', 'values': [[1]]}).status_code == 400
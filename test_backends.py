@@ -0,0 +1,169 @@
+import pytest
+import pandas as pd
+
+from addresses import (col_letter, col_index, parse_cell, parse_range, format_range, is_address,
+                       split_sheet)
+from backends import (MemoryBackend, XlsxFileBackend, XlwingsBackend,
+                      create_backend, get_backend, set_backend)
+
+@pytest.fixture
+def sample_dataframe():
+    """Sample DataFrame for testing."""
+    return pd.DataFrame({
+        'Name': ['Alice', 'Bob', 'Charlie'],
+        'Age': [25, 30, 35],
+        'Score': [95.5, 87.2, 92.8]
+    })
+
+@pytest.fixture
+def memory_backend(sample_dataframe):
+    """In-memory backend with the sample data on Book1/Sheet1."""
+    return MemoryBackend.from_frame(sample_dataframe)
+
+class TestAddresses:
+    """Test cases for A1 address helpers."""
+
+    def test_column_letters_round_trip(self):
+        """Test column index/letter conversion."""
+        for index, letters in [(1, 'A'), (26, 'Z'), (27, 'AA'), (702, 'ZZ'), (703, 'AAA')]:
+            assert col_letter(index) == letters
+            assert col_index(letters) == index
+
+    def test_parse_addresses(self):
+        """Test parsing of cell and range addresses."""
+        assert parse_cell('$B$3') == (3, 2)
+        assert parse_range('C5:A1') == (1, 1, 5, 3)
+        assert parse_range('Sheet1!B2') == (2, 2, 2, 2)
+        assert format_range(1, 1, 5, 3) == 'A1:C5'
+        with pytest.raises(ValueError):
+            parse_cell('1A')
+
+    def test_sheet_qualified_references(self):
+        """Test splitting sheet names off references."""
+        assert split_sheet('A1:B2') == (None, 'A1:B2')
+        assert split_sheet("'Q1 ''24'!A1") == ("Q1 '24", 'A1')
+        assert is_address('$A$1:F5000')
+        assert not is_address('SalesTable')
+
+class TestMemoryBackend:
+    """Test cases for the in-memory backend."""
+
+    def test_resolves_app_book_and_sheet(self, memory_backend):
+        """Test handle resolution by name and by active member."""
+        app = memory_backend.get_app()
+        book = memory_backend.get_book(app)
+        assert book.name == 'Book1'
+        assert memory_backend.get_book(app, 'Book1') is book
+        assert memory_backend.get_sheet(book).name == 'Sheet1'
+        with pytest.raises(KeyError):
+            memory_backend.get_sheet(book, 'Missing')
+
+    def test_used_range_and_dataframe_read(self, memory_backend, sample_dataframe):
+        """Test that the used range converts to the original DataFrame."""
+        app = memory_backend.get_app()
+        sheet = memory_backend.get_sheet(memory_backend.get_book(app))
+        used = memory_backend.used_range(sheet)
+        assert used.address == 'A1:C4'
+        df = used.options(pd.DataFrame, header=1, index=False).value
+        pd.testing.assert_frame_equal(df, sample_dataframe, check_dtype=False)
+
+    def test_value_dimensions_follow_xlwings(self, memory_backend):
+        """Test scalar, 1D and 2D value shapes."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        assert sheet.range('A2').value == 'Alice'
+        assert sheet.range('A1:C1').value == ['Name', 'Age', 'Score']
+        assert sheet.range('B2:B4').value == [25, 30, 35]
+        assert memory_backend.read_values(sheet, 'A2') == [['Alice']]
+
+    def test_write_grows_used_range(self, memory_backend):
+        """Test writes outside the data extend the used range."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        memory_backend.write_values(sheet, 'E10', [[1, 2], [3, 4]])
+        assert sheet.used_range.address == 'A1:F11'
+        assert sheet.range('F11').value == 4
+        sheet.range('A1:B2').value = 0
+        assert sheet.range('A1:B2').value == [[0, 0], [0, 0]]
+        assert sheet.writes == 2
+
+    def test_resolve_range(self, memory_backend):
+        """Test resolving addresses, defined names and tables."""
+        book = memory_backend.get_app().books.active
+        sheet = book.sheets.active
+        other = book.sheets.add('Other')
+        book.names.add('People', '=Sheet1!$A$1:$B$4')
+        other.tables.add('A1:C3', name='Lookup')
+
+        assert memory_backend.resolve_range(book, sheet, 'B2:C3').address == 'B2:C3'
+        qualified = memory_backend.resolve_range(book, sheet, 'Other!A1:A2')
+        assert qualified.sheet is other
+        named = memory_backend.resolve_range(book, other, 'People')
+        assert (named.sheet, named.address) == (sheet, 'A1:B4')
+        table = memory_backend.resolve_range(book, sheet, 'Lookup')
+        assert (table.sheet, table.address) == (other, 'A1:C3')
+        with pytest.raises(KeyError):
+            memory_backend.resolve_range(book, sheet, 'Missing')
+        with pytest.raises(KeyError):
+            memory_backend.resolve_range(book, sheet, 'Nowhere!A1')
+
+    def test_end_follows_ctrl_arrow(self):
+        """Test Ctrl+Arrow moves inside, between and past blocks."""
+        sheet = MemoryBackend().add_sheet(values=[[1, None], [2, None], [None, None], [4, 5]])
+        assert sheet.range('A4').end('up').address == 'A2'
+        assert sheet.range('A2').end('up').address == 'A1'
+        assert sheet.range('A100').end('up').address == 'A4'
+        assert sheet.range('C1').end('up').address == 'C1'
+        assert sheet.range('A4').end('right').address == 'B4'
+        assert sheet.range('B4').end('down').address == 'B1048576'
+
+    def test_data_extent_ignores_stray_formatting(self, memory_backend):
+        """Test that the block probe trims trailing empty rows and columns in a few reads."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        sheet.range('H20000').value = None
+        sheet.reads = 0
+        bounds = (1, 1, 20000, 8)
+
+        assert memory_backend.data_extent(sheet, bounds) == (1, 1, 4, 3)
+        assert sheet.reads <= 10
+        assert memory_backend.data_extent(sheet, (10, 1, 20, 3)) is None
+
+    def test_xlwings_extent_uses_end_lookups(self, memory_backend):
+        """Test the per-column end-of-column probe against the memory sheet."""
+        sheet = memory_backend.get_app().books.active.sheets.active
+        sheet.range('B7').value = 'late'
+        sheet.range('H20000').value = None
+        sheet.reads = 0
+
+        assert XlwingsBackend().data_extent(sheet, (1, 1, 20000, 8)) == (1, 1, 7, 3)
+        assert sheet.reads <= 3 * 8
+
+    def test_backend_registry(self):
+        """Test creating and installing backends."""
+        backend = create_backend('memory')
+        previous = set_backend(backend)
+        try:
+            assert get_backend() is backend
+        finally:
+            set_backend(previous)
+        assert isinstance(create_backend('xlwings'), XlwingsBackend)
+        with pytest.raises(ValueError):
+            create_backend('nope')
+
+class TestXlsxFileBackend:
+    """Test cases for the .xlsx file backend."""
+
+    def test_round_trip(self, tmp_path, sample_dataframe):
+        """Test loading, writing and saving a workbook file."""
+        pytest.importorskip('openpyxl')
+        path = tmp_path / 'data.xlsx'
+        sample_dataframe.to_excel(path, index=False, sheet_name='Data')
+
+        backend = XlsxFileBackend(str(path))
+        sheet = backend.get_sheet(backend.get_book(backend.get_app()), 'Data')
+        assert sheet.used_range.address == 'A1:C4'
+        backend.write_values(sheet, 'B2', 99)
+        backend.save()
+
+        reloaded = XlsxFileBackend(str(path))
+        sheet = reloaded.get_sheet(reloaded.get_book(reloaded.get_app()))
+        assert sheet.range('B2').value == 99
+        assert sheet.range('A4').value == 'Charlie'
@@ -0,0 +1,112 @@
+import time
+
+import pandas as pd
+
+from backends import Backend, MemoryBackend
+from cache import Snapshot, SnapshotCache, frame_digest
+
+def frame(rows):
+    """Numeric frame of ``rows`` rows."""
+    return pd.DataFrame({'a': range(rows), 'b': [float(i) for i in range(rows)]})
+
+class TestSnapshotCache:
+    """Test cases for the byte-bounded LRU snapshot cache."""
+
+    def test_hit_requires_matching_version(self):
+        """Test that a changed version token misses and drops the entry."""
+        cache = SnapshotCache(max_bytes=10**6)
+        cache.put(('Book', 'Sheet', None), 1, frame(10))
+        assert cache.get(('Book', 'Sheet', None), 1) is not None
+        assert cache.get(('Book', 'Sheet', None), 2) is None
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction_by_bytes(self):
+        """Test that the least recently used entries are evicted over budget."""
+        size = SnapshotCache().put(('k',), 0, frame(100)).nbytes
+        cache = SnapshotCache(max_bytes=size * 2)
+        cache.put(('B', 'one', None), 0, frame(100))
+        cache.put(('B', 'two', None), 0, frame(100))
+        cache.get(('B', 'one', None), 0)
+        cache.put(('B', 'three', None), 0, frame(100))
+        assert cache.get(('B', 'two', None), 0) is None
+        assert cache.get(('B', 'one', None), 0) is not None
+        assert cache.nbytes <= cache.max_bytes
+        assert cache.evictions == 1
+
+    def test_oversized_frames_are_not_cached(self):
+        """Test that a frame larger than the budget is not stored."""
+        cache = SnapshotCache(max_bytes=10)
+        cache.put(('B', 'S', None), 0, frame(100))
+        assert len(cache) == 0 and cache.nbytes == 0
+
+    def test_max_age(self):
+        """Test that entries expire after max_age seconds."""
+        cache = SnapshotCache(max_bytes=10**6, max_age=0.01)
+        cache.put(('B', 'S', None), 0, frame(1))
+        time.sleep(0.02)
+        assert cache.get(('B', 'S', None), 0) is None
+
+    def test_extents_expire_like_snapshots(self):
+        """Test that a remembered extent is dropped after max_age even at the same version."""
+        cache = SnapshotCache(max_bytes=10**6, max_age=0.01)
+        cache.put_extent(('B', 'S', None), 0, (1, 1, 4, 2))
+        assert cache.get_extent(('B', 'S', None), 0) == (1, 1, 4, 2)
+        time.sleep(0.02)
+        assert cache.get_extent(('B', 'S', None), 0) is None
+
+    def test_invalidate_by_sheet(self):
+        """Test dropping all entries of one sheet."""
+        cache = SnapshotCache(max_bytes=10**6)
+        cache.put(('B', 'S1', None), 0, frame(1))
+        cache.put(('B', 'S1', 'A1:B2'), 0, frame(1))
+        cache.put(('B', 'S2', None), 0, frame(1))
+        cache.invalidate('B', 'S1')
+        assert len(cache) == 1
+
+class TestSnapshotDigest:
+    """Test cases for content digests used as ETags."""
+
+    def test_page_digest_matches_sliced_frame(self):
+        """Test that a page digest from cached row hashes equals hashing the slice."""
+        df = frame(100)
+        snapshot = Snapshot(('B', 'S', None), 0, df)
+        assert snapshot.digest() == frame_digest(df)
+        assert snapshot.digest(10, 20) == frame_digest(df.iloc[10:30])
+        assert snapshot.digest(10, 20) != snapshot.digest(11, 20)
+
+    def test_digest_tracks_content_and_header(self):
+        """Test that a changed cell or column name changes the digest."""
+        df = frame(10)
+        edited = df.copy()
+        edited.loc[3, 'b'] = -1.0
+        assert frame_digest(edited) != frame_digest(df)
+        assert frame_digest(df.rename(columns={'a': 'z'})) != frame_digest(df)
+
+    def test_unhashable_values(self):
+        """Test that cells holding lists still digest."""
+        df = pd.DataFrame({'a': [[1, 2], [3]]})
+        assert frame_digest(df) != frame_digest(pd.DataFrame({'a': [[1, 2], [4]]}))
+
+class TestSheetVersion:
+    """Test cases for backend change probes."""
+
+    def test_probe_sees_extent_and_edge_rows(self):
+        """Test the generic probe used for Excel."""
+        backend = MemoryBackend.from_frame(frame(50))
+        sheet = backend.get_app().books.active.sheets.active
+        probe = Backend.sheet_version
+        before = probe(backend, sheet)
+        sheet.range('B51').value = -1
+        assert probe(backend, sheet) != before
+        before = probe(backend, sheet)
+        sheet.range('A60').value = 1
+        assert probe(backend, sheet) != before
+
+    def test_memory_version_is_exact(self):
+        """Test that any memory write changes the version."""
+        backend = MemoryBackend.from_frame(frame(50))
+        sheet = backend.get_app().books.active.sheets.active
+        before = backend.sheet_version(sheet)
+        sheet.range('A25').value = 'x'
+        assert backend.sheet_version(sheet) != before
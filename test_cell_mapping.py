@@ -0,0 +1,43 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from cell_mapping import build_cell_mapping, estimate_mapping_bytes
+
+class TestBuildCellMapping:
+    """Test cases for the vectorized cell mapping builder."""
+
+    def test_addresses_follow_sheet_position(self):
+        """Test addresses for a frame whose header is on C5."""
+        df = pd.DataFrame({'A': [1, 2], 'B': ['x', 'y']})
+        mapping = build_cell_mapping(df, start_row=5, start_col=3)
+        assert mapping == {'C6': 1, 'D6': 'x', 'C7': 2, 'D7': 'y'}
+
+    def test_missing_values_become_none(self):
+        """Test that NaN and NaT map to None."""
+        df = pd.DataFrame({'v': [1.5, np.nan], 't': [pd.Timestamp('2024-01-01'), pd.NaT]})
+        mapping = build_cell_mapping(df, 1, 1)
+        assert mapping['A3'] is None
+        assert mapping['B3'] is None
+        assert mapping['A2'] == 1.5
+
+    def test_wide_frames_use_multi_letter_columns(self):
+        """Test column letters beyond Z."""
+        df = pd.DataFrame([list(range(30))])
+        mapping = build_cell_mapping(df, 1, 1)
+        assert mapping['AD2'] == 29
+
+    def test_empty_frame(self):
+        """Test that an empty frame maps to an empty dict."""
+        assert build_cell_mapping(pd.DataFrame(), 1, 1) == {}
+
+class TestEstimateMappingBytes:
+    """Test cases for the cell mapping size estimate."""
+
+    def test_estimate_tracks_encoded_size(self):
+        """Test that the estimate is close to the real encoded size."""
+        df = pd.DataFrame({'Name': [f'Person{i}' for i in range(1000)], 'Age': list(range(1000))})
+        actual = len(json.dumps(build_cell_mapping(df, 1, 1)))
+        estimate = estimate_mapping_bytes(df, 1, 1)
+        assert 0.7 * actual < estimate < 1.3 * actual
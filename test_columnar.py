@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar import decode_typed_columns, encode_arrow_stream, encode_typed_columns
+
+@pytest.fixture
+def mixed_dataframe():
+    """Frame covering every typed-array column type."""
+    return pd.DataFrame({
+        'Name': ['Alice', None, 'Alice'],
+        'Count': [1, 2, 3],
+        'Score': [95.5, np.nan, 92.8],
+        'Loose': pd.Series([1.0, None, 3.0], dtype=object),
+        'Flag': [True, False, True],
+        'When': pd.to_datetime(['2024-01-01', None, '2024-03-01']),
+        'Mixed': pd.Series(['a', 2, None], dtype=object),
+    })
+
+class TestTypedColumns:
+    """Test cases for the typed-array encoding."""
+
+    def test_round_trip(self, mixed_dataframe):
+        """Test that every column type decodes back to its values."""
+        payload = encode_typed_columns(mixed_dataframe, {'sheet': 'Sheet1', 'shape': [3, 7]})
+        meta, df = decode_typed_columns(payload)
+
+        assert meta['sheet'] == 'Sheet1'
+        assert [c['type'] for c in meta['columns']] == ['dict', 'i8', 'f8', 'f8', 'bool', 'ts_ms', 'json']
+        assert meta['columns'][0]['dictionary'] == ['Alice']
+        assert df['Name'][0] == 'Alice' and pd.isna(df['Name'][1])
+        assert list(df['Count']) == [1, 2, 3]
+        assert np.isnan(df['Score'][1]) and df['Score'][2] == 92.8
+        assert df['Loose'][2] == 3.0
+        assert list(df['Flag']) == [True, False, True]
+        assert pd.isna(df['When'][1]) and df['When'][2] == pd.Timestamp('2024-03-01')
+        assert list(df['Mixed']) == ['a', 2, None]
+
+    def test_buffers_are_aligned(self, mixed_dataframe):
+        """Test that column buffers start on 8-byte boundaries."""
+        meta, _ = decode_typed_columns(encode_typed_columns(mixed_dataframe, {}))
+        assert all(c['offset'] % 8 == 0 for c in meta['columns'])
+
+    def test_numeric_payload_smaller_than_json(self):
+        """Test that numeric columns ship as raw buffers, smaller than JSON text."""
+        df = pd.DataFrame(np.random.default_rng(0).random((5000, 10)),
+                          columns=[f'c{i}' for i in range(10)])
+        payload = encode_typed_columns(df, {})
+        assert len(payload) < len(json.dumps(df.to_dict('records'))) / 2
+
+    def test_rejects_foreign_payload(self):
+        """Test that payloads without the magic prefix are rejected."""
+        with pytest.raises(ValueError):
+            decode_typed_columns(b'{"data": []}')
+
+class TestArrowStream:
+    """Test cases for the Arrow IPC encoding."""
+
+    def test_round_trip(self, mixed_dataframe):
+        """Test that the Arrow stream carries data and metadata."""
+        pa = pytest.importorskip('pyarrow')
+        payload = encode_arrow_stream(mixed_dataframe, {'sheet': 'Sheet1'})
+        table = pa.ipc.open_stream(payload).read_all()
+        assert pa.types.is_dictionary(table.schema.field('Name').type)
+        assert json.loads(table.schema.metadata[b'excel-ai'])['sheet'] == 'Sheet1'
+        assert table.column('Count').to_pylist() == [1, 2, 3]
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from filters import (FilterError, filter_frame, filtered_window, parse_columns, parse_predicate, parse_where,
+                     project_frame, resolve_columns)
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'Region': ['North', 'South', 'East', None],
+        'Sales': [100, 250.5, None, 75],
+        'Code': ['1', '2', 'x', '3'],
+        'Date': [datetime(2024, 1, 5), datetime(2024, 3, 1), None, datetime(2023, 12, 31)],
+    })
+
+class TestParsing:
+    """Test cases for parsing projections and predicates."""
+
+    def test_parse_predicates(self):
+        assert parse_predicate('Sales>=100') == ('Sales', '>=', 100)
+        assert parse_predicate('Region = North') == ('Region', '==', 'North')
+        assert parse_predicate("Code == '2'") == ('Code', '==', '2')
+        assert parse_predicate('Region in (North, South)') == ('Region', 'in', ['North', 'South'])
+        assert parse_predicate('Region not in North') == ('Region', 'not in', ['North'])
+        assert parse_predicate('Sales != null') == ('Sales', '!=', None)
+        assert parse_columns('Region, Sales,Region') == ['Region', 'Sales']
+        assert parse_columns('') is None
+
+    def test_invalid_predicates(self):
+        for text in ('Sales', 'Sales >', 'Sales > null', 'Region in ()'):
+            with pytest.raises(FilterError):
+                parse_predicate(text)
+
+class TestFilterFrame:
+    """Test cases for vectorized predicate masks."""
+
+    def test_numeric_comparisons(self, frame):
+        assert filter_frame(frame, parse_where(['Sales > 90'])).index.tolist() == [0, 1]
+        assert filter_frame(frame, parse_where(['Sales != 100'])).index.tolist() == [1, 2, 3]
+
+    def test_membership_and_null(self, frame):
+        assert filter_frame(frame, parse_where(['Region in North,East'])).index.tolist() == [0, 2]
+        assert filter_frame(frame, parse_where(['Code in 1,3'])).index.tolist() == [0, 3]
+        assert filter_frame(frame, parse_where(['Region = null'])).index.tolist() == [3]
+        assert filter_frame(frame, parse_where(['Region not in North,null'])).index.tolist() == [1, 2]
+
+    def test_dates_and_conjunction(self, frame):
+        predicates = parse_where(['Date >= 2024-01-01', 'Sales < 200'])
+        assert filter_frame(frame, predicates).index.tolist() == [0]
+
+    def test_string_ordering(self, frame):
+        assert filter_frame(frame, parse_where(['Region < O'])).index.tolist() == [0, 2]
+
+class TestProjection:
+    """Test cases for resolving and applying projections."""
+
+    def test_resolve_adds_filter_columns(self):
+        header = ['Region', 'Sales', 2024]
+        read, output, predicates = resolve_columns(header, ['2024'], parse_where(['Sales > 1']))
+        assert read == [2024, 'Sales']
+        assert output == [2024]
+        assert predicates == [('Sales', '>', 1)]
+        with pytest.raises(FilterError):
+            resolve_columns(header, ['Missing'], [])
+
+    def test_project_frame(self, frame):
+        out = project_frame(frame, ['Region'], parse_where(['Sales > 90']))
+        assert list(out.columns) == ['Region']
+        assert out['Region'].tolist() == ['North', 'South']
+
+    def test_filtered_window_counts_matches(self):
+        df = pd.DataFrame({'n': range(20)})
+        blocks = (df.iloc[i:i + 4] for i in range(0, 20, 4))
+        out = pd.concat(filtered_window(blocks, parse_where(['n >= 5']), offset=3, limit=6))
+        assert out['n'].tolist() == [8, 9, 10, 11, 12, 13]
+        assert out.index.tolist() == [8, 9, 10, 11, 12, 13]
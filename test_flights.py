@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from flights import SingleFlight
+
+class TestSingleFlight:
+    """Test cases for coalescing identical in-progress work."""
+
+    def test_followers_share_the_leaders_result(self):
+        flights = SingleFlight()
+        future, leading = flights.begin('key')
+        joined, following = flights.begin('key')
+        assert leading and not following and joined is future
+
+        flights.land('key', b'payload')
+        assert joined.result(timeout=1) == b'payload'
+        assert (flights.led, flights.joined, len(flights)) == (1, 1, 0)
+
+    def test_landed_key_starts_a_new_flight(self):
+        flights = SingleFlight()
+        first, _ = flights.begin('key')
+        flights.land('key', 1)
+        second, leading = flights.begin('key')
+        assert leading and second is not first
+
+    def test_errors_reach_followers(self):
+        flights = SingleFlight()
+        flights.begin('key')
+        follower, _ = flights.begin('key')
+        flights.land('key', error=RuntimeError('read failed'))
+        with pytest.raises(RuntimeError):
+            follower.result(timeout=1)
+
+    def test_followers_wait_across_threads(self):
+        flights = SingleFlight()
+        flights.begin('key')
+        results = []
+        def follow():
+            future, _ = flights.begin('key')
+            results.append(future.result(timeout=5))
+        threads = [threading.Thread(target=follow) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while flights.joined < 3:
+            threading.Event().wait(0.001)
+        flights.land('key', 'done')
+        for thread in threads:
+            thread.join()
+        assert results == ['done'] * 3
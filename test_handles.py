@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+
+from backends import MemoryBackend
+from handles import HandleCache
+
+@pytest.fixture
+def backend():
+    """In-memory backend with two workbooks, the first holding three sheets."""
+    backend = MemoryBackend()
+    for sheet in ('Alpha', 'Beta', 'Gamma'):
+        backend.add_sheet('One.xlsx', sheet, [['x'], [1]])
+    backend.add_sheet('Two.xlsx', 'Data', [['y'], [2]])
+    return backend
+
+class CountingBackend(MemoryBackend):
+    """MemoryBackend counting full lookups and liveness probes."""
+
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+        self.probes = 0
+
+    def get_app(self):
+        self.lookups += 1
+        return super().get_app()
+
+    def get_book(self, app, name=None):
+        self.lookups += 1
+        return super().get_book(app, name)
+
+    def get_sheet(self, book, name=None):
+        self.lookups += 1
+        return super().get_sheet(book, name)
+
+    def is_alive(self, handle, name=None):
+        self.probes += 1
+        return super().is_alive(handle, name)
+
+class TestHandleCache:
+    """Test cases for cached app/book/sheet handles."""
+
+    def test_named_lookups_are_cached(self, backend):
+        """Test that repeated lookups reuse the handles resolved the first time."""
+        handles = HandleCache(backend, check_seconds=0)
+        app = handles.get_app()
+        book = handles.get_book(app, 'One.xlsx')
+        sheet = handles.get_sheet(book, 'Beta')
+        assert handles.get_app() is app
+        assert handles.get_book(app, 'One.xlsx') is book
+        assert handles.get_sheet(book, 'Beta') is sheet
+        assert (handles.hits, handles.misses) == (3, 3)
+
+    def test_recent_handles_skip_liveness_probes(self):
+        """Test that handles checked within check_seconds are trusted without a probe."""
+        backend = CountingBackend()
+        backend.add_sheet('One.xlsx', 'Alpha', [[1]])
+        handles = HandleCache(backend, check_seconds=60)
+        for _ in range(5):
+            app = handles.get_app()
+            handles.get_sheet(handles.get_book(app, 'One.xlsx'), 'Alpha')
+        assert backend.lookups == 3
+        assert backend.probes == 0
+
+        handles.check_seconds = 0
+        handles.get_sheet(handles.get_book(handles.get_app(), 'One.xlsx'), 'Alpha')
+        assert backend.lookups == 3
+        assert backend.probes == 3
+
+    def test_passing_probe_restarts_the_trust_period(self, monkeypatch):
+        """Test that a handle is probed at most once per check period."""
+        import handles as handles_module
+        clock = [100.0]
+        monkeypatch.setattr(handles_module.time, 'monotonic', lambda: clock[0])
+        backend = CountingBackend()
+        backend.add_sheet('One.xlsx', 'Alpha', [[1]])
+        handles = HandleCache(backend, check_seconds=1.0)
+        handles.get_app()
+        for _ in range(10):
+            clock[0] += 0.5
+            handles.get_app()
+        # 5 seconds of polls every 0.5 s: one probe per elapsed second, not one per poll
+        assert backend.lookups == 1
+        assert backend.probes == 5
+
+    def test_renamed_sheet_is_re_resolved(self, backend):
+        """Test that a renamed sheet is no longer served under its old name."""
+        handles = HandleCache(backend, check_seconds=0)
+        book = handles.get_book(handles.get_app(), 'One.xlsx')
+        sheet = handles.get_sheet(book, 'Beta')
+        sheet.name = 'Renamed'
+        with pytest.raises(KeyError):
+            handles.get_sheet(book, 'Beta')
+        assert handles.get_sheet(book, 'Renamed') is sheet
+
+    def test_stale_sheet_is_refetched_by_index(self, backend):
+        """Test that a replaced sheet is found through the name->index map."""
+        handles = HandleCache(backend, check_seconds=0)
+        book = handles.get_book(handles.get_app(), 'One.xlsx')
+        old = handles.get_sheet(book, 'Gamma')
+        assert handles._sheet_index['One.xlsx'] == {'Alpha': 0, 'Beta': 1, 'Gamma': 2}
+
+        # Replace the sheet in place: same name and position, new object
+        old.delete()
+        new = book.sheets.add('Gamma')
+        assert handles.get_sheet(book, 'Gamma') is new
+
+    def test_closed_book_is_re_resolved(self, backend):
+        """Test that a closed and reopened workbook is looked up again."""
+        handles = HandleCache(backend, check_seconds=0)
+        app = handles.get_app()
+        book = handles.get_book(app, 'Two.xlsx')
+        book.close()
+        with pytest.raises(KeyError):
+            handles.get_book(app, 'Two.xlsx')
+        reopened = backend.add_sheet('Two.xlsx', 'Data', [[1]]).book
+        assert handles.get_book(app, 'Two.xlsx') is reopened
+
+    def test_active_lookups_follow_the_active_book(self, backend):
+        """Test that the active workbook is never served from the cache."""
+        handles = HandleCache(backend, check_seconds=60)
+        app = handles.get_app()
+        assert handles.get_book(app).name == 'Two.xlsx'
+        app.books._active = app.books['One.xlsx']
+        active = handles.get_book(app)
+        assert active.name == 'One.xlsx'
+        assert handles.get_book(app, 'One.xlsx') is active
+
+    def test_new_app_drops_cached_handles(self, backend):
+        """Test that handles resolved through another app object are not reused."""
+        handles = HandleCache(backend, check_seconds=60)
+        book = handles.get_book(handles.get_app(), 'One.xlsx')
+        other = MemoryBackend.from_frame(pd.DataFrame({'a': [1]}), workbook='One.xlsx')
+        assert handles.get_book(other.get_app(), 'One.xlsx') is not book
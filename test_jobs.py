@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from backends import MemoryBackend, set_backend
+from jobs import CANCELLED, DONE, FAILED, FINISHED, RUNNING, JobQueueFull, WriteJob, WriteJobs
+from worker import ExcelWorker
+from writes import parse_operations
+
+@pytest.fixture
+def sheet():
+    """Install an in-memory backend with one empty sheet and return the sheet."""
+    backend = MemoryBackend()
+    sheet = backend.add_sheet('Book.xlsx', 'Data', [['x']])
+    previous = set_backend(backend)
+    yield sheet
+    set_backend(previous)
+
+@pytest.fixture
+def worker():
+    worker = ExcelWorker(name='test-jobs-worker')
+    yield worker
+    worker.shutdown(wait=False)
+
+def block(worker):
+    """Occupy the worker until the returned event is set."""
+    started, gate = threading.Event(), threading.Event()
+    worker.submit(lambda: started.set() or gate.wait(5))
+    assert started.wait(5)
+    return gate
+
+def make_job(rows, sheet_name='Data', **kwargs):
+    ops, results = parse_operations([{'type': 'write_cell', 'cell': f"A{r + 1}", 'value': r}
+                                     for r in range(rows)])
+    return WriteJob(ops, results, 'Book.xlsx', sheet_name, **kwargs)
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+class TestWriteJobs:
+    """Test cases for background write jobs."""
+
+    def test_job_writes_in_chunks(self, sheet, worker):
+        """Test that a job writes chunk by chunk and reports per-op results."""
+        jobs = WriteJobs(worker)
+        job = jobs.submit(make_job(10, chunk_ops=4))
+        wait_until(lambda: job.state in FINISHED)
+        status = job.status()
+        assert status['state'] == DONE
+        assert (status['written'], status['chunks'], status['progress']) == (10, 3, 1.0)
+        assert status['ops_per_second'] > 0
+        assert status['results'][9] == {"success": "Written '9' to cell A10"}
+        assert sheet.writes == 3
+        assert sheet.range('A1:A10').value == list(range(10))
+
+    def test_cancel_stops_before_the_next_chunk(self, sheet, worker):
+        """Test that cancelling keeps the chunks already written and skips the rest."""
+        jobs = WriteJobs(worker)
+        gate = block(worker)
+        job = jobs.submit(make_job(3, chunk_ops=1))
+        wait_until(lambda: job.state == RUNNING)
+        job.cancel()
+        gate.set()
+        wait_until(lambda: job.state in FINISHED)
+        assert job.state == CANCELLED
+        assert job.written == 1
+        assert 'success' in job.results[0]
+        assert job.results[1] == {"error": "Job cancelled before this operation ran"}
+
+    def test_full_queue_rejects_submissions(self, sheet, worker):
+        """Test that at most max_pending jobs wait behind the running one."""
+        jobs = WriteJobs(worker, max_pending=1)
+        gate = block(worker)
+        try:
+            running = jobs.submit(make_job(1))
+            wait_until(lambda: running.state == RUNNING)
+            waiting = jobs.submit(make_job(1))
+            with pytest.raises(JobQueueFull):
+                jobs.submit(make_job(1))
+            waiting.cancel()
+            assert waiting.state == CANCELLED
+        finally:
+            gate.set()
+        wait_until(lambda: running.state in FINISHED)
+        assert running.state == DONE
+
+    def test_missing_sheet_fails_the_job(self, sheet, worker):
+        """Test that a job whose sheet disappeared fails with every op reported."""
+        jobs = WriteJobs(worker)
+        job = jobs.submit(make_job(2, sheet_name='Gone'))
+        wait_until(lambda: job.state in FINISHED)
+        assert job.state == FAILED
+        assert job.results[0]['error'].startswith("Job failed before this operation ran")
+
+    def test_finished_jobs_are_pruned(self, sheet, worker):
+        """Test that only the most recent finished jobs stay queryable."""
+        jobs = WriteJobs(worker, keep=1)
+        first = jobs.submit(make_job(1))
+        wait_until(lambda: first.state in FINISHED)
+        second = jobs.submit(make_job(1))
+        wait_until(lambda: second.state in FINISHED)
+        jobs.submit(make_job(1))
+        assert jobs.get(first.id) is None
+        assert jobs.get(second.id) is second
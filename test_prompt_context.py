@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from backends import MemoryBackend
+from prompt_context import (build_prompt_context, estimate_tokens, read_sample,
+                            sample_offsets)
+
+def numbered(rows):
+    """Frame with an Id column and a text column."""
+    return pd.DataFrame({'Id': range(rows), 'Text': [f"row {i}" for i in range(rows)]})
+
+class TestSampleOffsets:
+    """Test cases for choosing sample rows."""
+
+    def test_head_and_tail(self):
+        assert sample_offsets(100, 3, 'head') == [0, 1, 2]
+        assert sample_offsets(100, 3, 'tail') == [97, 98, 99]
+        assert sample_offsets(2, 5, 'tail') == [0, 1]
+
+    def test_reservoir_is_stable_and_distinct(self):
+        """Test that a seeded sample is sorted, unique and repeatable."""
+        offsets = sample_offsets(1000, 10, 'reservoir', seed=7)
+        assert offsets == sorted(set(offsets)) and len(offsets) == 10
+        assert offsets == sample_offsets(1000, 10, 'reservoir', seed=7)
+        assert all(0 <= o < 1000 for o in offsets)
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            sample_offsets(10, 1, 'random')
+
+class TestReadSample:
+    """Test cases for reading only the sampled rows."""
+
+    def test_one_read_per_run(self):
+        """Test that consecutive offsets are read together."""
+        backend = MemoryBackend.from_frame(numbered(1000))
+        sheet = backend.get_app().books.active.sheets.active
+        bounds = (1, 1, 1001, 2)
+
+        sample = read_sample(backend, sheet, bounds, [3, 4, 5, 500, 900])
+
+        assert sample['Id'].tolist() == [3, 4, 5, 500, 900]
+        assert sample.index.tolist() == [3, 4, 5, 500, 900]
+        assert sheet.reads == 4  # header plus three runs
+
+class TestBuildPromptContext:
+    """Test cases for rendering the token-budgeted summary."""
+
+    def test_text_layout(self):
+        context = build_prompt_context('Book1', 'Sheet1', (100, 2), numbered(3), 1, 'head', 1000)
+        lines = context['text'].splitlines()
+        assert lines[0] == 'Current Excel Data (Book1/Sheet1):'
+        assert lines[1] == 'Shape: 100 rows × 2 columns'
+        assert lines[3] == 'Sample data (first 3 rows):'
+        assert lines[4] == 'Row\tId\tText'
+        assert lines[5] == '2\t0\trow 0'
+        assert lines[-1] == '... and 97 more rows'
+        assert context['sample']['rows'] == [2, 3, 4]
+        assert not context['truncated']
+
+    def test_respects_token_budget(self):
+        """Test that rows and long cells are trimmed to fit the budget."""
+        df = pd.DataFrame({'Notes': ['x' * 500] * 50})
+        context = build_prompt_context('Book1', 'Sheet1', (50, 1), df, 1, 'head', 200)
+        assert context['approx_tokens'] <= 200
+        assert context['truncated']
+        assert 0 < len(context['sample']['rows']) < 50
+        assert max(len(line) for line in context['text'].splitlines()) < 100
+
+    def test_wide_header_drops_columns(self):
+        df = pd.DataFrame({f"Column number {j}": [j] for j in range(200)})
+        context = build_prompt_context('Book1', 'Sheet1', (1, 200), df, 1, 'head', 300)
+        assert estimate_tokens(context['text']) <= 300
+        assert '(+' in context['text']
+        assert len(context['sample']['data'][0]) < 200
@@ -0,0 +1,89 @@
+import pytest
+import pandas as pd
+
+import readers
+from backends import MemoryBackend
+from readers import BlockReader, column_positions, range_bounds, read_window, trim_frame
+
+@pytest.fixture
+def sheet():
+    """In-memory worksheet with 1000 data rows and 2 columns."""
+    df = pd.DataFrame({'Id': list(range(1000)), 'Value': [i * 2 for i in range(1000)]})
+    return MemoryBackend.from_frame(df).get_app().books.active.sheets.active
+
+class TestReadWindow:
+    """Test cases for windowed reads."""
+
+    def test_window_is_indexed_by_offset(self, sheet):
+        """Test that a window keeps its data-row offsets as index."""
+        df = read_window(MemoryBackend(), sheet, range_bounds(sheet.used_range), 10, 3)
+        assert list(df.index) == [10, 11, 12]
+        assert list(df['Id']) == [10, 11, 12]
+
+    def test_window_past_the_end_is_empty(self, sheet):
+        """Test reading beyond the last row."""
+        df = read_window(MemoryBackend(), sheet, range_bounds(sheet.used_range), 5000, 10)
+        assert df.empty
+        assert list(df.columns) == ['Id', 'Value']
+
+    def test_projected_window_reads_column_runs(self):
+        """Test that projected windows fetch one range per run of adjacent columns."""
+        df = pd.DataFrame({name: [1, 2] for name in 'ABCDE'})
+        sheet = MemoryBackend.from_frame(df).get_app().books.active.sheets.active
+        positions = column_positions(['A', 'B', 'C', 'D', 'E'], ['E', 'B', 'C'])
+        sheet.reads = 0
+        window = read_window(MemoryBackend(), sheet, range_bounds(sheet.used_range), 0, 2,
+                             header=list('ABCDE'), positions=positions)
+        assert list(window.columns) == ['E', 'B', 'C']
+        assert window.dtypes['E'] == 'int64'
+        assert sheet.reads == 2
+        with pytest.raises(KeyError):
+            column_positions(['A'], ['Z'])
+
+class TestBlockReader:
+    """Test cases for chunked block reads."""
+
+    def test_fixed_chunks_assemble_full_frame(self, sheet):
+        """Test that fixed-size chunks reassemble the whole range."""
+        reader = BlockReader(MemoryBackend(), sheet, range_bounds(sheet.used_range),
+                             chunk_rows=300, auto_tune=False)
+        df = reader.read_frame()
+        assert list(df['Id']) == list(range(1000))
+        assert [rows for rows, _ in reader.calls] == [300, 300, 300, 100]
+        assert sheet.reads == 5  # header + 4 chunks
+
+    def test_fast_calls_grow_chunks(self, sheet, monkeypatch):
+        """Test that fast calls grow the chunk size up to the cell budget."""
+        monkeypatch.setattr(readers, 'READ_CHUNK_MAX_CELLS', 800)
+        reader = BlockReader(MemoryBackend(), sheet, range_bounds(sheet.used_range), chunk_rows=100)
+        reader.read_frame()
+        assert [rows for rows, _ in reader.calls] == [100, 200, 400, 300]
+
+    def test_slow_calls_shrink_chunks(self, sheet):
+        """Test that calls slower than the target shrink the next chunk."""
+        reader = BlockReader(MemoryBackend(), sheet, range_bounds(sheet.used_range), chunk_rows=1000)
+        reader._tune(1000, readers.READ_CHUNK_TARGET_SECONDS * 4)
+        assert reader.chunk_rows == 500
+        reader._tune(500, readers.READ_CHUNK_TARGET_SECONDS * 1000)
+        assert reader.chunk_rows == 250
+
+    def test_partial_window(self, sheet):
+        """Test reading an offset/limit window in chunks."""
+        reader = BlockReader(MemoryBackend(), sheet, range_bounds(sheet.used_range),
+                             chunk_rows=40, auto_tune=False)
+        df = reader.read_frame(offset=990, limit=100)
+        assert list(df['Id']) == list(range(990, 1000))
+
+class TestTrimFrame:
+    """Test cases for dropping trailing empty rows and columns."""
+
+    def test_drops_trailing_nulls_only(self):
+        df = pd.DataFrame([[1, None, None, None], [None, None, 2, None], [None, None, None, None]],
+                          columns=['a', None, 'c', None])
+        trimmed = trim_frame(df)
+        assert trimmed.shape == (2, 3)
+        assert list(trimmed.columns[[0, 2]]) == ['a', 'c']
+
+    def test_keeps_labelled_empty_columns(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': [None, None]})
+        assert trim_frame(df) is df
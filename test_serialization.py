@@ -0,0 +1,97 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+from serialization import FrameJSONProvider, frame_payload, normalize_columns
+
+@pytest.fixture
+def typed_dataframe():
+    """Frame with missing values, datetimes, Decimals and NumPy scalars."""
+    return pd.DataFrame({
+        'Score': [1.5, np.nan],
+        'When': [datetime(2023, 1, 1, 12, 0, 0), None],
+        'Amount': pd.Series([Decimal('3.14159'), None], dtype=object),
+        'Count': pd.Series([np.int64(42), np.int64(7)], dtype=object),
+        'Mixed': pd.Series(['text', np.float64(2.5)], dtype=object),
+    })
+
+class TestNormalizeColumns:
+    """Test cases for column-wise normalization."""
+
+    def test_columns_become_native_values(self, typed_dataframe):
+        """Test NaN, datetime, Decimal and NumPy conversion per column."""
+        score, when, amount, count, mixed = normalize_columns(typed_dataframe)
+        assert score == [1.5, None]
+        assert when == ['2023-01-01T12:00:00', None]
+        assert amount == [3.14159, None]
+        assert count == [42, 7] and type(count[0]) is int
+        assert mixed == ['text', 2.5] and type(mixed[1]) is float
+
+    def test_integer_columns_with_gaps_stay_integers(self):
+        """Test that missing cells do not turn an integer column into floats."""
+        df = pd.DataFrame({'n': pd.Series([1, None, np.int64(3), 2**70], dtype=object)})
+        [column] = normalize_columns(df)
+        assert column == [1, None, 3, 2**70]
+        assert [type(v) for v in column] == [int, type(None), int, int]
+        assert df['n'][2] is not None and df['n'][1] is None
+
+    def test_subsecond_timestamps_keep_microseconds(self):
+        """Test that fractional seconds survive ISO formatting."""
+        df = pd.DataFrame({'t': pd.to_datetime(['2024-01-01 00:00:00.5'])})
+        assert normalize_columns(df) == [['2024-01-01T00:00:00.500000']]
+
+    def test_orients_share_normalization(self, typed_dataframe):
+        """Test that every orient carries the same normalized values."""
+        records = frame_payload(typed_dataframe, 'records')['data']
+        split = frame_payload(typed_dataframe, 'split')
+        assert records[1]['When'] is None
+        assert split['data'][0][:3] == [1.5, '2023-01-01T12:00:00', 3.14159]
+
+class TestFrameJSONProvider:
+    """Test cases for the Flask JSON provider."""
+
+    @pytest.mark.parametrize('backend', ['json', 'orjson'])
+    def test_encodes_frames_and_scalars(self, backend, typed_dataframe):
+        """Test encoding with each selectable backend."""
+        if backend == 'orjson':
+            pytest.importorskip('orjson')
+        provider = FrameJSONProvider(Flask(__name__), backend=backend)
+        assert provider.backend == backend
+
+        payload = json.loads(provider.dumps({
+            'frame': typed_dataframe,
+            'int': np.int64(1),
+            'float': np.float32(0.5),
+            'array': np.array([1, 2]),
+            'decimal': Decimal('2.5'),
+            'ts': pd.Timestamp('2024-05-01 08:30:00'),
+        }))
+        assert payload['frame'][0]['When'] == '2023-01-01T12:00:00'
+        assert payload['frame'][1]['Score'] is None
+        assert payload['int'] == 1 and payload['float'] == 0.5
+        assert payload['array'] == [1, 2] and payload['decimal'] == 2.5
+        assert payload['ts'] == '2024-05-01T08:30:00'
+
+    def test_preserves_column_order(self):
+        """Test that keys are not sorted, so records keep sheet column order."""
+        provider = FrameJSONProvider(Flask(__name__), backend='json')
+        assert provider.dumps({'b': 1, 'a': 2}) == '{"b": 1, "a": 2}'
+
+    def test_unknown_objects_still_fail(self):
+        """Test that unsupported objects raise TypeError."""
+        provider = FrameJSONProvider(Flask(__name__), backend='json')
+        with pytest.raises(TypeError):
+            provider.dumps({'x': object()})
+
+    def test_app_responses_use_provider(self):
+        """Test that jsonify goes through the provider and its fast path."""
+        from app import app
+        assert isinstance(app.json, FrameJSONProvider)
+        with app.app_context():
+            response = app.json.response({'when': pd.Timestamp('2024-01-02'), 'nat': pd.NaT})
+        assert json.loads(response.data) == {'when': '2024-01-02T00:00:00', 'nat': None}
@@ -0,0 +1,70 @@
+import http.client
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from app import create_app
+from backends import MemoryBackend, get_backend, set_backend
+from server import make_server, waitress_available
+
+@pytest.fixture
+def backend():
+    """Restore the process-wide backend after a test installs its own."""
+    previous = get_backend()
+    yield MemoryBackend.from_frame(pd.DataFrame({'Id': [1, 2, 3]}), workbook='Served.xlsx')
+    set_backend(previous)
+
+class TestCreateApp:
+    """Test cases for the application factory."""
+
+    def test_builds_independent_apps(self, backend):
+        first, second = create_app(backend=backend, testing=True), create_app()
+        assert first is not second
+        assert first.config['TESTING'] and not second.config['TESTING']
+        assert not first.debug
+        assert get_backend() is backend
+        with first.test_client() as client:
+            assert json.loads(client.get('/health').data)['workbook'] == 'Served.xlsx'
+
+class TestMakeServer:
+    """Test cases for the production WSGI servers."""
+
+    def serve(self, backend, engine):
+        server = make_server(create_app(backend=backend), '127.0.0.1', 0, threads=2, keepalive=5,
+                             engine=engine)
+        threading.Thread(target=server.run, daemon=True).start()
+        return server
+
+    def get_rows(self, conn):
+        conn.request('GET', '/api/excel-data?include_cell_mapping=false')
+        response = conn.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())['data'][2]['Id'] == 3
+        return response
+
+    @pytest.mark.skipif(not waitress_available(), reason="waitress not installed")
+    def test_waitress_keeps_connections_alive(self, backend):
+        server = self.serve(backend, 'waitress')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', server.effective_port, timeout=5)
+            for _ in range(3):
+                assert not self.get_rows(conn).will_close
+            conn.close()
+        finally:
+            server.close()
+
+    def test_werkzeug_fallback_serves_requests(self, backend):
+        server = self.serve(backend, 'werkzeug')
+        try:
+            for _ in range(2):
+                conn = http.client.HTTPConnection('127.0.0.1', server.effective_port, timeout=5)
+                self.get_rows(conn)
+                conn.close()
+        finally:
+            server.close()
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            make_server(create_app(), port=0, engine='gunicorn')
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from sync import block_writes, changed_blocks, changed_mask, to_grid
+
+def grid(rows):
+    return to_grid(rows)
+
+class TestChangedMask:
+    """Test cases for the vectorized comparison of current and desired values."""
+
+    def test_numeric_grids_compare_as_floats(self):
+        """Test that ints match Excel's floats and empty cells match each other."""
+        current = grid([[1.0, 2.0, None], [4.0, 5.0, 6.0]])
+        desired = grid([[1, 3, None], [4, 5, 6.5]])
+        assert changed_mask(current, desired).tolist() == [[False, True, False], [False, False, True]]
+
+    def test_mixed_grids_compare_elementwise(self):
+        """Test text, empty strings and booleans on the object path."""
+        current = grid([['a', None, 1.0], [True, 'x', 2.0]])
+        desired = grid([['a', '', True], [True, 'y', 2]])
+        assert changed_mask(current, desired).tolist() == [[False, False, True], [False, True, False]]
+
+class TestChangedBlocks:
+    """Test cases for cutting a change mask into rectangles."""
+
+    def test_runs_are_stacked_into_rectangles(self):
+        """Test that equal runs on consecutive rows form one block and gaps split blocks."""
+        mask = np.array([[1, 1, 0, 1],
+                         [1, 1, 0, 1],
+                         [0, 0, 0, 1],
+                         [1, 1, 0, 0],
+                         [0, 0, 0, 0],
+                         [1, 0, 0, 1]], dtype=bool)
+        assert sorted(changed_blocks(mask)) == [(0, 0, 1, 1), (0, 3, 2, 3), (3, 0, 3, 1),
+                                               (5, 0, 5, 0), (5, 3, 5, 3)]
+
+    def test_unchanged_grid_has_no_blocks(self):
+        assert changed_blocks(np.zeros((3, 4), dtype=bool)) == []
+
+    def test_blocks_cover_exactly_the_changed_cells(self):
+        """Test on random masks that blocks neither miss nor add cells."""
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            mask = rng.random((30, 12)) < 0.3
+            covered = np.zeros_like(mask, dtype=int)
+            for r1, c1, r2, c2 in changed_blocks(mask):
+                covered[r1:r2 + 1, c1:c2 + 1] += 1
+            assert (covered == mask).all()
+
+    def test_block_writes_are_placed_at_the_range(self):
+        """Test that block addresses are offset by the range's top-left cell."""
+        desired = grid([[1, 2], [3, 4]])
+        assert block_writes((5, 3, 6, 4), desired, [(0, 1, 1, 1)]) == [('D5:D6', [[2], [4]])]
+
+class TestToGrid:
+    """Test cases for validating desired values."""
+
+    @pytest.mark.parametrize('values', [[], [[]], [1, 2], [[1, 2], [3]], 'x'])
+    def test_non_rectangular_values_are_rejected(self, values):
+        with pytest.raises(ValueError):
+            to_grid(values)
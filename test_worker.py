@@ -0,0 +1,91 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from worker import PRIORITY_HIGH, PRIORITY_LOW, ExcelWorker
+
+@pytest.fixture
+def worker():
+    """A fresh worker, shut down after the test."""
+    worker = ExcelWorker(name='test-worker')
+    yield worker
+    worker.shutdown(wait=False)
+
+def block(worker):
+    """Occupy the worker until the returned event is set."""
+    started, gate = threading.Event(), threading.Event()
+    worker.submit(lambda: started.set() or gate.wait(5))
+    assert started.wait(5)
+    return gate
+
+class TestExcelWorker:
+    """Test cases for the single-thread task queue."""
+
+    def test_tasks_run_on_one_thread(self, worker):
+        """Test that every task runs on the same dedicated thread."""
+        names = {worker.call(lambda: threading.current_thread().name) for _ in range(5)}
+        assert names == {'test-worker'}
+
+    def test_priority_orders_queued_tasks(self, worker):
+        """Test that queued tasks run by priority, then by arrival."""
+        order = []
+        gate = block(worker)
+        try:
+            futures = [worker.submit(order.append, 'low', priority=PRIORITY_LOW),
+                       worker.submit(order.append, 'normal-1'),
+                       worker.submit(order.append, 'high', priority=PRIORITY_HIGH),
+                       worker.submit(order.append, 'normal-2')]
+            assert worker.stats()['queue_depth'] == 4
+        finally:
+            gate.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert order == ['high', 'normal-1', 'normal-2', 'low']
+
+    def test_timed_out_tasks_are_cancelled(self, worker):
+        """Test that a task still queued at the timeout never runs."""
+        ran = []
+        gate = block(worker)
+        try:
+            with pytest.raises(TimeoutError):
+                worker.call(ran.append, 'late', timeout=0.01)
+        finally:
+            gate.set()
+        worker.call(lambda: None, timeout=5)
+        assert ran == []
+
+    def test_started_tasks_are_waited_for(self, worker):
+        """Test that the timeout does not cut short a task that is running."""
+        assert worker.call(lambda: time.sleep(0.2) or 'done', timeout=0.05) == 'done'
+
+    def test_exceptions_reach_the_caller(self, worker):
+        with pytest.raises(ZeroDivisionError):
+            worker.call(lambda: 1 / 0)
+        assert worker.call(lambda: 'still running') == 'still running'
+
+    def test_nested_calls_run_inline(self, worker):
+        """Test that a task submitting work of its own does not deadlock."""
+        assert worker.call(lambda: worker.call(lambda: 42) + 1, timeout=5) == 43
+
+    def test_context_is_carried_to_the_worker(self, worker):
+        var = contextvars.ContextVar('var', default='unset')
+        var.set('request')
+        assert worker.call(var.get) == 'request'
+
+    def test_iterate_produces_items_on_the_worker(self, worker):
+        def items():
+            for i in range(3):
+                yield i, threading.current_thread().name
+        assert list(worker.iterate(items())) == [(0, 'test-worker'), (1, 'test-worker'), (2, 'test-worker')]
+
+    def test_stats_track_waits(self, worker):
+        gate = block(worker)
+        future = worker.submit(lambda: None)
+        threading.Timer(0.05, gate.set).start()
+        future.result(timeout=5)
+        stats = worker.stats()
+        assert stats['completed'] == 2
+        assert stats['max_queue_depth'] >= 1
+        assert stats['wait_ms']['max'] >= 40
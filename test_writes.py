@@ -0,0 +1,234 @@
+import pytest
+
+from backends import MemoryBackend
+from writes import (AtomicWriteError, execute_atomic, execute_plan, parse_operations, plan_bounds,
+                    plan_writes, write_session)
+
+def cell_ops(rows, cols, row1=1, col1=1):
+    """write_cell ops covering a rows x cols table, row by row."""
+    from addresses import col_letter
+    return [{'type': 'write_cell', 'cell': f"{col_letter(col1 + c)}{row1 + r}", 'value': r * cols + c}
+            for r in range(rows) for c in range(cols)]
+
+def plan(operations):
+    ops, results = parse_operations(operations)
+    return plan_writes(ops), results
+
+class TestPlanWrites:
+    """Test cases for coalescing write ops into rectangles."""
+
+    def test_table_of_cells_is_one_rectangle(self):
+        """Test that a full table of single-cell writes becomes one write."""
+        steps, _ = plan(cell_ops(200, 10))
+        assert [step.address for step in steps] == ['A1:J200']
+        assert steps[0].value[1][:3] == [10, 11, 12]
+        assert len(steps[0].ops) == 2000
+
+    def test_adjacent_ranges_merge(self):
+        """Test that a header row and a body written separately merge when aligned."""
+        steps, _ = plan([
+            {'type': 'write_range', 'range': 'B2:D2', 'values': [['a', 'b', 'c']]},
+            {'type': 'write_range', 'range': 'B3', 'values': [[1, 2, 3], [4, 5, 6]]},
+        ])
+        assert [step.address for step in steps] == ['B2:D4']
+        assert steps[0].value == [['a', 'b', 'c'], [1, 2, 3], [4, 5, 6]]
+
+    def test_gaps_are_not_filled(self):
+        """Test that cells no op writes stay out of every rectangle."""
+        steps, _ = plan([
+            {'type': 'write_cell', 'cell': 'A1', 'value': 1},
+            {'type': 'write_cell', 'cell': 'C1', 'value': 3},
+            {'type': 'write_range', 'range': 'A2:C2', 'values': [7, 8, 9]},
+        ])
+        assert sorted(step.address for step in steps) == ['A1', 'A2:C2', 'C1']
+
+    def test_later_ops_win_on_overlap(self):
+        """Test that overlapping ops keep the value of the last one, as sequential writes do."""
+        steps, _ = plan([
+            {'type': 'write_range', 'range': 'A1:B2', 'values': 'x'},
+            {'type': 'write_cell', 'cell': 'B2', 'value': 9},
+        ])
+        assert [(step.address, step.value) for step in steps] == [('A1:B2', [['x', 'x'], ['x', 9]])]
+
+    def test_unplannable_ops_keep_their_order(self):
+        """Test that named and sheet-qualified targets are written alone, between segments."""
+        steps, _ = plan([
+            {'type': 'write_cell', 'cell': 'A1', 'value': 1},
+            {'type': 'write_cell', 'cell': 'Total', 'value': 2},
+            {'type': 'write_cell', 'cell': 'A2', 'value': 3},
+            {'type': 'write_range', 'range': 'A3', 'values': [[1, 2], [3]]},
+        ])
+        assert [step.address for step in steps] == ['A1', 'Total', 'A2', 'A3']
+
+    def test_invalid_ops_get_errors(self):
+        """Test that validation errors are reported in place and not planned."""
+        steps, results = plan([
+            {'type': 'write_cell', 'value': 1},
+            {'type': 'write_range', 'range': 'A1'},
+            {'type': 'delete'},
+            {'type': 'write_cell', 'cell': 'A1', 'value': 1},
+        ])
+        assert [step.address for step in steps] == ['A1']
+        assert results[0] == {"error": "Cell address required for write_cell operation"}
+        assert results[1] == {"error": "Range and values required for write_range operation"}
+        assert results[2] == {"error": "Unknown operation type: delete"}
+        assert results[3] is None
+
+class TestExecutePlan:
+    """Test cases for running a write plan against a backend."""
+
+    @pytest.fixture
+    def sheet_backend(self):
+        backend = MemoryBackend()
+        backend.add_sheet('Book.xlsx', 'Data', [['x']])
+        return backend
+
+    def test_results_are_reported_per_op(self, sheet_backend):
+        """Test that one backend write still yields one result per op."""
+        sheet = sheet_backend.get_sheet(sheet_backend.get_book(sheet_backend.get_app()))
+        ops, results = parse_operations(cell_ops(3, 2))
+        execute_plan(sheet_backend, sheet, plan_writes(ops), results)
+        assert sheet.writes == 1
+        assert results[0] == {"success": "Written '0' to cell A1"}
+        assert len(results) == 6 and all('success' in r for r in results)
+        assert sheet.range('A1:B3').value == [[0, 1], [2, 3], [4, 5]]
+
+    def test_failed_write_marks_only_its_ops(self, sheet_backend, monkeypatch):
+        """Test that a failing rectangle errors the ops it covers and no others."""
+        sheet = sheet_backend.get_sheet(sheet_backend.get_book(sheet_backend.get_app()))
+        write_values = sheet_backend.write_values
+        def flaky(sheet, address, values):
+            if address == 'C1:C2':
+                raise RuntimeError('locked')
+            write_values(sheet, address, values)
+        monkeypatch.setattr(sheet_backend, 'write_values', flaky)
+        ops, results = parse_operations([
+            {'type': 'write_range', 'range': 'A1', 'values': [[1], [2]]},
+            {'type': 'write_range', 'range': 'C1', 'values': [[3], [4]]},
+        ])
+        execute_plan(sheet_backend, sheet, plan_writes(ops), results)
+        assert results[0] == {"success": "Written data to range A1"}
+        assert results[1] == {"error": "Failed to write to range C1: locked"}
+
+    def test_superseded_ops_are_reported(self, sheet_backend):
+        """Test that an op whose cells were all overwritten still gets its result."""
+        sheet = sheet_backend.get_sheet(sheet_backend.get_book(sheet_backend.get_app()))
+        ops, results = parse_operations([
+            {'type': 'write_cell', 'cell': 'B2', 'value': 1},
+            {'type': 'write_range', 'range': 'A1:C3', 'values': 0.5},
+        ])
+        steps = plan_writes(ops)
+        execute_plan(sheet_backend, sheet, steps, results)
+        assert [step.address for step in steps] == ['A1:C3']
+        assert results == [{"success": "Written '1' to cell B2"}, {"success": "Written data to range A1:C3"}]
+
+class TestWriteSession:
+    """Test cases for bulk mode around a batch of writes."""
+
+    def test_bulk_mode_suspends_and_restores(self):
+        """Test that settings are off during the writes, restored after, with one recalc."""
+        backend = MemoryBackend()
+        app = backend.get_app()
+        seen, timing = [], {}
+        with write_session(backend, app, timing, bulk=True):
+            seen.append((app.screen_updating, app.calculation, app.enable_events, app.recalcs))
+        assert seen == [(False, 'manual', False, 0)]
+        assert (app.screen_updating, app.calculation, app.enable_events) == (True, 'automatic', True)
+        assert app.recalcs == 1
+        assert set(timing) == {'suspend_ms', 'write_ms', 'recalc_ms', 'restore_ms'}
+
+    def test_settings_are_restored_on_error(self):
+        """Test that a failing batch still restores the previous settings."""
+        backend = MemoryBackend()
+        app = backend.get_app()
+        app.calculation = 'semiautomatic'
+        with pytest.raises(RuntimeError):
+            with write_session(backend, app, {}, bulk=True):
+                raise RuntimeError('boom')
+        assert (app.screen_updating, app.calculation, app.enable_events) == (True, 'semiautomatic', True)
+        assert app.recalcs == 1
+
+    def test_manual_calculation_is_not_recalculated(self):
+        """Test that a workbook the user keeps on manual calculation is left uncalculated."""
+        backend = MemoryBackend()
+        app = backend.get_app()
+        app.calculation = 'manual'
+        with write_session(backend, app, {}, bulk=True):
+            pass
+        assert app.recalcs == 0 and app.calculation == 'manual'
+
+    def test_plain_session_only_times_writes(self):
+        """Test that without bulk mode the settings are left alone."""
+        backend = MemoryBackend()
+        app = backend.get_app()
+        timing = {}
+        with write_session(backend, app, timing):
+            assert app.screen_updating and app.calculation == 'automatic'
+        assert list(timing) == ['write_ms'] and app.recalcs == 0
+
+class TestExecuteAtomic:
+    """Test cases for all-or-nothing batches."""
+
+    @pytest.fixture
+    def sheet_backend(self):
+        backend = MemoryBackend()
+        backend.add_sheet('Book.xlsx', 'Data', [['a', 'b', 'c'], [1, 2, 3], [4, 5, 6]])
+        return backend
+
+    def sheet(self, backend):
+        return backend.get_sheet(backend.get_book(backend.get_app()))
+
+    def test_failed_write_restores_the_region(self, sheet_backend, monkeypatch):
+        """Test that a failure rolls back earlier writes with one read and one write."""
+        sheet = self.sheet(sheet_backend)
+        write_values = sheet_backend.write_values
+        def flaky(sheet, address, values):
+            if address == 'D3':
+                raise RuntimeError('locked')
+            write_values(sheet, address, values)
+        monkeypatch.setattr(sheet_backend, 'write_values', flaky)
+        ops, results = parse_operations([
+            {'type': 'write_range', 'range': 'A2', 'values': [[10, 20], [40, 50]]},
+            {'type': 'write_cell', 'cell': 'D3', 'value': 60},
+        ])
+        reads, writes = sheet.reads, sheet.writes
+        summary = execute_atomic(sheet_backend, sheet, plan_writes(ops), results)
+        assert summary == {"committed": False, "rolled_back": True, "snapshot_cells": 8}
+        assert (sheet.reads - reads, sheet.writes - writes) == (1, 2)
+        assert sheet.range('A1:D3').value == [['a', 'b', 'c', None], [1, 2, 3, None], [4, 5, 6, None]]
+        assert results[0] == {"error": "Rolled back: operation 1 failed"}
+        assert results[1] == {"error": "Failed to write to cell D3: locked"}
+
+    def test_successful_batch_commits(self, sheet_backend):
+        """Test that a batch without failures is written and reported like a plain one."""
+        sheet = self.sheet(sheet_backend)
+        ops, results = parse_operations([{'type': 'write_cell', 'cell': 'B2', 'value': 9}])
+        summary = execute_atomic(sheet_backend, sheet, plan_writes(ops), results)
+        assert summary['committed'] and not summary['rolled_back']
+        assert results == [{"success": "Written '9' to cell B2"}]
+        assert sheet.range('B2').value == 9
+
+    def test_invalid_ops_abort_before_writing(self, sheet_backend):
+        """Test that a batch with a validation error writes nothing."""
+        sheet = self.sheet(sheet_backend)
+        ops, results = parse_operations([{'type': 'write_cell', 'cell': 'B2', 'value': 9},
+                                         {'type': 'write_cell', 'value': 1}])
+        writes = sheet.writes
+        summary = execute_atomic(sheet_backend, sheet, plan_writes(ops), results)
+        assert not summary['committed'] and sheet.writes == writes
+        assert results[0] == {"error": "Not written: the batch has invalid operations"}
+
+    def test_unplannable_targets_are_refused(self):
+        """Test that names and other sheets cannot be snapshotted."""
+        ops, _ = parse_operations([{'type': 'write_cell', 'cell': 'Other!A1', 'value': 1}])
+        with pytest.raises(AtomicWriteError):
+            plan_bounds(plan_writes(ops))
+
+    def test_oversized_region_is_refused(self, monkeypatch):
+        """Test that a region beyond WRITE_ATOMIC_MAX_CELLS is refused."""
+        import writes
+        monkeypatch.setattr(writes, 'WRITE_ATOMIC_MAX_CELLS', 10)
+        ops, _ = parse_operations([{'type': 'write_cell', 'cell': 'A1', 'value': 1},
+                                   {'type': 'write_cell', 'cell': 'D4', 'value': 1}])
+        with pytest.raises(AtomicWriteError, match='16 cells'):
+            plan_bounds(plan_writes(ops))
@@ -0,0 +1,174 @@
+"""Single long-lived thread that owns every Excel (COM) call.
+
+COM objects are bound to the apartment of the thread that created them, and
+the WSGI server runs requests on arbitrary threads. Routes therefore hand
+their backend work to one ``ExcelWorker``: COM is initialized once on its
+thread, calls never race, and the queue in front of it can be measured.
+
+Tasks are ordered by priority (lower first), then by arrival. Each task runs
+in a copy of the submitting thread's context, so Flask's ``request`` works
+inside it.
+"""
+import contextvars
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+from config import EXCEL_WORKER_STATS_WINDOW
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+_DONE = object()
+
+
+def _com_initialize():
+    """Initialize COM on the calling thread; returns the matching cleanup, if any."""
+    try:
+        import pythoncom
+    except ImportError:
+        return None
+    pythoncom.CoInitialize()
+    return pythoncom.CoUninitialize
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class ExcelWorker:
+    """Priority queue of tasks executed one at a time on a dedicated thread."""
+
+    def __init__(self, name='excel-worker', window=EXCEL_WORKER_STATS_WINDOW):
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+        self.completed = 0
+        self.max_depth = 0
+
+    def on_worker_thread(self):
+        return threading.current_thread() is self._thread
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args, priority=PRIORITY_NORMAL, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` and return a Future of its result.
+
+        Calls made from the worker thread itself run inline, so a task may
+        use helpers that submit work of their own without deadlocking.
+        """
+        future = Future()
+        if self.on_worker_thread():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        self._ensure_started()
+        task = (future, contextvars.copy_context(), fn, args, kwargs, time.perf_counter())
+        self._queue.put((priority, next(self._seq), task))
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return future
+
+    def call(self, fn, *args, priority=PRIORITY_NORMAL, timeout=None, **kwargs):
+        """Run ``fn`` on the worker and return its result (or raise its exception).
+
+        ``timeout`` bounds the wait in the queue: a task that has not started
+        by then is cancelled and TimeoutError raised, so it never runs after
+        the caller gave up. A task that already started is waited for.
+        """
+        future = self.submit(fn, *args, priority=priority, **kwargs)
+        try:
+            return future.result(timeout)
+        except FuturesTimeoutError:
+            if future.cancel():
+                raise
+            return future.result()
+
+    def iterate(self, iterable, priority=PRIORITY_NORMAL, timeout=None):
+        """Yield the items of ``iterable``, each one produced on the worker.
+
+        Used for streamed responses, whose generators run after the view has
+        returned; other queued tasks can run between two items.
+        """
+        iterator = iter(iterable)
+        while True:
+            item = self.call(next, iterator, _DONE, priority=priority, timeout=timeout)
+            if item is _DONE:
+                return
+            yield item
+
+    def _run(self):
+        cleanup = _com_initialize()
+        try:
+            while True:
+                _, _, task = self._queue.get()
+                if task is None:
+                    break
+                future, context, fn, args, kwargs, queued = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started = time.perf_counter()
+                try:
+                    result, error = context.run(fn, *args, **kwargs), None
+                except BaseException as e:
+                    result, error = None, e
+                # Statistics are recorded before the caller is released
+                self._waits.append(started - queued)
+                self._runs.append(time.perf_counter() - started)
+                self.completed += 1
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+    def shutdown(self, wait=True):
+        """Stop the thread once the tasks already queued have run."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put((float('inf'), next(self._seq), None))
+        if wait and not self.on_worker_thread():
+            thread.join()
+
+    def stats(self):
+        """Queue depth plus wait and run times (ms) over the most recent tasks."""
+        waits, runs = list(self._waits), list(self._runs)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "completed": self.completed,
+            "wait_ms": {
+                "mean": round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95": round(1000 * _percentile(waits, 0.95), 3),
+                "max": round(1000 * max(waits, default=0.0), 3),
+            },
+            "run_ms": {
+                "mean": round(1000 * sum(runs) / len(runs), 3) if runs else 0.0,
+                "p95": round(1000 * _percentile(runs, 0.95), 3),
+                "max": round(1000 * max(runs, default=0.0), 3),
+            },
+        }
+
+
+# Process-wide worker shared by all routes
+excel_worker = ExcelWorker()
@@ -0,0 +1,359 @@
+"""Planning of /api/write-excel operations into few backend writes.
+
+write_cell and write_range ops that target A1 addresses are painted onto a
+sparse cell map in request order, so where they overlap the later op wins,
+as with sequential writes. The written cells are then cut into maximal
+rectangles: runs of adjacent columns per row, stacked while consecutive rows
+have the same run. Each rectangle is one backend write, so a table sent as
+2,000 single-cell ops becomes one call.
+
+Gaps between ops are never filled. Filling them means reading the cells
+and writing them back, which would replace formulas with their values, so
+rectangles only cover cells the request writes.
+
+Ops that cannot be placed on the grid (defined names, sheet-qualified
+addresses, ragged values) are written on their own. They split the request
+into segments that run in order.
+
+In atomic mode (``execute_atomic``) the region the plan writes is read in
+one call first and written back in one call if any write fails, so a batch
+either lands completely or leaves the sheet as it was.
+
+In bulk mode (``write_session``) the whole batch runs with screen updating,
+automatic calculation and events switched off, followed by a single
+recalculation.
+"""
+import contextlib
+import time
+
+from addresses import format_range, parse_range
+from config import WRITE_ATOMIC_MAX_CELLS
+
+
+def _ms_since(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _grid(value):
+    """Return ``value`` as a rectangular list of rows, or None if it is not one."""
+    if isinstance(value, dict):
+        return None
+    if not isinstance(value, (list, tuple)):
+        return [[value]]
+    if not value:
+        return None
+    if all(isinstance(row, (list, tuple)) for row in value):
+        width = len(value[0])
+        if not width or any(len(row) != width for row in value):
+            return None
+        if any(isinstance(v, (list, tuple, dict)) for row in value for v in row):
+            return None
+        return [list(row) for row in value]
+    if any(isinstance(v, (list, tuple, dict)) for v in value):
+        return None
+    return [list(value)]
+
+
+def _placement(address, value):
+    """Return ((row1, col1, row2, col2), rows) for a write, or (None, None) if it cannot be planned.
+
+    Like a range assignment in Excel, a single value fills the whole
+    addressed range, and a list or 2D list is written from its top-left cell.
+    """
+    if not isinstance(address, str) or '!' in address:
+        return None, None
+    try:
+        row1, col1, row2, col2 = parse_range(address)
+    except ValueError:
+        return None, None
+    rows = _grid(value)
+    if rows is None:
+        return None, None
+    if len(rows) == len(rows[0]) == 1 and (row2 > row1 or col2 > col1):
+        rows = [[rows[0][0]] * (col2 - col1 + 1) for _ in range(row2 - row1 + 1)]
+    else:
+        row2, col2 = row1 + len(rows) - 1, col1 + len(rows[0]) - 1
+    return (row1, col1, row2, col2), rows
+
+
+class WriteOp:
+    """One valid write_cell or write_range operation of a request."""
+
+    __slots__ = ('index', 'kind', 'address', 'value', 'bounds', 'rows')
+
+    def __init__(self, index, kind, address, value):
+        self.index = index
+        self.kind = kind
+        self.address = address
+        self.value = value
+        self.bounds, self.rows = _placement(address, value)
+
+    def success(self):
+        if self.kind == 'write_cell':
+            return {"success": f"Written '{self.value}' to cell {self.address}"}
+        return {"success": f"Written data to range {self.address}"}
+
+    def failure(self, error):
+        target = 'cell' if self.kind == 'write_cell' else 'range'
+        return {"error": f"Failed to write to {target} {self.address}: {error}"}
+
+
+class WriteBlock:
+    """One backend write: ``value`` at ``address``, carrying the ops it writes for."""
+
+    __slots__ = ('address', 'value', 'bounds', 'ops')
+
+    def __init__(self, address, value, bounds, ops):
+        self.address = address
+        self.value = value
+        self.bounds = bounds
+        self.ops = ops
+
+    @property
+    def cells(self):
+        if self.bounds is None:
+            return 1
+        row1, col1, row2, col2 = self.bounds
+        return (row2 - row1 + 1) * (col2 - col1 + 1)
+
+
+class AtomicWriteError(ValueError):
+    """Raised when a batch cannot be written atomically."""
+
+
+def parse_operations(operations):
+    """Validate a request's operations.
+
+    Returns the valid ops and a results list holding an error dict for
+    every invalid operation and None for the valid ones.
+    """
+    ops, results = [], []
+    for index, operation in enumerate(operations):
+        op_type = operation.get('type') if isinstance(operation, dict) else None
+        if op_type == 'write_cell':
+            if not operation.get('cell'):
+                results.append({"error": "Cell address required for write_cell operation"})
+                continue
+            ops.append(WriteOp(index, op_type, operation['cell'], operation.get('value')))
+        elif op_type == 'write_range':
+            if not operation.get('range') or not operation.get('values'):
+                results.append({"error": "Range and values required for write_range operation"})
+                continue
+            ops.append(WriteOp(index, op_type, operation['range'], operation['values']))
+        else:
+            results.append({"error": f"Unknown operation type: {op_type}"})
+            continue
+        results.append(None)
+    return ops, results
+
+
+def _rectangles(cells, ops):
+    """Cut a {row: {col: (value, op index)}} map into maximal rectangles of written cells."""
+    blocks, open_blocks = [], {}
+
+    def close(span, block):
+        row1, rows, owners = block
+        col1, col2 = span
+        bounds = (row1, col1, row1 + len(rows) - 1, col2)
+        blocks.append(WriteBlock(format_range(*bounds), rows, bounds,
+                                 [ops[i] for i in sorted(owners)]))
+
+    for row in sorted(cells):
+        line = cells[row]
+        cols = sorted(line)
+        runs, start = [], cols[0]
+        for prev, col in zip(cols, cols[1:]):
+            if col != prev + 1:
+                runs.append((start, prev))
+                start = col
+        runs.append((start, cols[-1]))
+
+        continuing = {}
+        for span in runs:
+            entries = [line[col] for col in range(span[0], span[1] + 1)]
+            block = open_blocks.pop(span, None)
+            if block is not None and block[0] + len(block[1]) == row:
+                block[1].append([value for value, _ in entries])
+                block[2].update(owner for _, owner in entries)
+            else:
+                if block is not None:
+                    close(span, block)
+                block = (row, [[value for value, _ in entries]], {owner for _, owner in entries})
+            continuing[span] = block
+        for span, block in open_blocks.items():
+            close(span, block)
+        open_blocks = continuing
+    for span, block in open_blocks.items():
+        close(span, block)
+    return blocks
+
+
+def _segment(cells, by_index):
+    """Rectangles of one painted segment, with superseded ops attached.
+
+    An op whose cells were all overwritten by later ops owns no cell, yet
+    still needs a result: it rides along with the block holding its
+    top-left cell, i.e. the write that replaced it.
+    """
+    blocks = _rectangles(cells, by_index)
+    owned = {op.index for block in blocks for op in block.ops}
+    for index, op in by_index.items():
+        if index in owned:
+            continue
+        row, col = op.bounds[0], op.bounds[1]
+        for block in blocks:
+            row1, col1, row2, col2 = block.bounds
+            if row1 <= row <= row2 and col1 <= col <= col2:
+                block.ops.append(op)
+                break
+    return blocks
+
+
+def plan_writes(ops):
+    """Turn valid ops into the list of WriteBlocks to write, in order.
+
+    Every op is carried by at least one block, so each gets a result.
+    """
+    steps, cells, by_index = [], {}, {}
+    for op in ops:
+        if op.bounds is None:
+            # Unplannable op: flush what is painted so far, then write it on its own
+            if cells:
+                steps.extend(_segment(cells, by_index))
+                cells, by_index = {}, {}
+            steps.append(WriteBlock(op.address, op.value, None, [op]))
+            continue
+        by_index[op.index] = op
+        row1, col1 = op.bounds[0], op.bounds[1]
+        for r, values in enumerate(op.rows):
+            line = cells.setdefault(row1 + r, {})
+            line.update(zip(range(col1, col1 + len(values)), ((v, op.index) for v in values)))
+    if cells:
+        steps.extend(_segment(cells, by_index))
+    return steps
+
+
+def execute_plan(backend, sheet, steps, results):
+    """Run every step with one backend write each and fill in the per-op results.
+
+    An op succeeds unless a write covering one of its cells failed.
+    """
+    failed = {}
+    for step in steps:
+        try:
+            backend.write_values(sheet, step.address, step.value)
+        except Exception as e:
+            for op in step.ops:
+                failed.setdefault(op.index, op.failure(e))
+    for step in steps:
+        for op in step.ops:
+            results[op.index] = failed.get(op.index) or op.success()
+    return results
+
+
+def plan_bounds(steps):
+    """Return the bounding rectangle of every planned step.
+
+    Raises AtomicWriteError when a step is not a rectangle on the sheet
+    (defined names, other sheets) or the region exceeds WRITE_ATOMIC_MAX_CELLS.
+    """
+    if any(step.bounds is None for step in steps):
+        raise AtomicWriteError("Atomic writes need A1 addresses on the target sheet")
+    row1 = min(step.bounds[0] for step in steps)
+    col1 = min(step.bounds[1] for step in steps)
+    row2 = max(step.bounds[2] for step in steps)
+    col2 = max(step.bounds[3] for step in steps)
+    cells = (row2 - row1 + 1) * (col2 - col1 + 1)
+    if cells > WRITE_ATOMIC_MAX_CELLS:
+        raise AtomicWriteError(f"Atomic region {format_range(row1, col1, row2, col2)} has {cells} cells, "
+                               f"more than {WRITE_ATOMIC_MAX_CELLS}")
+    return row1, col1, row2, col2
+
+
+def execute_atomic(backend, sheet, steps, results, timing=None):
+    """Run the steps all-or-nothing and fill in the per-op results.
+
+    The region covering every step is snapshotted with one read (formulas,
+    so formula cells survive a rollback). The first failing write stops the
+    batch and the snapshot is written back with one write; that op reports
+    the failure and every other op reports the rollback. Ops that failed
+    validation abort the batch before anything is written.
+
+    Returns a summary dict: committed, rolled_back, snapshot_cells and, if
+    the rollback itself failed, rollback_error.
+    """
+    timing = {} if timing is None else timing
+    ops = [op for step in steps for op in step.ops]
+    summary = {"committed": False, "rolled_back": False, "snapshot_cells": 0}
+    if any(result is not None for result in results):
+        for op in ops:
+            results[op.index] = {"error": "Not written: the batch has invalid operations"}
+        return summary
+    if not steps:
+        summary["committed"] = True
+        return summary
+
+    bounds = plan_bounds(steps)
+    region = format_range(*bounds)
+    start = time.perf_counter()
+    snapshot = backend.read_formulas(sheet, region)
+    timing['snapshot_ms'] = _ms_since(start)
+    summary["snapshot_cells"] = (bounds[2] - bounds[0] + 1) * (bounds[3] - bounds[1] + 1)
+
+    for step in steps:
+        try:
+            backend.write_values(sheet, step.address, step.value)
+        except Exception as e:
+            failed, error = step, e
+            break
+    else:
+        for op in ops:
+            results[op.index] = op.success()
+        summary["committed"] = True
+        return summary
+
+    start = time.perf_counter()
+    try:
+        backend.write_formulas(sheet, region, snapshot)
+        summary["rolled_back"] = True
+    except Exception as e:
+        summary["rollback_error"] = str(e)
+    timing['rollback_ms'] = _ms_since(start)
+    culprit = min(op.index for op in failed.ops)
+    outcome = "Rolled back" if summary["rolled_back"] else "Rollback failed"
+    for op in ops:
+        results[op.index] = {"error": f"{outcome}: operation {culprit} failed"}
+    for op in failed.ops:
+        results[op.index] = op.failure(error)
+    return summary
+
+
+@contextlib.contextmanager
+def write_session(backend, app, timing, bulk=False):
+    """Time the writes made inside the block, optionally in bulk mode.
+
+    ``timing`` receives write_ms, plus suspend_ms, recalc_ms and restore_ms
+    in bulk mode. The previous settings are restored whatever happens; the
+    recalculation is skipped when calculation was already manual, as the
+    writes would not have triggered one either.
+    """
+    state = None
+    if bulk:
+        start = time.perf_counter()
+        state = backend.suspend_updates(app)
+        timing['suspend_ms'] = _ms_since(start)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing['write_ms'] = _ms_since(start)
+        if state is not None:
+            start = time.perf_counter()
+            try:
+                if state['calculation'] != 'manual':
+                    backend.recalculate(app)
+            finally:
+                timing['recalc_ms'] = _ms_since(start)
+                start = time.perf_counter()
+                backend.restore_updates(app, state)
+                timing['restore_ms'] = _ms_since(start)